@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from typing import Any, Dict, List
+
+# Allow running as `python benchmarks/benchmark_translation.py` from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ai_models import AIModelHandler
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_SENTENCES = [
+    "Good morning, how are you today?",
+    "Please wash your hands before eating.",
+    "The market opens early on Saturday.",
+    "Where is the nearest hospital?",
+    "We will hold the community meeting after the rain stops.",
+    "My brother works as a teacher in the village school.",
+    "Thank you for your help.",
+    "The farmers are harvesting maize and yams this week, and prices are expected to fall.",
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def benchmark_engine(engine_name: str, sentences: List[str], source_lang: str, target_lang: str,
+                     batch_size: int, repeat: int) -> Dict[str, Any]:
+    """Time translate_batch calls for one engine and summarise throughput and latency."""
+    handler = AIModelHandler(whisper_model_name="small", translation_engine=engine_name)
+    engine = handler.get_translation_engine(source_lang, target_lang)
+    if engine.name != engine_name:
+        logger.warning(f"Requested engine '{engine_name}' is unavailable, measured '{engine.name}' instead")
+
+    batches = [sentences[i:i + batch_size] for i in range(0, len(sentences), batch_size)]
+    engine.translate_batch(batches[0])  # warm-up
+
+    latencies = []
+    output_tokens = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for batch in batches:
+            batch_started = time.perf_counter()
+            outputs = engine.translate_batch(batch)
+            latencies.append((time.perf_counter() - batch_started) * 1000)
+            output_tokens += sum(len(engine.tokenizer.tokenize(text)) for text in outputs)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "engine": engine.name,
+        "batches": len(latencies),
+        "batch_size": batch_size,
+        "tokens_per_sec": round(output_tokens / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "total_seconds": round(elapsed, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark UweTalk translation engines")
+    parser.add_argument("--engines", default="torch,ctranslate2", help="Comma separated engines to compare")
+    parser.add_argument("--source-lang", default="en", help="Source language code")
+    parser.add_argument("--target-lang", default="ha", help="Target language code")
+    parser.add_argument("--sentences", help="Text file with one sentence per line (defaults to built-in samples)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Sentences per translate_batch call")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the sentence list")
+    parser.add_argument("--json", dest="json_output", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.sentences:
+        with open(args.sentences, 'r', encoding='utf-8') as f:
+            sentences = [line.strip() for line in f if line.strip()]
+    else:
+        sentences = SAMPLE_SENTENCES
+
+    results = []
+    for engine_name in [name.strip() for name in args.engines.split(",") if name.strip()]:
+        logger.info(f"Benchmarking {engine_name} on {len(sentences)} sentences x {args.repeat}")
+        results.append(benchmark_engine(engine_name, sentences, args.source_lang, args.target_lang,
+                                        args.batch_size, args.repeat))
+
+    print(f"{'engine':<12} {'tokens/sec':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for result in results:
+        print(f"{result['engine']:<12} {result['tokens_per_sec']:>10} {result['p50_ms']:>8} {result['p95_ms']:>8}")
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,23 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
-from routers import translate
-
+# Before the router import: it reads its settings from the environment at import time
 load_dotenv()
 
+from routers import translate
+from services.model_preloader import ModelPreloader
+
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
 WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
+PRELOAD_WHISPER = os.getenv("PRELOAD_WHISPER", "true").lower() == "true"
+PRELOAD_TTS = os.getenv("PRELOAD_TTS", "true").lower() == "true"
+# Comma separated language pairs, e.g. "en-ha,en-yo"
+PRELOAD_TRANSLATION_PAIRS = [pair.strip() for pair in os.getenv("PRELOAD_TRANSLATION_PAIRS", "en-ha").split(",") if pair.strip()]
 
 # Default origins for development. For production, you should set this environment variable.
 default_origins = [
@@ -18,7 +26,27 @@ default_origins = [
 ]
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", ",".join(default_origins)).split(",")
 
-app = FastAPI(title="UweTalk AI Backend")
+def _build_preload_tasks():
+    """Models to warm up at startup, keyed by the name reported on /ready."""
+    tasks = {}
+    if PRELOAD_WHISPER:
+        tasks[f"whisper:{WHISPER_MODEL_NAME}"] = translate.model_handler.get_stt_engine
+    for pair in PRELOAD_TRANSLATION_PAIRS:
+        src, _, tgt = pair.partition("-")
+        tasks[f"translation:{pair}"] = lambda src=src, tgt=tgt: translate.model_handler.get_translation_engine(src, tgt)
+    if PRELOAD_TTS:
+        tasks["tts"] = translate.tts_service.load_coqui_model
+    return tasks
+
+preloader = ModelPreloader(_build_preload_tasks())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models in the background so the liveness check answers right away
+    preloader.start()
+    yield
+
+app = FastAPI(title="UweTalk AI Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,4 +62,13 @@ app.include_router(translate.router)
 @app.get("/")
 def health():
     """Health check endpoint."""
-    return {"status": "running", "whisper_model": WHISPER_MODEL_NAME}
\ No newline at end of file
+    return {"status": "running", "whisper_model": WHISPER_MODEL_NAME}
+
+@app.get("/ready")
+def ready():
+    """Readiness check: 200 once every preloaded model is warm, 503 before that."""
+    is_ready = preloader.is_ready()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "models": preloader.get_status()},
+    )
@@ -1,29 +1,156 @@
 import os
+import re
+import json
+import base64
 import time
-import tempfile
-from typing import Optional
+import asyncio
+import logging
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from services.ai_models import AIModelHandler
+from services.translation_batcher import TranslationBatcher
+from services.translation_cache import TranslationCache
+from services.document_translator import DocumentTranslator
+from services.inference_executor import InferenceExecutor
+from services.streaming_stt import SpeechSegmenter, Pcm16Decoder, OpusStreamDecoder
+from services.long_audio import LongAudioTranscriber, split_on_silence
+from services.streaming_pipeline import StagedPipeline
 from services.tts_service import TTSService
+from services.tts_cache import TTSCache
 from services.auto_learning import AutoLearningService
-from utils.file_helpers import save_upload_to_tmp, convert_to_wav, process_multimedia_file, get_file_type
-from utils.auth import require_key
-
-try:
-    from gtts import gTTS
-except Exception:
-    gTTS = None
+from services.job_manager import JobManager
+from services.training_scheduler import TrainingScheduler, parse_cpu_list, default_training_cpus
+from utils.file_helpers import save_upload_to_tmp, process_multimedia_file, get_file_type
+from utils.audio_ingest import SAMPLE_RATE, decode_upload
+from utils.video_ingest import VideoAudioExtractor
+from utils.text import split_sentences
+from utils.auth import require_key, require_admin_key
 
 WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", 3072))
+TRANSLATION_ENGINE = os.getenv("TRANSLATION_ENGINE", "torch")  # torch / ctranslate2
+TRANSLATION_CT2_THREADS = int(os.getenv("TRANSLATION_CT2_THREADS", 0))  # 0 = all cores
+STT_ENGINE = os.getenv("STT_ENGINE", "openai")  # openai / faster-whisper
+STT_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "int8")
+STT_BEAM_SIZE = int(os.getenv("STT_BEAM_SIZE", 5))
+STT_VAD_FILTER = os.getenv("STT_VAD_FILTER", "true").lower() == "true"
+LONG_AUDIO_WORKERS = int(os.getenv("LONG_AUDIO_WORKERS", 0))  # 0 = as many as fit in the memory budget
+LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", 30))
+STT_MAX_UPLOAD_MB = int(os.getenv("STT_MAX_UPLOAD_MB", 100))
+STT_MAX_AUDIO_SECONDS = float(os.getenv("STT_MAX_AUDIO_SECONDS", 600))
+LONG_AUDIO_MAX_SECONDS = float(os.getenv("LONG_AUDIO_MAX_SECONDS", 4 * 3600))
+TRANSLATION_MAX_BATCH_SIZE = int(os.getenv("TRANSLATION_MAX_BATCH_SIZE", 16))
+TRANSLATION_MAX_WAIT_MS = float(os.getenv("TRANSLATION_MAX_WAIT_MS", 10))
+TRANSLATION_RESULT_TIMEOUT = float(os.getenv("TRANSLATION_RESULT_TIMEOUT", 600))  # seconds a request waits for its batch
+MAX_BATCH_TEXTS = int(os.getenv("TRANSLATION_MAX_BATCH_TEXTS", 256))
+TRANSLATION_CACHE_MEMORY_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MEMORY_ENTRIES", 10000))
+TRANSLATION_CACHE_DISK_ENTRIES = int(os.getenv("TRANSLATION_CACHE_DISK_ENTRIES", 200000))
+TRANSLATION_CACHE_TTL_HOURS = float(os.getenv("TRANSLATION_CACHE_TTL_HOURS", 720))
+TRANSLATION_DOCUMENT_THRESHOLD_CHARS = int(os.getenv("TRANSLATION_DOCUMENT_THRESHOLD_CHARS", 1000))
+TRANSLATION_DOCUMENT_MAX_CHARS = int(os.getenv("TRANSLATION_DOCUMENT_MAX_CHARS", 200000))
+TRANSLATION_DOCUMENT_BATCH_TOKENS = int(os.getenv("TRANSLATION_DOCUMENT_BATCH_TOKENS", 4096))
+PIPELINE_CHUNK_SECONDS = float(os.getenv("PIPELINE_CHUNK_SECONDS", 15))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))
+VIDEO_INGEST_WORKERS = int(os.getenv("VIDEO_INGEST_WORKERS", 2))
+VIDEO_INGEST_TIMEOUT = float(os.getenv("VIDEO_INGEST_TIMEOUT", 600))
+JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", "./jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_MAX_PER_KEY = int(os.getenv("JOB_MAX_PER_KEY", 2))  # queued + running jobs per API key, 0 = no limit
+JOB_TTL_HOURS = float(os.getenv("JOB_TTL_HOURS", 24))
+TRAINING_JOBS_DIR = os.getenv("TRAINING_JOBS_DIR", "./training_jobs")
+TRAINING_MAX_CONCURRENT = int(os.getenv("TRAINING_MAX_CONCURRENT", 1))
+TRAINING_NICE = int(os.getenv("TRAINING_NICE", 10))
+TRAINING_CPUS = os.getenv("TRAINING_CPUS", "")  # e.g. "2-7"; empty = all but TRAINING_RESERVED_CPUS
+TRAINING_RESERVED_CPUS = int(os.getenv("TRAINING_RESERVED_CPUS", 1))
+MODEL_AUTO_ACTIVATE = os.getenv("MODEL_AUTO_ACTIVATE", "true").lower() == "true"  # serve models from /train/ once warm
+FEEDBACK_EXPORT_SHARD_ROWS = int(os.getenv("FEEDBACK_EXPORT_SHARD_ROWS", 100000))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./models_cache/tts_cache")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", 512))
+TTS_CACHE_MAX_AGE = int(os.getenv("TTS_CACHE_MAX_AGE", 86400))  # seconds clients/proxies may reuse /tts/ responses
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", 16))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", 5))
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-model_handler = AIModelHandler(whisper_model_name=WHISPER_MODEL_NAME)
-tts_service = TTSService()
+model_handler = AIModelHandler(
+    whisper_model_name=WHISPER_MODEL_NAME,
+    memory_budget_mb=MODEL_MEMORY_BUDGET_MB,
+    translation_engine=TRANSLATION_ENGINE,
+    ct2_threads=TRANSLATION_CT2_THREADS,
+    stt_engine=STT_ENGINE,
+    stt_compute_type=STT_COMPUTE_TYPE,
+    stt_beam_size=STT_BEAM_SIZE,
+    stt_vad_filter=STT_VAD_FILTER,
+)
+translation_cache = TranslationCache(
+    db_path=str(model_handler.models_dir / "translation_cache.sqlite3"),
+    max_memory_entries=TRANSLATION_CACHE_MEMORY_ENTRIES,
+    max_disk_entries=TRANSLATION_CACHE_DISK_ENTRIES,
+    ttl_seconds=TRANSLATION_CACHE_TTL_HOURS * 3600,
+)
+translation_batcher = TranslationBatcher(
+    model_handler,
+    max_batch_size=TRANSLATION_MAX_BATCH_SIZE,
+    max_wait_ms=TRANSLATION_MAX_WAIT_MS,
+    cache=translation_cache,
+    result_timeout=TRANSLATION_RESULT_TIMEOUT,
+)
+document_translator = DocumentTranslator(
+    model_handler,
+    cache=translation_cache,
+    max_batch_size=max(TRANSLATION_MAX_BATCH_SIZE, 32),
+    max_batch_tokens=TRANSLATION_DOCUMENT_BATCH_TOKENS,
+)
+tts_service = TTSService(residency=model_handler.residency)
+tts_cache = TTSCache(cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_MB * 2**20)
+long_audio_transcriber = LongAudioTranscriber(
+    model_handler,
+    workers=LONG_AUDIO_WORKERS or None,
+    max_chunk_s=LONG_AUDIO_CHUNK_SECONDS,
+)
+video_extractor = VideoAudioExtractor(
+    max_workers=VIDEO_INGEST_WORKERS,
+    timeout=VIDEO_INGEST_TIMEOUT,
+    max_seconds=LONG_AUDIO_MAX_SECONDS,
+)
+inference = InferenceExecutor(
+    limits={
+        "stt": int(os.getenv("INFERENCE_STT_WORKERS", 1)),
+        # Long recordings run on their own process pool for minutes or hours;
+        # a separate kind keeps them from holding the short /stt/ slots
+        "long_audio": int(os.getenv("INFERENCE_LONG_AUDIO_WORKERS", 1)),
+        # Translation workers mostly wait on the batcher, so allow enough of
+        # them for concurrent requests to be grouped into one batch.
+        "translation": int(os.getenv("INFERENCE_TRANSLATION_WORKERS", TRANSLATION_MAX_BATCH_SIZE)),
+        "tts": int(os.getenv("INFERENCE_TTS_WORKERS", 1)),
+        "media": int(os.getenv("INFERENCE_MEDIA_WORKERS", 2)),
+        "document": int(os.getenv("INFERENCE_DOCUMENT_WORKERS", 1)),
+    },
+    max_queue=INFERENCE_MAX_QUEUE,
+    retry_after=INFERENCE_RETRY_AFTER,
+)
+job_manager = JobManager(
+    jobs_dir=JOB_STORAGE_DIR,
+    max_workers=JOB_WORKERS,
+    max_jobs_per_key=JOB_MAX_PER_KEY,
+    ttl_seconds=JOB_TTL_HOURS * 3600,
+)
+training_scheduler = TrainingScheduler(
+    db_path=os.path.join(TRAINING_JOBS_DIR, "jobs.sqlite3"),
+    jobs_dir=TRAINING_JOBS_DIR,
+    max_concurrent=TRAINING_MAX_CONCURRENT,
+    nice=TRAINING_NICE,
+    cpu_affinity=parse_cpu_list(TRAINING_CPUS) if TRAINING_CPUS else default_training_cpus(TRAINING_RESERVED_CPUS),
+    on_success=lambda job: _register_trained_model(job),
+)
 auto_learning = AutoLearningService()
 
 # --- Pydantic Models for Requests ---
@@ -34,12 +161,18 @@ class TranslateRequest(BaseModel):
     source_lang: str = "en"
     target_lang: str = "ha"  # Default to Hausa, but now supports yo, ig, bin
 
+class TranslateBatchRequest(BaseModel):
+    api_key: Optional[str] = None
+    texts: List[str]
+    source_lang: str = "en"
+    target_lang: str = "ha"
+
 class TTSRequest(BaseModel):
     api_key: Optional[str] = None
     text: str
     lang: str = os.getenv("DEFAULT_TTS_LANG", "en")
     engine: str = "auto"  # gtts, coqui, auto
-    voice: Optional[str] = None
+    voice: Optional[str] = None  # registered voice id (see /voices/) or a reference wav path
 
 class FeedbackRequest(BaseModel):
     api_key: Optional[str] = None
@@ -72,50 +205,342 @@ class CorrectionRequest(BaseModel):
 
 # --- API Endpoints ---
 
+def _transcribe_audio(audio, language: Optional[str] = None, engine: Optional[str] = None):
+    """Run Whisper on decoded 16 kHz samples."""
+    try:
+        return model_handler.transcribe(audio, language=language, engine=engine)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
 @router.post("/stt/")
-async def stt_endpoint(api_key: Optional[str] = Form(None), file: UploadFile = File(...), language: Optional[str] = Form(None)):
+async def stt_endpoint(
+    api_key: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+    language: Optional[str] = Form(None),
+    engine: Optional[str] = Form(None),  # openai / faster-whisper, defaults to STT_ENGINE
+    long_audio: Optional[bool] = Form(False),  # transcribe in parallel chunks (lectures, videos)
+):
     require_key(api_key)
-    tmp = save_upload_to_tmp(file)
+    audio = await decode_upload(
+        file,
+        max_bytes=STT_MAX_UPLOAD_MB * 2**20,
+        max_seconds=LONG_AUDIO_MAX_SECONDS if long_audio else STT_MAX_AUDIO_SECONDS,
+    )
+    if long_audio:
+        result = await inference.run("long_audio", long_audio_transcriber.transcribe, audio, language, engine)
+        return {
+            "recognized_text": result["text"],
+            "segments": result["segments"],
+            "chunks": result["chunks"],
+            "audio_seconds": result["audio_seconds"],
+            "processing_seconds": result["processing_seconds"],
+        }
+    result = await inference.run("stt", _transcribe_audio, audio, language, engine)
+    return {"recognized_text": result.get("text"), "segments": result.get("segments", None)}
+
+@router.websocket("/ws/stt")
+async def stt_stream(
+    websocket: WebSocket,
+    api_key: Optional[str] = None,
+    language: Optional[str] = None,
+    translate_to: Optional[str] = None,
+    audio_format: str = "pcm16",  # pcm16 (16 kHz mono little-endian) or opus (Ogg/WebM container)
+    engine: Optional[str] = None,
+):
+    """
+    Streaming speech-to-text. The client sends binary audio chunks and a text
+    message "end" when done; the server sends JSON "partial" transcripts while
+    a segment is in progress, a "final" transcript (and translation, if
+    translate_to is set) for each finished segment, and "done" at the end.
+    """
     try:
-        wav = convert_to_wav(tmp)
-        model = model_handler.get_whisper_model()
-        result = model.transcribe(wav, language=language) if language else model.transcribe(wav)
-        text = result.get("text") if isinstance(result, dict) else str(result)
-        return {"recognized_text": text, "segments": result.get("segments", None)}
+        require_key(api_key)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+
+    segmenter = SpeechSegmenter()
+    pcm_decoder = Pcm16Decoder()
+    opus_decoder = OpusStreamDecoder() if audio_format == "opus" else None
+    send_lock = asyncio.Lock()
+    state = {"segment_id": 0, "partial_task": None}
+
+    async def send(message):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def send_partial(event, segment_id):
+        try:
+            result = await inference.run("stt", model_handler.transcribe, event["audio"], language, engine)
+        except HTTPException:
+            return  # STT is busy; skip this partial, the final transcript will follow
+        await send({"type": "partial", "segment_id": segment_id, "text": (result.get("text") or "").strip(),
+                    "start": event["start"], "end": event["end"]})
+
+    async def handle_events(events):
+        for event in events:
+            if event["type"] == "partial":
+                partial_task = state["partial_task"]
+                if partial_task is None or partial_task.done():
+                    state["partial_task"] = asyncio.create_task(send_partial(event, state["segment_id"]))
+                continue
+
+            result = await inference.run("stt", model_handler.transcribe, event["audio"], language, engine)
+            text = (result.get("text") or "").strip()
+            message = {"type": "final", "segment_id": state["segment_id"], "text": text,
+                       "start": event["start"], "end": event["end"]}
+            if translate_to and text:
+                message["translated_text"] = await inference.run(
+                    "translation", translation_batcher.translate, text, language or "en", translate_to
+                )
+            state["segment_id"] += 1
+            await send(message)
+
+    async def pump_opus():
+        while True:
+            chunk = await opus_decoder.read()
+            if not chunk:
+                break
+            await handle_events(segmenter.feed(pcm_decoder.decode(chunk)))
+
+    pump_task = None
+    try:
+        if opus_decoder is not None:
+            await opus_decoder.start()
+            pump_task = asyncio.create_task(pump_opus())
+
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                if opus_decoder is not None:
+                    await opus_decoder.write(message["bytes"])
+                else:
+                    await handle_events(segmenter.feed(pcm_decoder.decode(message["bytes"])))
+            elif message.get("text"):
+                text = message["text"].strip()
+                if text.startswith("{"):
+                    try:
+                        text = json.loads(text).get("event")
+                    except (ValueError, AttributeError):
+                        await send({"type": "error", "detail": "Control messages must be \"end\" or a JSON object"})
+                        continue
+                if text == "end":
+                    break
+
+        if opus_decoder is not None:
+            await opus_decoder.close_input()
+            await pump_task
+        await handle_events(segmenter.flush())
+        if state["partial_task"] is not None:
+            state["partial_task"].cancel()
+        await send({"type": "done", "segments": state["segment_id"]})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except HTTPException as e:
+        await send({"type": "error", "detail": e.detail})
+        await websocket.close(code=1013)  # try again later
     finally:
-        os.remove(tmp)
-        if 'wav' in locals() and os.path.exists(wav):
-            os.remove(wav)
+        if state["partial_task"] is not None:
+            state["partial_task"].cancel()
+        if pump_task is not None:
+            pump_task.cancel()
+        if opus_decoder is not None:
+            await opus_decoder.stop()
 
 @router.post("/translate/")
-def translate(req: TranslateRequest):
+async def translate(req: TranslateRequest):
     require_key(req.api_key)
-    print(f"Translating from '{req.source_lang}' to '{req.target_lang}'")
-    tokenizer, model = model_handler.get_translation_model(req.source_lang, req.target_lang)
-    inputs = tokenizer(req.text, return_tensors="pt", truncation=True)
-    outs = model.generate(**inputs)
-    translated = tokenizer.decode(outs[0], skip_special_tokens=True)
+    logger.debug(f"Translating from '{req.source_lang}' to '{req.target_lang}'")
+    translated = await _translate_text(req.text, req.source_lang, req.target_lang)
     return {"translated_text": translated}
 
+@router.post("/translate/document/")
+async def translate_document(req: TranslateRequest):
+    """Translate a long text sentence by sentence, keeping its paragraphs, and report throughput."""
+    require_key(req.api_key)
+    _check_document_length(req.text)
+    return await inference.run("document", document_translator.translate, req.text, req.source_lang, req.target_lang)
+
+async def _translate_text(text: str, source_lang: str, target_lang: str) -> str:
+    """Translate text, sending long texts through the document translator instead of truncating them."""
+    if len(text) > TRANSLATION_DOCUMENT_THRESHOLD_CHARS:
+        _check_document_length(text)
+        result = await inference.run("document", document_translator.translate, text, source_lang, target_lang)
+        return result["translated_text"]
+    return await inference.run("translation", translation_batcher.translate, text, source_lang, target_lang)
+
+def _check_document_length(text: str):
+    if len(text) > TRANSLATION_DOCUMENT_MAX_CHARS:
+        raise HTTPException(413, f"Text is longer than the {TRANSLATION_DOCUMENT_MAX_CHARS} character limit")
+
+@router.post("/translate/batch")
+async def translate_batch(req: TranslateBatchRequest):
+    """Translate a list of texts in one request."""
+    require_key(req.api_key)
+    if len(req.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(400, f"At most {MAX_BATCH_TEXTS} texts can be translated per request")
+    translated = await inference.run("translation", translation_batcher.translate_many, req.texts, req.source_lang, req.target_lang)
+    return {"translated_texts": translated}
+
+@router.get("/translate/cache/")
+def get_translation_cache_stats():
+    """Get hit/miss counters and sizes of the translation cache."""
+    return translation_cache.get_stats()
+
+async def _tts_model_version(engine: str, voice: Optional[str]) -> str:
+    """Model version for TTS cache keys; the first Coqui lookup loads the model on the TTS workers."""
+    if engine == "coqui" and tts_service.coqui_model_name is None:
+        return await inference.run("tts", tts_service.get_model_version, engine, voice)
+    return tts_service.get_model_version(engine, voice)
+
 @router.post("/tts/")
-def tts_endpoint(req: TTSRequest):
+async def tts_endpoint(req: TTSRequest, request: Request):
     """Generate speech from text using advanced TTS engines."""
     require_key(req.api_key)
     
     try:
-        # Use the new TTS service
-        audio_path = tts_service.synthesize_speech(
-            text=req.text,
-            language=req.lang,
-            engine=req.engine,
-            voice=req.voice
-        )
-        
-        return FileResponse(audio_path, media_type="audio/wav", filename="tts.wav")
-        
+        engine = tts_service.resolve_engine(req.lang, req.engine)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except RuntimeError as e:
+        raise HTTPException(500, str(e))
+
+    key = tts_cache.make_key(req.text, req.lang, engine, req.voice, await _tts_model_version(engine, req.voice))
+    # Audio is content-addressed, so a matching ETag means the client already has these bytes
+    if f'"{key}"' in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=_tts_headers(key, TTS_CACHE_MAX_AGE))
+
+    try:
+        audio_path, hit = await _synthesize_cached(key, req.text, req.lang, engine, req.voice)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"TTS generation failed: {str(e)}")
 
+    headers = _tts_headers(key, TTS_CACHE_MAX_AGE)
+    headers["X-Cache"] = "HIT" if hit else "MISS"
+    return FileResponse(audio_path, media_type=tts_cache.media_type(audio_path),
+                        filename=f"tts{audio_path.suffix}", headers=headers)
+
+@router.post("/tts/stream/")
+async def tts_stream_endpoint(req: TTSRequest):
+    """Generate speech sentence by sentence, streaming audio as each sentence is ready."""
+    require_key(req.api_key)
+
+    try:
+        engine = tts_service.resolve_engine(req.lang, req.engine)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except RuntimeError as e:
+        raise HTTPException(500, str(e))
+
+    # Already rendered as a whole: no need to synthesize again
+    key = tts_cache.make_key(req.text, req.lang, engine, req.voice, await _tts_model_version(engine, req.voice))
+    audio_path = tts_cache.get(key)
+    if audio_path is not None:
+        return FileResponse(audio_path, media_type=tts_cache.media_type(audio_path),
+                            filename=f"tts{audio_path.suffix}", headers=_tts_headers(key, TTS_CACHE_MAX_AGE))
+
+    chunks = tts_service.iter_speech(req.text, req.lang, engine, req.voice)
+    # Render the first sentence before answering so failures still get a proper status code
+    try:
+        first = await inference.run("tts", next, chunks, None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"TTS generation failed: {str(e)}")
+    if first is None:
+        raise HTTPException(400, "No text to synthesize")
+
+    async def stream():
+        chunk = first
+        pending = None
+        try:
+            while chunk is not None:
+                # Synthesize the next sentence while this one is being sent
+                pending = asyncio.ensure_future(inference.run("tts", next, chunks, None))
+                yield chunk
+                chunk = await pending
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    return StreamingResponse(stream(), media_type=tts_service.stream_media_type(engine))
+
+@router.get("/tts/audio/{key}")
+def get_tts_audio(key: str, request: Request):
+    """Fetch previously synthesized audio by its cache key (the ETag of /tts/)."""
+    if not re.fullmatch(r"[0-9a-f]{64}", key):
+        raise HTTPException(404, "Unknown audio")
+    # Content never changes for a key, so proxies may keep it as long as they like
+    headers = _tts_headers(key, 31536000, immutable=True)
+    if f'"{key}"' in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    audio_path = tts_cache.get(key)
+    if audio_path is None:
+        raise HTTPException(404, "Unknown audio")
+    return FileResponse(audio_path, media_type=tts_cache.media_type(audio_path),
+                        filename=f"tts{audio_path.suffix}", headers=headers)
+
+@router.post("/voices/")
+async def register_voice(
+    api_key: Optional[str] = Form(None),
+    voice_id: str = Form(...),
+    file: UploadFile = File(...),
+):
+    """Register a named XTTS voice from a reference recording; use voice_id as `voice` in /tts/."""
+    require_key(api_key)
+    tmp_path = await inference.run("media", save_upload_to_tmp, file)
+    try:
+        return await inference.run("tts", tts_service.register_voice, voice_id, tmp_path)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except RuntimeError as e:
+        raise HTTPException(500, str(e))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+@router.get("/voices/")
+def list_voices():
+    """List registered voice profiles."""
+    return {"voices": tts_service.voices.list()}
+
+@router.delete("/voices/{voice_id}")
+def delete_voice(voice_id: str, api_key: Optional[str] = None):
+    """Delete a registered voice profile."""
+    require_key(api_key)
+    if not tts_service.voices.delete(voice_id):
+        raise HTTPException(404, f"Unknown voice: {voice_id}")
+    return {"deleted": voice_id}
+
+@router.get("/tts/cache/")
+def get_tts_cache_stats():
+    """Get hit/miss counters and disk usage of the TTS cache."""
+    return tts_cache.get_stats()
+
+async def _synthesize_cached(key: str, text: str, language: str, engine: str,
+                             voice: Optional[str] = None) -> Tuple[Path, bool]:
+    """Return (path, was_cached) for the audio of key, synthesizing it on a miss."""
+    audio_path = tts_cache.get(key)
+    if audio_path is not None:
+        return audio_path, True
+    tmp_path = await inference.run("tts", tts_service.synthesize_speech, text, language, engine, voice)
+    try:
+        return tts_cache.put(key, tmp_path), False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _tts_headers(key: str, max_age: int, immutable: bool = False) -> dict:
+    cache_control = f"public, max-age={max_age}" + (", immutable" if immutable else "")
+    return {"ETag": f'"{key}"', "Cache-Control": cache_control, "Content-Location": f"/tts/audio/{key}"}
+
 @router.get("/tts/engines/")
 def get_tts_engines():
     """Get available TTS engines and their capabilities."""
@@ -134,51 +559,190 @@ async def pipeline(
     translate_to: Optional[str] = Form(None),
     tts: Optional[bool] = Form(False),
     src_lang: Optional[str] = Form(None),
+    stt_engine: Optional[str] = Form(None),
+    stream: Optional[bool] = Form(False),  # stream per-segment results as JSON lines
 ):
     require_key(api_key)
     recognized = None
     translated = None
 
+    if stream:
+        audio = await decode_upload(file, max_bytes=STT_MAX_UPLOAD_MB * 2**20, max_seconds=STT_MAX_AUDIO_SECONDS) if file else None
+        if audio is None and not text:
+            raise HTTPException(400, "Provide an audio file or text")
+        if tts and not tts_service.gtts_available:
+            raise HTTPException(500, "gTTS not installed")
+        events = _pipeline_events(audio, text, src_lang, translate_to, tts, stt_engine)
+        return StreamingResponse(events, media_type="application/x-ndjson")
+
     if file:
-        tmp = save_upload_to_tmp(file)
-        wav = convert_to_wav(tmp)
-        model = model_handler.get_whisper_model()
-        result = model.transcribe(wav, language=src_lang) if src_lang else model.transcribe(wav)
+        audio = await decode_upload(file, max_bytes=STT_MAX_UPLOAD_MB * 2**20, max_seconds=STT_MAX_AUDIO_SECONDS)
+        result = await inference.run("stt", _transcribe_audio, audio, src_lang, stt_engine)
         recognized = result.get("text")
-        os.remove(tmp)
-        os.remove(wav)
     elif text:
         recognized = text
 
     if translate_to and recognized:
         src = src_lang or "en"
         tgt = translate_to
-        tokenizer, model = model_handler.get_translation_model(src, tgt)
-        inputs = tokenizer(recognized, return_tensors="pt", truncation=True)
-        outs = model.generate(**inputs)
-        translated = tokenizer.decode(outs[0], skip_special_tokens=True)
+        translated = await _translate_text(recognized, src, tgt)
     else:
         translated = recognized
 
     if tts and translated:
-        if gTTS is None:
+        if not tts_service.gtts_available:
             raise HTTPException(500, "gTTS not installed")
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".mp3")
-        os.close(tmp_fd)
-        tts_obj = gTTS(text=translated, lang=(translate_to or "en"))
-        tts_obj.save(tmp_path)
-        return FileResponse(tmp_path, media_type="audio/mpeg", filename="pipeline_tts.mp3")
+        lang = translate_to or "en"
+        key = tts_cache.make_key(translated, lang, "gtts", None, tts_service.get_model_version("gtts"))
+        audio_path, _ = await _synthesize_cached(key, translated, lang, "gtts")
+        return FileResponse(audio_path, media_type="audio/mpeg", filename="pipeline_tts.mp3",
+                            headers=_tts_headers(key, TTS_CACHE_MAX_AGE))
 
     return {"recognized_text": recognized, "translated_text": translated}
 
-def _run_subprocess(cmd, cleanup_path):
-    import subprocess
+async def _pipeline_events(audio, text: Optional[str], src_lang: Optional[str], translate_to: Optional[str],
+                           tts: bool, stt_engine: Optional[str]):
+    """
+    Run STT, translation and TTS concurrently on successive segments and
+    yield one JSON line per segment as it completes, then a summary line.
+    Audio is cut at silences; text input is cut into sentences.
+    """
+    started = time.perf_counter()
+    state = {"language": src_lang}
+
+    async def source():
+        if audio is not None:
+            for index, (start, end) in enumerate(split_on_silence(audio, max_chunk_s=PIPELINE_CHUNK_SECONDS)):
+                yield {"index": index, "start": round(start / SAMPLE_RATE, 2), "end": round(end / SAMPLE_RATE, 2),
+                       "audio": audio[start:end]}
+        else:
+            for index, sentence in enumerate(split_sentences(text, language=src_lang)):
+                yield {"index": index, "recognized_text": sentence}
+
+    async def transcribe(item):
+        result = await inference.run("stt", _transcribe_audio, item.pop("audio"), state["language"], stt_engine)
+        # Segments are transcribed in order, so the first one fixes the language for the rest
+        state["language"] = state["language"] or result.get("language")
+        item["recognized_text"] = (result.get("text") or "").strip()
+        return item
+
+    async def translate(item):
+        recognized = item["recognized_text"]
+        item["translated_text"] = await _translate_text(recognized, state["language"] or "en", translate_to) if recognized else ""
+        return item
+
+    async def synthesize(item):
+        translated = item.get("translated_text", item["recognized_text"])
+        if translated:
+            lang = translate_to or "en"
+            key = tts_cache.make_key(translated, lang, "gtts", None, tts_service.get_model_version("gtts"))
+            audio_path, _ = await _synthesize_cached(key, translated, lang, "gtts")
+            item["audio_base64"] = base64.b64encode(await asyncio.to_thread(audio_path.read_bytes)).decode("ascii")
+            item["audio_format"] = "mp3"
+        return item
+
+    stages = []
+    if audio is not None:
+        stages.append(("stt", transcribe))
+    if translate_to:
+        stages.append(("translation", translate))
+    if tts:
+        stages.append(("tts", synthesize))
+    staged = StagedPipeline(stages, queue_size=PIPELINE_QUEUE_SIZE)
+
+    segments = 0
+    first_output_ms = None
     try:
-        subprocess.run(cmd, check=False)
-    finally:
-        if os.path.exists(cleanup_path):
-            time.sleep(1)  # ensure file is released
-            os.remove(cleanup_path)
+        async for item in staged.run(source()):
+            if first_output_ms is None:
+                first_output_ms = round((time.perf_counter() - started) * 1000, 1)
+            item.setdefault("translated_text", item["recognized_text"])
+            segments += 1
+            yield json.dumps({"type": "segment", **item}) + "\n"
+    except Exception as e:
+        message = e.detail if isinstance(e, HTTPException) else str(e)
+        yield json.dumps({"type": "error", "message": message}) + "\n"
+        return
+
+    timings = {f"{name}_ms": round(total, 1) for name, total in staged.totals_ms.items()}
+    timings["first_output_ms"] = first_output_ms
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    yield json.dumps({"type": "done", "segments": segments, "language": state["language"], "timings": timings}) + "\n"
+
+def _register_trained_model(job):
+    """Register the model a training job produced and, if enabled, swap it in once warm."""
+    model_path = (job.get("results") or {}).get("translation_model_path")
+    if not model_path:
+        return
+    params = job["params"]
+    slot = f"translation:{params['source_lang']}-{params['target_lang']}"
+    record = model_handler.registry.register(slot, model_path, move=True, metadata={
+        "training_job": job["job_id"],
+        "training": job["results"].get("translation_training"),
+    })
+    if MODEL_AUTO_ACTIVATE:
+        model_handler.registry.activate(slot, record["version"])
+
+def _registry_call(fn, *args):
+    try:
+        return fn(*args)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+# Hub model id such as Helsinki-NLP/opus-mt-en-ha
+_HUB_MODEL_ID = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
+
+def _registrable_checkpoint(checkpoint: str) -> str:
+    """Only checkpoints in the model cache or training job outputs (or hub model ids) may be registered."""
+    path = Path(checkpoint)
+    if not path.exists():
+        if _HUB_MODEL_ID.match(checkpoint):
+            return checkpoint
+        raise HTTPException(400, "checkpoint must be a hub model id or a path inside the model cache or training jobs")
+    resolved = path.resolve()
+    for root in (model_handler.models_dir, Path(TRAINING_JOBS_DIR)):
+        if resolved.is_relative_to(root.resolve()):
+            return str(resolved)
+    raise HTTPException(400, "checkpoint must be inside the model cache or training jobs directory")
+
+@router.get("/models/versions/")
+def get_model_versions():
+    """Model version serving each slot (Whisper, translation pairs) and the registered versions."""
+    return model_handler.get_active_versions()
+
+@router.post("/admin/models/versions/")
+def register_model_version(
+    api_key: Optional[str] = Form(None),
+    slot: str = Form(...),  # whisper, faster-whisper or translation:<src>-<tgt>
+    checkpoint: str = Form(...),  # path under models_cache or training_jobs, or hub model name
+    activate: bool = Form(True),
+):
+    """Register a checkpoint as a new version of a slot and optionally start activating it."""
+    require_admin_key(api_key)
+    record = _registry_call(model_handler.registry.register, slot, _registrable_checkpoint(checkpoint))
+    if activate:
+        record = _registry_call(model_handler.registry.activate, slot, record["version"])
+    return record
+
+@router.post("/admin/models/versions/activate")
+def activate_model_version(api_key: Optional[str] = Form(None), slot: str = Form(...), version: str = Form(...)):
+    """Load and warm a registered version in the background, then swap it in."""
+    require_admin_key(api_key)
+    return _registry_call(model_handler.registry.activate, slot, version)
+
+@router.post("/admin/models/versions/rollback")
+def rollback_model_version(api_key: Optional[str] = Form(None), slot: str = Form(...)):
+    """Switch a slot back to the version it served before the last activation."""
+    require_admin_key(api_key)
+    return _registry_call(model_handler.registry.rollback, slot)
+
+@router.get("/admin/models/")
+def get_resident_models(api_key: Optional[str] = None):
+    """Report loaded models, their memory use and load/eviction counts."""
+    require_admin_key(api_key)
+    return model_handler.residency.get_stats()
 
 @router.get("/languages/")
 def get_supported_languages():
@@ -200,43 +764,117 @@ def detect_language(req: TranslateRequest):
         "confidence": "medium"  # Placeholder - could implement actual confidence scoring
     }
 
-@router.post("/process-multimedia/")
+def _publish_job_files(result: Dict[str, Any], job_dir: Path):
+    """Replace server paths of files a job produced with their download URLs."""
+    result.pop('file_path', None)
+    for item in result.get('extracted_data', []):
+        for key in ('path', 'output_path'):
+            path = item.pop(key, None)
+            if path:
+                name = Path(path).name
+                item['file'] = name
+                item['url'] = f"/jobs/{job_dir.name}/files/{name}"
+
+def _multimedia_job(job_dir: Path, report, input_path: str, metadata: Dict[str, Any],
+                    transcribe: bool, language: Optional[str], translate_to: Optional[str],
+                    pairs_format: Optional[str]) -> Dict[str, Any]:
+    """Job body for /process-multimedia/; every output file is written into job_dir."""
+    report(0, 1, "processing")
+    transcriber = None
+    if transcribe:
+        # Same limits as the synchronous endpoints: the executor's workers and the audio length cap
+        transcriber = partial(
+            inference.call, "long_audio", long_audio_transcriber.transcribe_file,
+            language=language,
+            progress_callback=lambda done, total: report(done, total, "transcribing"),
+            max_seconds=LONG_AUDIO_MAX_SECONDS,
+        )
+    translator = None
+    if translate_to:
+        def translator(content: str) -> Dict[str, Any]:
+            _check_document_length(content)
+            return inference.call("document", document_translator.translate, content, language or "en", translate_to)
+    pairs_output = str(job_dir / f"pairs.{pairs_format}") if pairs_format else None
+    try:
+        result = process_multimedia_file(input_path, transcriber, translator, pairs_output, video_extractor,
+                                         max_audio_seconds=LONG_AUDIO_MAX_SECONDS)
+    finally:
+        # Only the derived files are kept
+        os.remove(input_path)
+    if result.get('error'):
+        raise RuntimeError(result['error'])
+    _publish_job_files(result, job_dir)
+    result.update(metadata)
+    return result
+
+@router.post("/process-multimedia/", status_code=202)
 async def process_multimedia_endpoint(
-    background_tasks: BackgroundTasks,
     api_key: Optional[str] = Form(None),
     file: UploadFile = File(...),
     extract_audio: Optional[bool] = Form(False),
-    extract_text: Optional[bool] = Form(False)
+    extract_text: Optional[bool] = Form(False),
+    transcribe: Optional[bool] = Form(False),  # also transcribe audio/video with the long-audio mode
+    language: Optional[str] = Form(None),
+    translate_to: Optional[str] = Form(None),  # also translate text documents into this language
+    pairs_format: Optional[str] = Form(None),  # jsonl / parquet: write spreadsheet pairs to a dataset file
 ):
-    """Process multimedia files (video, audio, documents, spreadsheets) for training data extraction."""
+    """
+    Queue a multimedia file (video, audio, document, spreadsheet) for training
+    data extraction. Returns a job id; poll GET /jobs/{job_id} for progress
+    and results.
+    """
     require_key(api_key)
-    
+    if pairs_format and pairs_format not in ("jsonl", "parquet"):
+        raise HTTPException(400, "pairs_format must be jsonl or parquet")
+
+    job = job_manager.create(api_key, "multimedia")
     try:
-        # Save uploaded file temporarily
-        tmp_path = save_upload_to_tmp(file)
-        
-        # Process the multimedia file
-        result = process_multimedia_file(tmp_path)
-        
-        # Add file metadata
-        result['original_filename'] = file.filename
-        result['file_size'] = file.size
-        result['content_type'] = file.content_type
-        
-        # Clean up temporary file
-        background_tasks.add_task(os.remove, tmp_path)
-        
-        return {
-            "status": "success",
-            "processing_result": result,
-            "message": f"Successfully processed {file.filename}"
-        }
-        
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Error processing file: {str(e)}"
-        }
+        # The upload goes straight into the job's storage so it is cleaned up with it
+        input_path = await inference.run("media", save_upload_to_tmp, file, str(job["dir"]))
+    except Exception:
+        job_manager.discard(job["job_id"])
+        raise
+    metadata = {
+        'original_filename': file.filename,
+        'file_size': file.size,
+        'content_type': file.content_type,
+    }
+    job_manager.submit(job["job_id"], _multimedia_job, input_path, metadata,
+                       transcribe, language, translate_to, pairs_format)
+    return {
+        "status": "queued",
+        "job_id": job["job_id"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "message": f"Queued {file.filename} for processing",
+    }
+
+def _get_own_job(job_id: str, api_key: Optional[str]) -> Dict[str, Any]:
+    require_key(api_key)
+    job = job_manager.get(job_id)
+    if job is None or not job_manager.is_owner(job_id, api_key):
+        raise HTTPException(404, "Unknown or expired job")
+    return job
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, api_key: Optional[str] = None):
+    """Get the status, progress and (once finished) results of a job."""
+    return _get_own_job(job_id, api_key)
+
+@router.get("/jobs/{job_id}/files/{name}")
+def get_job_file(job_id: str, name: str, api_key: Optional[str] = None):
+    """Download a file produced by a job (see the "url" fields of its result)."""
+    _get_own_job(job_id, api_key)
+    path = job_manager.file_path(job_id, name)
+    if path is None:
+        raise HTTPException(404, "Unknown file")
+    return FileResponse(path, filename=name)
+
+@router.delete("/jobs/{job_id}")
+def delete_job(job_id: str, api_key: Optional[str] = None):
+    """Delete a finished job and its files before they expire."""
+    _get_own_job(job_id, api_key)
+    job_manager.delete(job_id)
+    return {"deleted": job_id}
 
 @router.post("/feedback/translation/")
 def submit_translation_feedback(req: FeedbackRequest):
@@ -298,8 +936,8 @@ def export_training_data_from_feedback(background_tasks: BackgroundTasks, api_ke
     """Export training data generated from user feedback."""
     require_key(api_key)
     
-    output_file = f"./feedback_data/training_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    result = auto_learning.export_training_data(output_file)
+    output_dir = f"./feedback_data/training_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    result = auto_learning.export_training_data(output_dir, shard_rows=FEEDBACK_EXPORT_SHARD_ROWS)
     
     return result
 
@@ -313,11 +951,57 @@ def check_if_should_retrain(threshold: int = 100):
         "message": "Model should be retrained" if should_retrain else "Not enough feedback for retraining"
     }
 
-@router.post("/train/")
-async def train_endpoint(background_tasks: BackgroundTasks, api_key: Optional[str] = Form(None), training_file: UploadFile = File(...)):
+@router.post("/train/", status_code=202)
+async def train_endpoint(
+    api_key: Optional[str] = Form(None),
+    training_file: UploadFile = File(...),
+    source_lang: str = Form("en"),
+    target_lang: str = Form("ha"),
+    epochs: int = Form(1),
+):
+    """Queue a fine-tuning run on the uploaded dataset; poll GET /train/jobs/{job_id} for its status."""
+    require_key(api_key)
+    if not 1 <= epochs <= 20:
+        raise HTTPException(400, "epochs must be between 1 and 20")
+    src = model_handler.normalize_lang_code(source_lang)
+    tgt = model_handler.normalize_lang_code(target_lang)
+    tmp = await inference.run("media", save_upload_to_tmp, training_file)
+    # Fine-tune what currently serves the pair; the result is registered as a new version, not served directly
+    args = ["--model", WHISPER_MODEL_NAME, "--source-lang", src, "--target-lang", tgt, "--epochs", str(epochs),
+            "--base-model", model_handler.get_translation_checkpoint(src, tgt), "--output-dir", "{job_dir}/model",
+            "--checkpoint-dir", "{job_dir}/checkpoint"]
+    job = training_scheduler.submit(
+        tmp, "train/train_whisper.py", args,
+        params={"filename": training_file.filename, "source_lang": src, "target_lang": tgt, "epochs": epochs},
+    )
+    return {"status": "queued", "job_id": job["job_id"], "queue_position": job.get("queue_position")}
+
+@router.get("/train/jobs/")
+def list_training_jobs(api_key: Optional[str] = None, status: Optional[str] = None, limit: int = 50):
+    """List training jobs, newest first."""
+    require_key(api_key)
+    return {"jobs": training_scheduler.list(status, min(limit, 500)), **training_scheduler.get_stats()}
+
+@router.get("/train/jobs/{job_id}")
+def get_training_job(job_id: str, api_key: Optional[str] = None):
+    """Status, resource usage and results of a training job."""
+    require_key(api_key)
+    job = training_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Unknown training job")
+    return job
+
+@router.get("/train/jobs/{job_id}/log")
+def get_training_log(job_id: str, api_key: Optional[str] = None, tail_kb: int = 64):
+    """The end of a training job's output."""
+    require_key(api_key)
+    if training_scheduler.get(job_id) is None:
+        raise HTTPException(404, "Unknown training job")
+    log = training_scheduler.read_log(job_id, max(1, min(tail_kb, 1024)) * 1024)
+    return PlainTextResponse(log or "")
+
+@router.post("/train/jobs/{job_id}/cancel")
+def cancel_training_job(job_id: str, api_key: Optional[str] = Form(None)):
+    """Cancel a queued training job or stop a running one."""
     require_key(api_key)
-    tmp = save_upload_to_tmp(training_file)
-    # This is a placeholder. You would replace this with your actual training script.
-    cmd = ["python", "train/train_whisper.py", "--dataset", tmp, "--model", WHISPER_MODEL_NAME]
-    background_tasks.add_task(_run_subprocess, cmd, tmp)
-    return {"status": "training_started", "note": "Training runs in the background on the server."}
\ No newline at end of file
+    return training_scheduler.cancel(job_id)
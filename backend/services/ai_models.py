@@ -1,6 +1,15 @@
 import os
+import re
+import time
 import logging
-from typing import Dict, Tuple, Optional
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from services.model_registry import ModelRegistry
+from services.model_residency import ModelResidencyManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,15 +27,147 @@ except Exception:
     MarianMTModel = None
     MarianTokenizer = None
 
+try:
+    import ctranslate2
+except ImportError:
+    ctranslate2 = None
+
+try:
+    from faster_whisper import WhisperModel as FasterWhisperModel
+except ImportError:
+    FasterWhisperModel = None
+
+class SpeechEngine(ABC):
+    """Common interface for speech-to-text backends."""
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, audio, language: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe a file path or 16 kHz float32 array into {"text", "segments", "language"}."""
+
+class OpenAIWhisperEngine(SpeechEngine):
+    """The reference openai-whisper implementation (PyTorch, fp32 on CPU)."""
+    name = "openai"
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, language: Optional[str] = None) -> Dict[str, Any]:
+        result = self.model.transcribe(audio, language=language) if language else self.model.transcribe(audio)
+        return {
+            "text": result.get("text"),
+            "segments": result.get("segments"),
+            "language": result.get("language", language),
+        }
+
+class FasterWhisperEngine(SpeechEngine):
+    """Whisper on CTranslate2 with int8 compute, VAD filtering and configurable beam size."""
+    name = "faster-whisper"
+
+    def __init__(self, model, beam_size: int = 5, vad_filter: bool = True):
+        self.model = model
+        self.beam_size = beam_size
+        self.vad_filter = vad_filter
+
+    def transcribe(self, audio, language: Optional[str] = None) -> Dict[str, Any]:
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=self.beam_size,
+            vad_filter=self.vad_filter,
+        )
+        # segments is a generator; decoding happens while it is consumed
+        segment_list = [
+            {"id": i, "start": segment.start, "end": segment.end, "text": segment.text}
+            for i, segment in enumerate(segments)
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in segment_list),
+            "segments": segment_list,
+            "language": info.language,
+        }
+
+class TranslationEngine(ABC):
+    """Common interface for the backends that run Marian translation."""
+    name = "base"
+    # Version of the checkpoint this engine actually runs, used in translation cache keys
+    version: Optional[str] = None
+
+    @abstractmethod
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """Translate a batch of texts, returning one output per input in the same order."""
+
+class TorchMarianEngine(TranslationEngine):
+    """PyTorch eager `generate` on the transformers Marian model."""
+    name = "torch"
+
+    def __init__(self, tokenizer, model, version: Optional[str] = None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.version = version
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+        outs = self.model.generate(**inputs)
+        return self.tokenizer.batch_decode(outs, skip_special_tokens=True)
+
+class CTranslate2MarianEngine(TranslationEngine):
+    """Marian converted to CTranslate2 with int8 weights for fast CPU inference."""
+    name = "ctranslate2"
+
+    def __init__(self, tokenizer, translator, beam_size: int = 4, version: Optional[str] = None):
+        self.tokenizer = tokenizer
+        self.translator = translator
+        self.beam_size = beam_size
+        self.version = version
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        source_tokens = [
+            self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text, truncation=True))
+            for text in texts
+        ]
+        results = self.translator.translate_batch(source_tokens, beam_size=self.beam_size)
+        return [
+            self.tokenizer.decode(
+                self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]),
+                skip_special_tokens=True,
+            )
+            for result in results
+        ]
+
+# Sample inputs run through a new model version before it is swapped in
+WARMUP_TEXTS = ["Hello.", "How are you today?", "Thank you very much for your help."]
+WARMUP_AUDIO_SECONDS = 1
+
 class AIModelHandler:
     """
     A class to handle loading and caching of AI models in an OOP style.
     Supports multiple Nigerian languages: Hausa, Yoruba, Igbo, Edo.
     """
-    def __init__(self, whisper_model_name: str):
+    def __init__(self, whisper_model_name: str, models_dir: str = "./models_cache", memory_budget_mb: int = 3072,
+                 translation_engine: str = "torch", ct2_threads: int = 0,
+                 stt_engine: str = "openai", stt_compute_type: str = "int8",
+                 stt_beam_size: int = 5, stt_vad_filter: bool = True):
         self.whisper_model_name = whisper_model_name
-        self._whisper_model = None
-        self._translation_cache = {}  # key: "en-ha" -> (tokenizer, model)
+        # "openai" or "faster-whisper"; can be overridden per request
+        self.stt_engine = stt_engine.lower()
+        self.stt_compute_type = stt_compute_type
+        self.stt_beam_size = stt_beam_size
+        self.stt_vad_filter = stt_vad_filter
+        self.models_dir = Path(models_dir)
+        # "torch" or "ctranslate2"; PyTorch is used whenever CTranslate2 cannot be
+        self.translation_engine = translation_engine.lower()
+        if self.translation_engine == "ctranslate2" and ctranslate2 is None:
+            logger.warning("TRANSLATION_ENGINE=ctranslate2 but ctranslate2 is not installed, using PyTorch")
+        self.ct2_threads = ct2_threads
+        # Whisper, Marian (tokenizer, model) pairs and TTS models share one RAM budget
+        self.residency = ModelResidencyManager(budget_bytes=memory_budget_mb * 2**20)
+        self._translation_versions = {}  # key: "en-ha" -> version of the loaded checkpoint
+        self._engine_versions = {}  # key: "en-ha" -> (version asked for, version of the engine that loaded)
+        self._failed_checkpoints = {}  # (loader, checkpoint) -> time of the last failed load
+        self.failed_checkpoint_retry_seconds = 600
+        # Versioned checkpoints per language pair and for Whisper, swapped in without a restart
+        self.registry = ModelRegistry(str(self.models_dir / "registry"), prepare=self._prepare_version)
         
         # Language mapping for Nigerian languages
         self.language_models = {
@@ -37,54 +178,277 @@ class AIModelHandler:
             "mul": "Helsinki-NLP/opus-mt-en-mul"  # Multi-language fallback
         }
         
-        # Language codes mapping
+        # Language codes mapping (names and ISO 639-2 codes to the codes above)
         self.lang_codes = {
+            "english": "en",
+            "eng": "en",
             "hausa": "ha",
+            "hau": "ha",
             "yoruba": "yo", 
+            "yor": "yo",
             "igbo": "ig",
+            "ibo": "ig",
             "edo": "bin",
             "bini": "bin",
             "en": "en"
         }
 
+    def get_whisper_checkpoint(self, engine: str = "openai") -> str:
+        """Model name or path that serves STT: the registry's active version, else WHISPER_MODEL."""
+        slot = "faster-whisper" if engine == "faster-whisper" else "whisper"
+        return self.registry.active_checkpoint(slot) or self.whisper_model_name
+
     def get_whisper_model(self):
-        if self._whisper_model is None:
-            if whisper is None:
-                raise RuntimeError("whisper package not installed")
-            logger.info(f"Loading Whisper model '{self.whisper_model_name}' (this may take a while)...")
-            self._whisper_model = whisper.load_model(self.whisper_model_name)
-        return self._whisper_model
+        return self._load_whisper(self.get_whisper_checkpoint())
+
+    def _load_whisper(self, checkpoint: str):
+        if whisper is None:
+            raise RuntimeError("whisper package not installed")
+
+        def load():
+            logger.info(f"Loading Whisper model '{checkpoint}' (this may take a while)...")
+            return whisper.load_model(checkpoint)
+
+        return self.residency.load(f"whisper:{checkpoint}", load)
+
+    def get_faster_whisper_model(self):
+        return self._load_faster_whisper(self.get_whisper_checkpoint("faster-whisper"))
+
+    def _load_faster_whisper(self, checkpoint: str):
+        if FasterWhisperModel is None:
+            raise RuntimeError("faster-whisper package not installed")
+
+        def load():
+            logger.info(f"Loading faster-whisper model '{checkpoint}' ({self.stt_compute_type})...")
+            return FasterWhisperModel(
+                checkpoint,
+                device="cpu",
+                compute_type=self.stt_compute_type,
+                cpu_threads=os.cpu_count() or 0,
+                download_root=str(self.models_dir / "faster_whisper"),
+            )
+
+        return self.residency.load(f"whisper-ct2:{checkpoint}:{self.stt_compute_type}", load)
+
+    def get_stt_engine(self, engine: Optional[str] = None) -> SpeechEngine:
+        """Return the requested (or configured) speech-to-text engine."""
+        engine = (engine or self.stt_engine).lower()
+        if engine in ("faster-whisper", "faster_whisper", "ctranslate2"):
+            if FasterWhisperModel is not None:
+                return FasterWhisperEngine(
+                    self.get_faster_whisper_model(),
+                    beam_size=self.stt_beam_size,
+                    vad_filter=self.stt_vad_filter,
+                )
+            logger.warning("faster-whisper is not installed, using openai-whisper")
+        elif engine != "openai":
+            raise ValueError(f"Unknown STT engine: {engine}")
+        return OpenAIWhisperEngine(self.get_whisper_model())
+
+    def transcribe(self, audio, language: Optional[str] = None, engine: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe audio with the selected engine."""
+        return self.get_stt_engine(engine).transcribe(audio, language=language)
+
+    def normalize_lang_code(self, code: str) -> str:
+        """Map language names and aliases to the codes used for model lookup."""
+        return self.lang_codes.get(code.lower(), code.lower())
+
+    def _resolve_translation_checkpoint(self, src_code: str, tgt_code: str) -> str:
+        """
+        Use the registry's active version for the pair, then a fine-tuned
+        model saved by ModelTrainer, then the base checkpoint.
+        """
+        active = self.registry.active_checkpoint(f"translation:{src_code}-{tgt_code}")
+        if active is not None:
+            return active
+        fine_tuned = self.models_dir / f"translation_{src_code}_{tgt_code}_fine_tuned"
+        if (fine_tuned / "config.json").exists():
+            return str(fine_tuned)
+        return self.language_models.get(tgt_code, self.language_models["mul"])
+
+    def _checkpoint_version(self, checkpoint: str) -> str:
+        """Version string for a checkpoint; local checkpoints include their save time."""
+        config_path = Path(checkpoint) / "config.json"
+        if config_path.exists():
+            return f"{checkpoint}@{int(config_path.stat().st_mtime)}"
+        return checkpoint
+
+    def _use_ctranslate2(self) -> bool:
+        return self.translation_engine == "ctranslate2" and ctranslate2 is not None
+
+    def get_translation_checkpoint(self, src: str, tgt: str) -> str:
+        """The checkpoint that serves (or would serve) this language pair."""
+        return self._resolve_translation_checkpoint(self.normalize_lang_code(src), self.normalize_lang_code(tgt))
+
+    def _intended_translation_version(self, src_code: str, tgt_code: str) -> str:
+        """Version the configured checkpoint and engine would serve, before any fallback."""
+        version = self._checkpoint_version(self._resolve_translation_checkpoint(src_code, tgt_code))
+        # Quantized output can differ slightly from the fp32 model
+        return f"{version}#ct2-int8" if self._use_ctranslate2() else version
+
+    def get_translation_model_version(self, src: str, tgt: str, load: bool = True) -> Optional[str]:
+        """
+        Return the version of the model that actually serves this language
+        pair, after the opus-mt-en-mul and PyTorch fallbacks. The engine is
+        loaded when it has not been yet (or the pair's checkpoint changed),
+        unless load is False, in which case None is returned.
+        """
+        src_code = self.normalize_lang_code(src)
+        tgt_code = self.normalize_lang_code(tgt)
+        intended, actual = self._engine_versions.get(f"{src_code}-{tgt_code}", (None, None))
+        if intended == self._intended_translation_version(src_code, tgt_code):
+            return actual
+        return self.get_translation_engine(src_code, tgt_code).version if load else None
 
     def get_translation_model(self, src: str, tgt: str):
+        if MarianTokenizer is None or MarianMTModel is None:
+            raise RuntimeError("transformers Marian models not available")
+        return self._load_translation(src, tgt, self._load_marian)[0]
+
+    def get_translation_engine(self, src: str, tgt: str) -> TranslationEngine:
+        """Return the configured translation engine for a language pair."""
+        src_code = self.normalize_lang_code(src)
+        tgt_code = self.normalize_lang_code(tgt)
+        intended = self._intended_translation_version(src_code, tgt_code)
+        engine = None
+        if self._use_ctranslate2():
+            try:
+                engine = self._load_translation(src_code, tgt_code, self._load_ct2_engine)[0]
+            except Exception as e:
+                logger.warning(f"CTranslate2 engine unavailable for {src}-{tgt}, using PyTorch: {e}")
+
+        if engine is None:
+            if MarianTokenizer is None or MarianMTModel is None:
+                raise RuntimeError("transformers Marian models not available")
+            (tokenizer, model), version = self._load_translation(src_code, tgt_code, self._load_marian)
+            engine = TorchMarianEngine(tokenizer, model, version=version)
+        self._engine_versions[f"{src_code}-{tgt_code}"] = (intended, engine.version)
+        return engine
+
+    def _load_translation(self, src: str, tgt: str, loader: Callable[[str], object]):
+        """
+        Resolve the checkpoint for a pair and load it with loader, falling
+        back to opus-mt-en-mul. Returns the loaded object and the version of
+        the checkpoint it came from.
+        """
         # Normalize language codes
-        src_code = self.lang_codes.get(src.lower(), src)
-        tgt_code = self.lang_codes.get(tgt.lower(), tgt)
+        src_code = self.normalize_lang_code(src)
+        tgt_code = self.normalize_lang_code(tgt)
         
         key = f"{src_code}-{tgt_code}"
-        if key in self._translation_cache:
-            return self._translation_cache[key]
+        # Try a fine-tuned model first, then the specific model, then multi-language
+        model_name = self._resolve_translation_checkpoint(src_code, tgt_code)
+        fallback_model = self.language_models["mul"]
 
-        if MarianTokenizer is None or MarianMTModel is None:
-            raise RuntimeError("transformers Marian models not available")
+        failed_at = self._failed_checkpoints.get((loader.__name__, model_name))
+        if failed_at is not None and time.time() - failed_at < self.failed_checkpoint_retry_seconds:
+            model_name = fallback_model
 
-        # Try specific model first, fallback to multi-language
-        model_name = self.language_models.get(tgt_code, self.language_models["mul"])
-        
         try:
-            logger.info(f"Loading translation model: {model_name}")
-            tokenizer = MarianTokenizer.from_pretrained(model_name)
-            model = MarianMTModel.from_pretrained(model_name)
-            self._translation_cache[key] = (tokenizer, model)
-            logger.info(f"Successfully loaded model: {model_name}")
-            return tokenizer, model
+            loaded = loader(model_name)
         except Exception as e:
+            if model_name == fallback_model:
+                raise
             logger.warning(f"Failed to load {model_name}, using fallback: {e}")
+            self._failed_checkpoints[(loader.__name__, model_name)] = time.time()
             # Fallback to multi-language model
-            fallback_model = self.language_models["mul"]
-            tokenizer = MarianTokenizer.from_pretrained(fallback_model)
-            model = MarianMTModel.from_pretrained(fallback_model)
-            self._translation_cache[key] = (tokenizer, model)
+            model_name = fallback_model
+            loaded = loader(model_name)
+
+        version = self._checkpoint_version(model_name)
+        self._track_translation_version(key, version)
+        return loaded, version
+
+    def _load_marian(self, checkpoint: str):
+        """
+        Load a Marian checkpoint once, however many language pairs map to it.
+        Concurrent first requests wait on a single load.
+        """
+        version = self._checkpoint_version(checkpoint)
+
+        def load():
+            logger.info(f"Loading translation model: {checkpoint}")
+            tokenizer = MarianTokenizer.from_pretrained(checkpoint)
+            model = MarianMTModel.from_pretrained(checkpoint)
+            logger.info(f"Successfully loaded model: {checkpoint}")
             return tokenizer, model
+
+        return self.residency.load(f"translation:{version}", load)
+
+    def _ct2_model_dir(self, checkpoint: str) -> Path:
+        """Directory holding the int8 CTranslate2 conversion of a checkpoint version."""
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", self._checkpoint_version(checkpoint)).strip("_")
+        return self.models_dir / "ct2" / safe_name
+
+    def _load_ct2_engine(self, checkpoint: str) -> CTranslate2MarianEngine:
+        """Load (converting once if needed) the CTranslate2 version of a Marian checkpoint."""
+        version = self._checkpoint_version(checkpoint)
+        output_dir = self._ct2_model_dir(checkpoint)
+
+        def load():
+            if not (output_dir / "model.bin").exists():
+                logger.info(f"Converting {checkpoint} to CTranslate2 int8 in {output_dir} (one-time)...")
+                output_dir.parent.mkdir(parents=True, exist_ok=True)
+                converter = ctranslate2.converters.TransformersConverter(checkpoint)
+                converter.convert(str(output_dir), quantization="int8", force=True)
+            tokenizer = MarianTokenizer.from_pretrained(checkpoint)
+            translator = ctranslate2.Translator(
+                str(output_dir),
+                device="cpu",
+                compute_type="int8",
+                intra_threads=self.ct2_threads,
+            )
+            return CTranslate2MarianEngine(tokenizer, translator, version=f"{version}#ct2-int8")
+
+        return self.residency.load(f"translation-ct2:{version}", load)
+
+    def _track_translation_version(self, key: str, version: str):
+        """Evict a replaced checkpoint version once no language pair uses it or may roll back to it."""
+        previous = self._translation_versions.get(key)
+        self._translation_versions[key] = version
+        if previous is None or previous == version or previous in self._translation_versions.values():
+            return
+        retained = {self._checkpoint_version(checkpoint) for checkpoint in self.registry.retained_checkpoints()}
+        if previous not in retained:
+            self.residency.evict(f"translation:{previous}")
+            self.residency.evict(f"translation-ct2:{previous}")
+
+    def _translation_engine_for(self, checkpoint: str) -> TranslationEngine:
+        """The configured translation engine for one specific checkpoint, without fallbacks."""
+        if self._use_ctranslate2():
+            return self._load_ct2_engine(checkpoint)
+        if MarianTokenizer is None or MarianMTModel is None:
+            raise RuntimeError("transformers Marian models not available")
+        return TorchMarianEngine(*self._load_marian(checkpoint), version=self._checkpoint_version(checkpoint))
+
+    def _prepare_version(self, slot: str, checkpoint: str):
+        """Load a registry version and run sample inputs through it before it goes live."""
+        if slot.startswith("translation:"):
+            outputs = self._translation_engine_for(checkpoint).translate_batch(WARMUP_TEXTS)
+            if len(outputs) != len(WARMUP_TEXTS) or not all(output.strip() for output in outputs):
+                raise RuntimeError("The model returned empty translations for the warm-up sentences")
+            return
+        silence = np.zeros(16000 * WARMUP_AUDIO_SECONDS, dtype=np.float32)
+        if slot == "faster-whisper":
+            engine = FasterWhisperEngine(self._load_faster_whisper(checkpoint),
+                                         beam_size=self.stt_beam_size, vad_filter=False)
+        else:
+            engine = OpenAIWhisperEngine(self._load_whisper(checkpoint))
+        engine.transcribe(silence)
+
+    def get_active_versions(self) -> Dict[str, Any]:
+        """What serves each model slot right now, with the registry's version history."""
+        registry = self.registry.get_status()
+        serving = {
+            "whisper": self.get_whisper_checkpoint(),
+            "faster-whisper": self.get_whisper_checkpoint("faster-whisper"),
+        }
+        for key in sorted(set(self._translation_versions) | {slot.split(":", 1)[1] for slot in registry
+                                                            if slot.startswith("translation:")}):
+            src, tgt = key.split("-", 1)
+            serving[f"translation:{key}"] = (self.get_translation_model_version(src, tgt, load=False)
+                                             or self._intended_translation_version(src, tgt))
+        return {"serving": serving, "registry": registry}
     
     def get_supported_languages(self) -> Dict[str, str]:
         """Return supported languages and their codes"""
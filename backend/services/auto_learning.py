@@ -1,10 +1,10 @@
-import os
-import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
-import pandas as pd
+
+from services.feedback_store import FeedbackStore
+from services.training_export import export_examples
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +15,21 @@ class AutoLearningService:
         self.feedback_dir = Path(feedback_dir)
         self.feedback_dir.mkdir(exist_ok=True)
         
-        # Feedback storage files
-        self.translation_feedback_file = self.feedback_dir / "translation_feedback.json"
-        self.tts_feedback_file = self.feedback_dir / "tts_feedback.json"
-        self.user_corrections_file = self.feedback_dir / "user_corrections.json"
+        # Feedback storage
+        self.store = FeedbackStore(str(self.feedback_dir / "feedback.sqlite3"))
         
-        # Initialize feedback storage
-        self._initialize_feedback_storage()
+        # Import the JSON files used by earlier versions (once)
+        self._migrate_legacy_files()
     
-    def _initialize_feedback_storage(self):
-        """Initialize feedback storage files if they don't exist."""
-        for file_path in [self.translation_feedback_file, self.tts_feedback_file, self.user_corrections_file]:
-            if not file_path.exists():
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump([], f)
+    def _migrate_legacy_files(self):
+        """Move feedback from the old JSON array files into the store."""
+        legacy_files = {
+            "translation": self.feedback_dir / "translation_feedback.json",
+            "tts": self.feedback_dir / "tts_feedback.json",
+            "correction": self.feedback_dir / "user_corrections.json",
+        }
+        for kind, file_path in legacy_files.items():
+            self.store.migrate_json(kind, file_path)
     
     def record_translation_feedback(self, 
                                   input_text: str, 
@@ -52,16 +53,7 @@ class AutoLearningService:
             "feedback_type": "translation"
         }
         
-        # Load existing feedback
-        with open(self.translation_feedback_file, 'r', encoding='utf-8') as f:
-            feedback_data = json.load(f)
-        
-        # Add new feedback
-        feedback_data.append(feedback_entry)
-        
-        # Save updated feedback
-        with open(self.translation_feedback_file, 'w', encoding='utf-8') as f:
-            json.dump(feedback_data, f, ensure_ascii=False, indent=2)
+        self.store.add("translation", feedback_entry)
         
         logger.info(f"Recorded translation feedback: {user_rating} stars")
         return {"status": "success", "message": "Feedback recorded"}
@@ -88,16 +80,7 @@ class AutoLearningService:
             "feedback_type": "tts"
         }
         
-        # Load existing feedback
-        with open(self.tts_feedback_file, 'r', encoding='utf-8') as f:
-            feedback_data = json.load(f)
-        
-        # Add new feedback
-        feedback_data.append(feedback_entry)
-        
-        # Save updated feedback
-        with open(self.tts_feedback_file, 'w', encoding='utf-8') as f:
-            json.dump(feedback_data, f, ensure_ascii=False, indent=2)
+        self.store.add("tts", feedback_entry)
         
         logger.info(f"Recorded TTS feedback: {user_rating} stars")
         return {"status": "success", "message": "TTS feedback recorded"}
@@ -121,16 +104,7 @@ class AutoLearningService:
             "user_id": user_id
         }
         
-        # Load existing corrections
-        with open(self.user_corrections_file, 'r', encoding='utf-8') as f:
-            corrections_data = json.load(f)
-        
-        # Add new correction
-        corrections_data.append(correction_entry)
-        
-        # Save updated corrections
-        with open(self.user_corrections_file, 'w', encoding='utf-8') as f:
-            json.dump(corrections_data, f, ensure_ascii=False, indent=2)
+        self.store.add("correction", correction_entry)
         
         logger.info(f"Recorded user correction: {correction_type}")
         return {"status": "success", "message": "Correction recorded"}
@@ -138,32 +112,26 @@ class AutoLearningService:
     def get_feedback_summary(self) -> Dict[str, Any]:
         """Get summary of all feedback data."""
         summary = {
-            "translation_feedback": self._get_feedback_summary(self.translation_feedback_file),
-            "tts_feedback": self._get_feedback_summary(self.tts_feedback_file),
+            "translation_feedback": self._get_feedback_summary("translation"),
+            "tts_feedback": self._get_feedback_summary("tts"),
             "user_corrections": self._get_corrections_summary()
         }
         return summary
     
-    def _get_feedback_summary(self, file_path: Path) -> Dict[str, Any]:
-        """Get summary of feedback from a specific file."""
+    def _get_feedback_summary(self, kind: str) -> Dict[str, Any]:
+        """Get summary of feedback of one kind ("translation" or "tts")."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                feedback_data = json.load(f)
-            
-            if not feedback_data:
+            aggregates = self.store.get_aggregates(kind)
+            overall = aggregates.pop("*", None)
+            if not overall:
                 return {"count": 0, "average_rating": 0, "recent_feedback": []}
             
-            # Calculate average rating
-            ratings = [entry.get("user_rating") for entry in feedback_data if entry.get("user_rating")]
-            average_rating = sum(ratings) / len(ratings) if ratings else 0
-            
-            # Get recent feedback
-            recent_feedback = sorted(feedback_data, key=lambda x: x["timestamp"], reverse=True)[:5]
-            
             return {
-                "count": len(feedback_data),
-                "average_rating": round(average_rating, 2),
-                "recent_feedback": recent_feedback
+                "count": overall["count"],
+                "average_rating": overall["average_rating"],
+                "rating_histogram": overall["rating_histogram"],
+                "by_group": aggregates,
+                "recent_feedback": self.store.recent(kind, limit=5)
             }
         except Exception as e:
             logger.error(f"Error reading feedback summary: {e}")
@@ -172,91 +140,71 @@ class AutoLearningService:
     def _get_corrections_summary(self) -> Dict[str, Any]:
         """Get summary of user corrections."""
         try:
-            with open(self.user_corrections_file, 'r', encoding='utf-8') as f:
-                corrections_data = json.load(f)
-            
-            if not corrections_data:
+            aggregates = self.store.get_aggregates("correction")
+            overall = aggregates.pop("*", None)
+            if not overall:
                 return {"count": 0, "recent_corrections": []}
             
-            # Get recent corrections
-            recent_corrections = sorted(corrections_data, key=lambda x: x["timestamp"], reverse=True)[:5]
-            
             return {
-                "count": len(corrections_data),
-                "recent_corrections": recent_corrections
+                "count": overall["count"],
+                "by_group": {group: stats["count"] for group, stats in aggregates.items()},
+                "recent_corrections": self.store.recent("correction", limit=5)
             }
         except Exception as e:
             logger.error(f"Error reading corrections summary: {e}")
             return {"count": 0, "recent_corrections": []}
     
+    def iter_training_data(self) -> Iterator[Dict[str, Any]]:
+        """Yield training examples from user corrections and corrected low-rated translations."""
+        # Convert corrections to training data
+        for correction in self.store.iter_entries("correction"):
+            yield {
+                "source_text": correction["original_text"],
+                "target_text": correction["corrected_text"],
+                "source_lang": correction["source_lang"],
+                "target_lang": correction["target_lang"],
+                "data_type": "user_correction",
+                "timestamp": correction["timestamp"]
+            }
+        
+        # Low-rated translations (rating <= 2) with a correction are used for improvement
+        for entry in self.store.iter_entries("translation", max_rating=2):
+            if entry.get("user_correction"):
+                yield {
+                    "source_text": entry["input_text"],
+                    "target_text": entry["user_correction"],
+                    "source_lang": entry["source_lang"],
+                    "target_lang": entry["target_lang"],
+                    "data_type": "feedback_correction",
+                    "timestamp": entry["timestamp"]
+                }
+    
     def generate_training_data_from_feedback(self) -> List[Dict[str, Any]]:
         """Generate training data from user feedback and corrections."""
-        training_data = []
-        
         try:
-            # Load corrections
-            with open(self.user_corrections_file, 'r', encoding='utf-8') as f:
-                corrections_data = json.load(f)
-            
-            # Convert corrections to training data
-            for correction in corrections_data:
-                training_data.append({
-                    "source_text": correction["original_text"],
-                    "target_text": correction["corrected_text"],
-                    "source_lang": correction["source_lang"],
-                    "target_lang": correction["target_lang"],
-                    "data_type": "user_correction",
-                    "timestamp": correction["timestamp"]
-                })
-            
-            # Load low-rated translations for improvement
-            with open(self.translation_feedback_file, 'r', encoding='utf-8') as f:
-                feedback_data = json.load(f)
-            
-            # Find low-rated translations (rating <= 2)
-            low_rated = [entry for entry in feedback_data if entry.get("user_rating", 5) <= 2]
-            
-            for entry in low_rated:
-                if entry.get("user_correction"):
-                    training_data.append({
-                        "source_text": entry["input_text"],
-                        "target_text": entry["user_correction"],
-                        "source_lang": entry["source_lang"],
-                        "target_lang": entry["target_lang"],
-                        "data_type": "feedback_correction",
-                        "timestamp": entry["timestamp"]
-                    })
-            
+            training_data = list(self.iter_training_data())
             logger.info(f"Generated {len(training_data)} training examples from feedback")
             return training_data
-            
         except Exception as e:
             logger.error(f"Error generating training data from feedback: {e}")
             return []
     
-    def export_training_data(self, output_file: str) -> Dict[str, Any]:
-        """Export training data generated from feedback to a file."""
-        training_data = self.generate_training_data_from_feedback()
-        
-        if not training_data:
-            return {"status": "no_data", "message": "No training data available"}
-        
-        # Export to JSON
-        output_path = Path(output_file)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, ensure_ascii=False, indent=2)
+    def export_training_data(self, output_dir: str, shard_rows: int = 100000) -> Dict[str, Any]:
+        """
+        Stream deduplicated training data from feedback into JSONL (and
+        Parquet, if pyarrow is installed) shards with a manifest.json.
+        """
+        result = export_examples(self.iter_training_data(), output_dir, shard_rows=shard_rows)
         
-        # Also export to CSV for easy processing
-        csv_path = output_path.with_suffix('.csv')
-        df = pd.DataFrame(training_data)
-        df.to_csv(csv_path, index=False, encoding='utf-8')
+        if not result["rows"]:
+            return {"status": "no_data", "message": "No training data available", **result}
         
-        logger.info(f"Exported {len(training_data)} training examples to {output_path}")
         return {
             "status": "success",
-            "message": f"Exported {len(training_data)} training examples",
-            "json_file": str(output_path),
-            "csv_file": str(csv_path)
+            "message": f"Exported {result['rows']} training examples "
+                       f"({result['exact_duplicates'] + result['near_duplicates']} duplicates dropped)",
+            "output_dir": output_dir,
+            **result
         }
     
     def should_retrain_model(self, threshold: int = 100) -> bool:
@@ -0,0 +1,114 @@
+import re
+import time
+import logging
+from typing import Any, Dict, List
+
+from utils.text import split_sentences
+
+logger = logging.getLogger(__name__)
+
+# A line break with the whitespace around it (blank lines, the next line's indentation)
+_LINE_BREAK = re.compile(r'([ \t]*\n\s*)')
+
+class DocumentTranslator:
+    """
+    Translates long texts without truncation. The text is split into
+    lines and sentences, unique sentences are translated in batches of
+    similar length (so little work is spent on padding), and the lines are
+    rebuilt in their original order with their original line breaks and
+    indentation.
+    """
+
+    def __init__(self, model_handler, cache=None,
+                 max_batch_size: int = 32, max_batch_tokens: int = 4096, max_sentence_chars: int = 400):
+        self.model_handler = model_handler
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.max_sentence_chars = max_sentence_chars
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> Dict[str, Any]:
+        """Translate a document and report sentence counts and throughput."""
+        started = time.time()
+        src = self.model_handler.normalize_lang_code(source_lang)
+        tgt = self.model_handler.normalize_lang_code(target_lang)
+
+        # Even indices are lines, odd indices the line breaks (and indentation) between them
+        parts = _LINE_BREAK.split(text.strip())
+        lines = [
+            split_sentences(" ".join(part.split()), max_chars=self.max_sentence_chars, language=src)
+            for part in parts[::2]
+        ]
+        unique = list(dict.fromkeys(sentence for line in lines for sentence in line))
+        translations, stats = self._translate_sentences(unique, src, tgt)
+
+        output = []
+        for i, part in enumerate(parts):
+            if i % 2:
+                output.append(part)
+            else:
+                output.append(" ".join(translations[sentence] for sentence in lines[i // 2]))
+
+        elapsed = time.time() - started
+        total_sentences = sum(len(line) for line in lines)
+        paragraphs = 1 + sum(1 for separator in parts[1::2] if separator.count("\n") > 1) if text.strip() else 0
+        logger.info(f"Translated document {src}-{tgt}: {len(text)} chars, {total_sentences} sentences "
+                    f"in {stats['batches']} batches, {elapsed:.1f}s")
+        return {
+            "translated_text": "".join(output),
+            "paragraphs": paragraphs,
+            "sentences": total_sentences,
+            "unique_sentences": len(unique),
+            "cached_sentences": stats["cached"],
+            "batches": stats["batches"],
+            "padding_efficiency": stats["padding_efficiency"],
+            "characters": len(text),
+            "seconds": round(elapsed, 2),
+            "sentences_per_sec": round(total_sentences / elapsed, 1) if elapsed else None,
+            "chars_per_sec": round(len(text) / elapsed, 1) if elapsed else None,
+        }
+
+    def _translate_sentences(self, sentences: List[str], src: str, tgt: str):
+        """Translate unique sentences, returning ({sentence: translation}, stats)."""
+        translations: Dict[str, str] = {}
+        version = self.model_handler.get_translation_model_version(src, tgt)
+        if self.cache is not None:
+            for sentence in sentences:
+                cached = self.cache.get(src, tgt, sentence, version)
+                if cached is not None:
+                    translations[sentence] = cached
+        missing = [sentence for sentence in sentences if sentence not in translations]
+        stats = {"cached": len(translations), "batches": 0, "padding_efficiency": 1.0}
+        if not missing:
+            return translations, stats
+
+        engine = self.model_handler.get_translation_engine(src, tgt)
+        # If a new model version went live in between, the engine may not match the cache key
+        cacheable = self.cache is not None and engine.version == version
+        lengths = {sentence: len(engine.tokenizer.tokenize(sentence)) + 1 for sentence in missing}
+        real_tokens = 0
+        padded_tokens = 0
+        for batch in self._length_batches(sorted(missing, key=lengths.get), lengths):
+            outputs = engine.translate_batch(batch)
+            for sentence, translated in zip(batch, outputs):
+                translations[sentence] = translated
+                if cacheable:
+                    self.cache.put(src, tgt, sentence, version, translated)
+            stats["batches"] += 1
+            real_tokens += sum(lengths[sentence] for sentence in batch)
+            padded_tokens += len(batch) * max(lengths[sentence] for sentence in batch)
+        stats["padding_efficiency"] = round(real_tokens / padded_tokens, 3)
+        return translations, stats
+
+    def _length_batches(self, ordered: List[str], lengths: Dict[str, int]):
+        """Group length-sorted sentences so each padded batch stays within the token budget."""
+        batch: List[str] = []
+        for sentence in ordered:
+            # Sorted ascending, so this sentence is the longest in the batch
+            padded = (len(batch) + 1) * lengths[sentence]
+            if batch and (len(batch) >= self.max_batch_size or padded > self.max_batch_tokens):
+                yield batch
+                batch = []
+            batch.append(sentence)
+        if batch:
+            yield batch
@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# kind -> (table, columns besides id and timestamp)
+FEEDBACK_TABLES = {
+    "translation": ("translation_feedback", ["input_text", "translated_text", "source_lang", "target_lang",
+                                             "user_rating", "user_correction", "user_id"]),
+    "tts": ("tts_feedback", ["text", "audio_path", "language", "engine", "user_rating", "user_comments", "user_id"]),
+    "correction": ("user_corrections", ["original_text", "corrected_text", "source_lang", "target_lang",
+                                        "correction_type", "user_id"]),
+}
+
+_INDEXES = {
+    "translation": [("timestamp",), ("source_lang", "target_lang", "timestamp"), ("user_rating",)],
+    "tts": [("timestamp",), ("language", "engine"), ("user_rating",)],
+    "correction": [("timestamp",), ("source_lang", "target_lang", "timestamp")],
+}
+
+# How entries are grouped in the aggregates: by language pair, or language/engine for TTS
+_GROUP_SQL = {
+    "translation": "COALESCE(source_lang, '') || '-' || COALESCE(target_lang, '')",
+    "tts": "COALESCE(language, '') || '/' || COALESCE(engine, '')",
+    "correction": "COALESCE(source_lang, '') || '-' || COALESCE(target_lang, '')",
+}
+ALL_GROUPS = "*"
+RATINGS = range(1, 6)
+
+class FeedbackStore:
+    """
+    Append-only SQLite store (WAL mode) for user feedback. Each write is one
+    small INSERT in its own transaction, so writes are O(1) and concurrent
+    requests cannot overwrite each other. Indexed by timestamp, language pair
+    and rating.
+
+    Counts, rating sums and rating histograms per group, and a fixed-size ring
+    of the most recent entries, are updated in the same transaction as each
+    insert, so summaries never have to scan the history.
+    """
+
+    def __init__(self, db_path: str = "./feedback_data/feedback.sqlite3", recent_size: int = 50):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.recent_size = max(1, recent_size)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for kind, (table, columns) in FEEDBACK_TABLES.items():
+            column_defs = ", ".join(
+                f"{column} INTEGER" if column == "user_rating" else f"{column} TEXT" for column in columns
+            )
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, {column_defs})"
+            )
+            for index in _INDEXES[kind]:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index)} ON {table} ({', '.join(index)})"
+                )
+
+        has_aggregates = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback_aggregates'"
+        ).fetchone() is not None
+        histogram_defs = ", ".join(f"rating_{rating} INTEGER NOT NULL DEFAULT 0" for rating in RATINGS)
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS feedback_aggregates (
+                kind TEXT NOT NULL,
+                group_key TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                rating_count INTEGER NOT NULL DEFAULT 0,
+                rating_sum INTEGER NOT NULL DEFAULT 0,
+                {histogram_defs},
+                PRIMARY KEY (kind, group_key)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS recent_feedback (
+                kind TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                entry_id INTEGER NOT NULL,
+                entry TEXT NOT NULL,
+                PRIMARY KEY (kind, slot)
+            )
+        """)
+        # Legacy files already imported, written in the import's own transaction
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS migrations (
+                source TEXT PRIMARY KEY,
+                entries INTEGER NOT NULL,
+                migrated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        if not has_aggregates:
+            # Database written before aggregates existed
+            for kind in FEEDBACK_TABLES:
+                self._rebuild_aggregates(kind)
+
+    def add(self, kind: str, entry: Dict[str, Any]) -> int:
+        """Append one entry and return its id."""
+        table, columns = FEEDBACK_TABLES[kind]
+        names = ["timestamp"] + columns
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                    [entry.get(name) for name in names],
+                )
+                entry_id = cursor.lastrowid
+                self._update_aggregates(kind, entry_id)
+        return entry_id
+
+    def _update_aggregates(self, kind: str, entry_id: int):
+        """Fold one new row into its group's counters, the overall counters and the recent ring."""
+        table, _ = FEEDBACK_TABLES[kind]
+        row = self._conn.execute(
+            f"SELECT *, {_GROUP_SQL[kind]} AS group_key FROM {table} WHERE id = ?", (entry_id,)
+        ).fetchone()
+        rating = row["user_rating"] if "user_rating" in row.keys() else None
+        rated = rating in RATINGS
+        histogram_names = ", ".join(f"rating_{r}" for r in RATINGS)
+        histogram_updates = ", ".join(f"rating_{r} = rating_{r} + excluded.rating_{r}" for r in RATINGS)
+        for group_key in (ALL_GROUPS, row["group_key"]):
+            self._conn.execute(
+                f"""INSERT INTO feedback_aggregates (kind, group_key, count, rating_count, rating_sum, {histogram_names})
+                    VALUES (?, ?, 1, ?, ?, {', '.join('?' for _ in RATINGS)})
+                    ON CONFLICT (kind, group_key) DO UPDATE SET
+                        count = count + 1,
+                        rating_count = rating_count + excluded.rating_count,
+                        rating_sum = rating_sum + excluded.rating_sum,
+                        {histogram_updates}""",
+                [kind, group_key, int(rated), rating if rated else 0] + [int(rating == r) for r in RATINGS],
+            )
+        total = self._conn.execute(
+            "SELECT count FROM feedback_aggregates WHERE kind = ? AND group_key = ?", (kind, ALL_GROUPS)
+        ).fetchone()[0]
+        self._put_recent(kind, (total - 1) % self.recent_size, row)
+
+    def _put_recent(self, kind: str, slot: int, row: sqlite3.Row):
+        entry = self._to_entry(kind, row)
+        entry.pop("group_key", None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO recent_feedback (kind, slot, entry_id, entry) VALUES (?, ?, ?, ?)",
+            (kind, slot, entry["id"], json.dumps(entry, ensure_ascii=False)),
+        )
+
+    def _rebuild_aggregates(self, kind: str):
+        """Recompute aggregates and the recent ring from the rows (after bulk imports)."""
+        table, _ = FEEDBACK_TABLES[kind]
+        rating_column = "user_rating" if "user_rating" in FEEDBACK_TABLES[kind][1] else "NULL"
+        rated = f"{rating_column} BETWEEN 1 AND 5"
+        histogram_names = ", ".join(f"rating_{r}" for r in RATINGS)
+        histogram_sums = ", ".join(f"COALESCE(SUM({rating_column} = {r}), 0)" for r in RATINGS)
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM feedback_aggregates WHERE kind = ?", (kind,))
+                self._conn.execute("DELETE FROM recent_feedback WHERE kind = ?", (kind,))
+                for group_sql in (f"'{ALL_GROUPS}'", _GROUP_SQL[kind]):
+                    self._conn.execute(f"""
+                        INSERT INTO feedback_aggregates (kind, group_key, count, rating_count, rating_sum, {histogram_names})
+                        SELECT ?, {group_sql}, COUNT(*), COALESCE(SUM({rated}), 0),
+                               SUM(CASE WHEN {rated} THEN {rating_column} ELSE 0 END),
+                               {histogram_sums}
+                        FROM {table} GROUP BY 2
+                    """, (kind,))
+                rows = self._conn.execute(
+                    f"SELECT * FROM {table} ORDER BY id DESC LIMIT ?", (self.recent_size,)
+                ).fetchall()
+                total = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for position, row in enumerate(reversed(rows), start=total - len(rows)):
+                    self._put_recent(kind, position % self.recent_size, row)
+
+    def get_aggregates(self, kind: str) -> Dict[str, Dict[str, Any]]:
+        """Return {group: {count, average_rating, rating_histogram}}; the "*" group covers everything."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM feedback_aggregates WHERE kind = ?", (kind,)).fetchall()
+        return {
+            row["group_key"]: {
+                "count": row["count"],
+                "rated": row["rating_count"],
+                "average_rating": round(row["rating_sum"] / row["rating_count"], 2) if row["rating_count"] else 0,
+                "rating_histogram": {str(r): row[f"rating_{r}"] for r in RATINGS},
+            }
+            for row in rows
+        }
+
+    def recent(self, kind: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Return the newest entries from the recent ring (at most recent_size)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry FROM recent_feedback WHERE kind = ? ORDER BY entry_id DESC LIMIT ?", (kind, limit)
+            ).fetchall()
+        return [json.loads(row["entry"]) for row in rows]
+
+    def _where(self, kind: str, since: Optional[str], until: Optional[str], source_lang: Optional[str],
+               target_lang: Optional[str], min_rating: Optional[int], max_rating: Optional[int]):
+        clauses, params = [], []
+        for clause, value in [
+            ("timestamp >= ?", since), ("timestamp < ?", until),
+            ("user_rating >= ?", min_rating), ("user_rating <= ?", max_rating),
+        ]:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        # TTS feedback is keyed by a single language rather than a pair
+        source_column = "language" if kind == "tts" else "source_lang"
+        if source_lang is not None:
+            clauses.append(f"{source_column} = ?")
+            params.append(source_lang)
+        if target_lang is not None and kind != "tts":
+            clauses.append("target_lang = ?")
+            params.append(target_lang)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, kind: str, since: Optional[str] = None, until: Optional[str] = None,
+              source_lang: Optional[str] = None, target_lang: Optional[str] = None,
+              min_rating: Optional[int] = None, max_rating: Optional[int] = None,
+              limit: Optional[int] = 100, newest_first: bool = True) -> List[Dict[str, Any]]:
+        """Return entries matching the filters (timestamps are ISO strings)."""
+        table, _ = FEEDBACK_TABLES[kind]
+        where, params = self._where(kind, since, until, source_lang, target_lang, min_rating, max_rating)
+        sql = f"SELECT * FROM {table}{where} ORDER BY timestamp {'DESC' if newest_first else 'ASC'}, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_entry(kind, row) for row in rows]
+
+    def count(self, kind: str, **filters) -> int:
+        table, _ = FEEDBACK_TABLES[kind]
+        where, params = self._where(kind, filters.get("since"), filters.get("until"), filters.get("source_lang"),
+                                    filters.get("target_lang"), filters.get("min_rating"), filters.get("max_rating"))
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+    def iter_entries(self, kind: str, batch_size: int = 1000, **filters) -> Iterator[Dict[str, Any]]:
+        """Yield all matching entries in insertion order, batch_size rows at a time."""
+        table, _ = FEEDBACK_TABLES[kind]
+        where, params = self._where(kind, filters.get("since"), filters.get("until"), filters.get("source_lang"),
+                                    filters.get("target_lang"), filters.get("min_rating"), filters.get("max_rating"))
+        last_id = 0
+        while True:
+            sql = f"SELECT * FROM {table}{where} {'AND' if where else 'WHERE'} id > ? ORDER BY id LIMIT ?"
+            with self._lock:
+                rows = self._conn.execute(sql, params + [last_id, batch_size]).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_entry(kind, row)
+            last_id = rows[-1]["id"]
+
+    @staticmethod
+    def _to_entry(kind: str, row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        if kind != "correction":
+            entry["feedback_type"] = kind
+        return entry
+
+    def migrate_json(self, kind: str, json_path: Path) -> int:
+        """
+        Import a legacy JSON array file once. The import is recorded in the
+        migrations table in the same transaction, so a crash before the file
+        is renamed to *.migrated cannot import it twice.
+        """
+        if not json_path.exists():
+            return 0
+        source = f"{kind}:{json_path.name}"
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM migrations WHERE source = ?", (source,)).fetchone()
+        if done is not None:
+            # Imported before, but the process stopped before the rename
+            os.replace(json_path, json_path.with_suffix(".json.migrated"))
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except ValueError as e:
+            logger.error(f"Could not migrate {json_path}: {e}")
+            return 0
+
+        table, columns = FEEDBACK_TABLES[kind]
+        names = ["timestamp"] + columns
+        with self._lock:
+            with self._conn:  # one transaction for the whole file
+                self._conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                    [[entry.get("timestamp") or ""] + [entry.get(name) for name in columns] for entry in entries],
+                )
+                self._conn.execute("INSERT INTO migrations (source, entries, migrated_at) VALUES (?, ?, ?)",
+                                   (source, len(entries), time.time()))
+        self._rebuild_aggregates(kind)
+        os.replace(json_path, json_path.with_suffix(".json.migrated"))
+        logger.info(f"Migrated {len(entries)} entries from {json_path} into {self.db_path}")
+        return len(entries)
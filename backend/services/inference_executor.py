@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+class InferenceExecutor:
+    """
+    Runs blocking model work off the event loop.
+
+    Each model kind (stt, translation, tts, ...) gets its own thread pool, so
+    a long transcription cannot starve translation or health checks. Work that
+    would exceed the per-kind queue limit is rejected with 503 and Retry-After.
+    """
+
+    def __init__(self, limits: Dict[str, int], max_queue: int = 32, retry_after: int = 5):
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._limits = {kind: max(1, workers) for kind, workers in limits.items()}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pending: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        for kind in self._limits:
+            self._add_pool(kind)
+
+    def _add_pool(self, kind: str):
+        workers = self._limits.setdefault(kind, 1)
+        self._pools[kind] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"inference-{kind}")
+        self._pending[kind] = 0
+
+    async def run(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool for the given model kind."""
+        return await asyncio.wrap_future(self._submit(kind, fn, args, kwargs, refuse_when_full=True))
+
+    def call(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Blocking variant of run for background jobs. The work shares the
+        kind's workers with requests, but waits for a free worker instead of
+        being refused when the queue is full.
+        """
+        return self._submit(kind, fn, args, kwargs, refuse_when_full=False).result()
+
+    def _submit(self, kind: str, fn: Callable[..., Any], args, kwargs, refuse_when_full: bool) -> Future:
+        with self._lock:
+            if kind not in self._pools:
+                self._add_pool(kind)
+            capacity = self._limits[kind] + self.max_queue
+            if refuse_when_full and self._pending[kind] >= capacity:
+                logger.warning(f"Inference queue for '{kind}' is full ({self._pending[kind]} pending)")
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"The {kind} service is busy, please retry shortly",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._pending[kind] += 1
+
+        try:
+            future = self._pools[kind].submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(kind)
+            raise
+        # A cancelled request does not stop the work already running on the
+        # pool, so the slot is only released once the work itself is done
+        future.add_done_callback(lambda _: self._release(kind))
+        return future
+
+    def _release(self, kind: str):
+        with self._lock:
+            self._pending[kind] -= 1
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the worker limit and pending count for each model kind."""
+        with self._lock:
+            return {
+                kind: {"workers": self._limits[kind], "pending": self._pending[kind], "max_queue": self.max_queue}
+                for kind in self._pools
+            }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs to finish."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
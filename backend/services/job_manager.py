@@ -0,0 +1,224 @@
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ("queued", "running", "succeeded", "failed")
+
+class JobManager:
+    """
+    Runs long file-processing work as background jobs.
+
+    Each job gets its own directory under jobs_dir; the upload and everything
+    derived from it (extracted audio, datasets) live there and are deleted
+    together once the job has been finished for ttl_seconds. At most
+    max_workers jobs run at once, and each API key may have at most
+    max_jobs_per_key jobs queued or running. Finished jobs are written to
+    job.json so their results survive a restart until they expire.
+    """
+
+    def __init__(self, jobs_dir: str = "./jobs", max_workers: int = 2, max_jobs_per_key: int = 2,
+                 ttl_seconds: float = 24 * 3600, sweep_interval: float = 600):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_jobs_per_key = max_jobs_per_key
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+        self._stop = threading.Event()
+
+        self._load_existing()
+        threading.Thread(target=self._sweep_loop, name="job-sweeper", daemon=True).start()
+
+    @staticmethod
+    def owner_of(api_key: Optional[str]) -> str:
+        """Jobs are grouped by a hash of the API key; the key itself is never stored."""
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+    def create(self, api_key: Optional[str], kind: str) -> Dict[str, Any]:
+        """
+        Reserve a job slot and its storage directory. Raises 429 when the
+        key already has max_jobs_per_key jobs queued or running.
+        """
+        owner = self.owner_of(api_key)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            active = sum(1 for job in self._jobs.values()
+                         if job["owner"] == owner and job["status"] in ("queued", "running"))
+            if self.max_jobs_per_key and active >= self.max_jobs_per_key:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Too many active jobs for this API key (limit {self.max_jobs_per_key})",
+                )
+            job = {
+                "job_id": job_id,
+                "kind": kind,
+                "owner": owner,
+                "status": "queued",
+                "stage": None,
+                "progress": 0.0,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "dir": self.jobs_dir / job_id,
+            }
+            job["dir"].mkdir(parents=True)
+            self._jobs[job_id] = job
+        return job
+
+    def submit(self, job_id: str, fn: Callable[..., Dict[str, Any]], *args, **kwargs):
+        """
+        Run fn(job_dir, report, *args, **kwargs) on the worker pool, where
+        report(done, total, stage=None) updates the job's progress.
+        """
+        job = self._jobs[job_id]
+        self._pool.submit(self._run, job, fn, args, kwargs)
+
+    def discard(self, job_id: str):
+        """Drop a job that was created but never submitted."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            shutil.rmtree(job["dir"], ignore_errors=True)
+
+    def _run(self, job: Dict[str, Any], fn, args, kwargs):
+        job_id = job["job_id"]
+
+        def report(done: float, total: float, stage: Optional[str] = None):
+            with self._lock:
+                job["progress"] = round(min(1.0, done / total), 3) if total else 0.0
+                if stage is not None:
+                    job["stage"] = stage
+
+        with self._lock:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            result = fn(job["dir"], report, *args, **kwargs)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Job {job_id} failed: {detail}")
+            self._finish(job, "failed", error=detail)
+        else:
+            self._finish(job, "succeeded", result=result)
+
+    def _finish(self, job: Dict[str, Any], status: str, result: Any = None, error: Optional[str] = None):
+        with self._lock:
+            job["status"] = status
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = time.time()
+            if status == "succeeded":
+                job["progress"] = 1.0
+            record = {key: value for key, value in job.items() if key != "dir"}
+        try:
+            with open(job["dir"] / "job.json", 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, default=str)
+        except OSError as e:
+            logger.warning(f"Could not persist job {job['job_id']}: {e}")
+        logger.info(f"Job {job['job_id']} {status} in {job['finished_at'] - job['started_at']:.1f}s")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the public view of a job, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            view = {key: value for key, value in job.items() if key not in ("dir", "owner")}
+        if view["finished_at"] is not None:
+            view["expires_at"] = view["finished_at"] + self.ttl_seconds
+        return view
+
+    def is_owner(self, job_id: str, api_key: Optional[str]) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job is not None and job["owner"] == self.owner_of(api_key)
+
+    def file_path(self, job_id: str, name: str) -> Optional[Path]:
+        """Resolve a file stored by a job, refusing names that escape its directory."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or Path(name).name != name or name == "job.json":
+            return None
+        path = job["dir"] / name
+        return path if path.is_file() else None
+
+    def delete(self, job_id: str) -> bool:
+        """Delete a finished job and its files; running jobs cannot be deleted."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job["status"] in ("queued", "running"):
+                raise HTTPException(409, "The job has not finished yet")
+            del self._jobs[job_id]
+        shutil.rmtree(job["dir"], ignore_errors=True)
+        return True
+
+    def sweep(self) -> int:
+        """Delete jobs (and their files) that finished more than ttl_seconds ago."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job["finished_at"] is not None and job["finished_at"] < cutoff]
+            for job in expired:
+                del self._jobs[job["job_id"]]
+        for job in expired:
+            shutil.rmtree(job["dir"], ignore_errors=True)
+        if expired:
+            logger.info(f"Removed {len(expired)} expired jobs")
+        return len(expired)
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Job sweep failed: {e}")
+
+    def _load_existing(self):
+        """Reload finished jobs from disk; jobs cut off by a restart are marked failed."""
+        for job_dir in self.jobs_dir.iterdir():
+            if not job_dir.is_dir():
+                continue
+            record_path = job_dir / "job.json"
+            try:
+                with open(record_path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                # No record: the process stopped before the job finished
+                now = time.time()
+                record = {
+                    "job_id": job_dir.name, "kind": None, "owner": None, "status": "failed",
+                    "stage": None, "progress": 0.0, "created_at": now, "started_at": now,
+                    "finished_at": now, "result": None, "error": "Interrupted by a server restart",
+                }
+            record["dir"] = job_dir
+            self._jobs[record["job_id"]] = record
+        if self._jobs:
+            logger.info(f"Loaded {len(self._jobs)} jobs from {self.jobs_dir}")
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return counts
+
+    def shutdown(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
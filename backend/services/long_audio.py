@@ -0,0 +1,223 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.audio_ingest import SAMPLE_RATE, decode_file
+
+logger = logging.getLogger(__name__)
+
+def split_on_silence(audio: np.ndarray,
+                     max_chunk_s: float = 30.0,
+                     search_window_s: float = 5.0,
+                     frame_ms: int = 20) -> List[Tuple[int, int]]:
+    """
+    Split audio into chunks of at most max_chunk_s seconds. Each cut is placed
+    at the quietest frame in the last search_window_s seconds of the chunk, so
+    words are rarely split in half. Returns (start, end) sample offsets.
+    """
+    frame = SAMPLE_RATE * frame_ms // 1000
+    max_chunk = int(max_chunk_s * SAMPLE_RATE)
+    window = int(search_window_s * SAMPLE_RATE)
+
+    n_frames = len(audio) // frame
+    energy = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1)) if n_frames else np.zeros(0)
+
+    chunks = []
+    start = 0
+    while start < len(audio):
+        end = start + max_chunk
+        if end >= len(audio):
+            chunks.append((start, len(audio)))
+            break
+        first_frame = max(start + 1, end - window) // frame
+        last_frame = end // frame
+        if last_frame > first_frame:
+            quietest = first_frame + int(np.argmin(energy[first_frame:last_frame]))
+            end = quietest * frame + frame // 2
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+# Approximate RAM one worker needs for its own Whisper copy (weights plus runtime), in MiB
+WHISPER_WORKER_MB = {"tiny": 400, "base": 600, "small": 1400, "medium": 3500, "large": 6500}
+# Default worker count when the Whisper model's size is unknown
+FALLBACK_WORKERS = 2
+
+# --- Worker process state ---
+
+_worker_handler = None
+
+def _init_worker(config: Dict[str, Any]):
+    """Load the STT model once per worker process."""
+    global _worker_handler
+    try:
+        import torch
+        torch.set_num_threads(config["threads_per_worker"])
+    except ImportError:
+        pass
+    from services.ai_models import AIModelHandler
+    _worker_handler = AIModelHandler(
+        whisper_model_name=config["whisper_model_name"],
+        models_dir=config["models_dir"],
+        stt_engine=config["stt_engine"],
+        stt_compute_type=config["stt_compute_type"],
+        stt_beam_size=config["stt_beam_size"],
+        stt_vad_filter=config["stt_vad_filter"],
+    )
+
+def _transcribe_chunk(index: int, audio: np.ndarray, language: Optional[str], engine: Optional[str]):
+    result = _worker_handler.transcribe(audio, language=language, engine=engine)
+    segments = [
+        {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+        for segment in (result.get("segments") or [])
+    ]
+    return index, {"text": result.get("text") or "", "segments": segments, "language": result.get("language")}
+
+class LongAudioTranscriber:
+    """
+    Transcribes long recordings by splitting them at silences and running the
+    chunks in parallel on a process pool, then stitching the segments back
+    together on a single timeline.
+
+    Every worker loads its own copy of Whisper, so unless workers is given
+    the pool is sized to what fits in the memory budget next to the models
+    the server already holds, and never beyond the available cores.
+    """
+
+    def __init__(self, model_handler, workers: Optional[int] = None, max_chunk_s: float = 30.0):
+        self.cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        self.requested_workers = workers
+        self.workers = max(1, workers) if workers else None
+        self.max_chunk_s = max_chunk_s
+        self.model_handler = model_handler
+        self._config = {
+            "whisper_model_name": model_handler.whisper_model_name,
+            "models_dir": str(model_handler.models_dir),
+            "stt_engine": model_handler.stt_engine,
+            "stt_compute_type": model_handler.stt_compute_type,
+            "stt_beam_size": model_handler.stt_beam_size,
+            "stt_vad_filter": model_handler.stt_vad_filter,
+        }
+        self._pool = None
+        self._pool_checkpoints = None
+
+    def _default_workers(self) -> int:
+        """
+        (budget - resident) // whisper size, capped at the core count. The
+        size is measured if the server has loaded Whisper itself, otherwise
+        estimated from the model name.
+        """
+        residency = self.model_handler.residency
+        stats = residency.get_stats()
+        measured = [entry["size_mb"] for entry in stats["resident_models"] if entry["name"].startswith("whisper")]
+        if measured:
+            size_mb = max(measured)
+        else:
+            name = self.model_handler.whisper_model_name.split("/")[-1].replace("whisper-", "")
+            size_mb = WHISPER_WORKER_MB.get(name.split(".")[0].split("-")[0])
+        if not size_mb:
+            return min(self.cores, FALLBACK_WORKERS)
+        free_mb = residency.budget_bytes / 2**20 - stats["used_mb"]
+        return max(1, min(self.cores, int(free_mb // size_mb)))
+
+    def _serving_checkpoints(self):
+        return (self.model_handler.get_whisper_checkpoint(),
+                self.model_handler.get_whisper_checkpoint("faster-whisper"))
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        checkpoints = self._serving_checkpoints()
+        if self._pool is not None and checkpoints != self._pool_checkpoints:
+            # A new Whisper version went live: new workers load it. The old pool
+            # is only dropped, not shut down, so transcriptions still holding it
+            # can keep submitting; its workers exit once it is garbage collected.
+            logger.info(f"Whisper version changed to {checkpoints}, starting new long-audio workers")
+            self._pool = None
+        if self._pool is None:
+            self._pool_checkpoints = checkpoints
+            workers = max(1, self.requested_workers) if self.requested_workers else self._default_workers()
+            if workers != self.workers:
+                logger.info(f"Using {workers} long-audio workers")
+            self.workers = workers
+            # spawn, not fork: the parent already has torch and worker threads running
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=({**self._config, "threads_per_worker": max(1, self.cores // workers)},),
+            )
+        return self._pool
+
+    def transcribe_file(self, path: str, language: Optional[str] = None, engine: Optional[str] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        max_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Decode a file (refusing it beyond max_seconds) and transcribe it in parallel chunks."""
+        return self.transcribe(decode_file(path, max_seconds=max_seconds), language, engine, progress_callback)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, engine: Optional[str] = None,
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Transcribe a 16 kHz mono array; progress_callback(done, total) is called per chunk."""
+        started = time.time()
+        chunks = split_on_silence(audio, max_chunk_s=self.max_chunk_s)
+        total = len(chunks)
+        pool = self._get_pool()
+        results: Dict[int, Dict[str, Any]] = {}
+
+        def report(done: int):
+            logger.info(f"Long audio transcription: {done}/{total} chunks")
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+        if total == 0:
+            return {"text": "", "segments": [], "language": language, "chunks": 0,
+                    "audio_seconds": 0, "processing_seconds": 0}
+
+        # Like a single pass, detect the language once on the first chunk and use it everywhere
+        if language is None:
+            start, end = chunks[0]
+            _, results[0] = pool.submit(_transcribe_chunk, 0, audio[start:end], None, engine).result()
+            language = results[0]["language"]
+            report(1)
+
+        futures = [
+            pool.submit(_transcribe_chunk, i, audio[start:end], language, engine)
+            for i, (start, end) in enumerate(chunks) if i not in results
+        ]
+        for future in as_completed(futures):
+            index, result = future.result()
+            results[index] = result
+            report(len(results))
+
+        segments = []
+        texts = []
+        for i, (start, _) in enumerate(chunks):
+            offset = start / SAMPLE_RATE
+            texts.append(results[i]["text"].strip())
+            for segment in results[i]["segments"]:
+                segments.append({
+                    "id": len(segments),
+                    "start": round(segment["start"] + offset, 2),
+                    "end": round(segment["end"] + offset, 2),
+                    "text": segment["text"],
+                })
+
+        elapsed = time.time() - started
+        duration = len(audio) / SAMPLE_RATE
+        logger.info(f"Transcribed {duration:.0f}s of audio in {elapsed:.1f}s using {total} chunks")
+        return {
+            "text": " ".join(text for text in texts if text),
+            "segments": segments,
+            "language": language,
+            "chunks": total,
+            "audio_seconds": round(duration, 2),
+            "processing_seconds": round(elapsed, 2),
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,50 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class ModelPreloader:
+    """Loads a set of models in background threads and tracks per-model readiness."""
+
+    def __init__(self, tasks: Dict[str, Callable[[], Any]]):
+        self.tasks = dict(tasks)
+        self._lock = threading.Lock()
+        self._status: Dict[str, Dict[str, Any]] = {
+            name: {"state": "pending", "error": None, "load_seconds": None} for name in self.tasks
+        }
+        self._threads = []
+
+    def start(self):
+        """Start one loader thread per model."""
+        for name, task in self.tasks.items():
+            thread = threading.Thread(target=self._run, args=(name, task), name=f"preload-{name}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _run(self, name: str, task: Callable[[], Any]):
+        self._set(name, state="loading")
+        started = time.time()
+        try:
+            task()
+        except Exception as e:
+            logger.error(f"Preloading '{name}' failed: {e}")
+            self._set(name, state="failed", error=str(e), load_seconds=round(time.time() - started, 2))
+            return
+        logger.info(f"Preloaded '{name}' in {time.time() - started:.1f}s")
+        self._set(name, state="ready", load_seconds=round(time.time() - started, 2))
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._status[name].update(fields)
+
+    def is_ready(self) -> bool:
+        """True once every configured model has loaded successfully."""
+        with self._lock:
+            return all(status["state"] == "ready" for status in self._status.values())
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Return the load state of each configured model."""
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
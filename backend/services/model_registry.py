@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# "whisper", "faster-whisper" or "translation:<src>-<tgt>"
+SLOT_PATTERN = re.compile(r"^(whisper|faster-whisper|translation:[a-z]{2,3}-[a-z]{2,3})$")
+
+class ModelRegistry:
+    """
+    Versioned models per slot (a translation language pair or Whisper).
+
+    Registered checkpoints are copied into registry_dir/<slot>/v<n> so a
+    version never changes once registered. Activating a version loads and
+    warms it in a background thread through prepare(slot, checkpoint) while
+    the current version keeps serving; only when that succeeds is the
+    slot's active pointer swapped. The replaced version is kept as
+    "previous" for an immediate rollback. State is persisted in
+    registry.json.
+    """
+
+    def __init__(self, registry_dir: str, prepare: Callable[[str, str], Any], keep_versions: int = 3):
+        self.registry_dir = Path(registry_dir)
+        self.registry_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.registry_dir / "registry.json"
+        self.prepare = prepare
+        self.keep_versions = max(2, keep_versions)
+        self._lock = threading.Lock()
+        self._slots: Dict[str, Dict[str, Any]] = {}
+        self._activating: Dict[str, str] = {}  # slot -> version being loaded
+        self._load_state()
+
+    @staticmethod
+    def validate_slot(slot: str) -> str:
+        if not SLOT_PATTERN.match(slot):
+            raise ValueError("slot must be whisper, faster-whisper or translation:<src>-<tgt>")
+        return slot
+
+    def active_checkpoint(self, slot: str) -> Optional[str]:
+        """Checkpoint of the slot's active version, or None to use the built-in default."""
+        with self._lock:
+            entry = self._slots.get(slot)
+            if entry is None or entry["active"] is None:
+                return None
+            return entry["versions"][entry["active"]]["checkpoint"]
+
+    def retained_checkpoints(self) -> Set[str]:
+        """Checkpoints that are active or kept for rollback in any slot."""
+        with self._lock:
+            return {
+                entry["versions"][version]["checkpoint"]
+                for entry in self._slots.values()
+                for version in (entry["active"], entry["previous"])
+                if version is not None
+            }
+
+    def register(self, slot: str, source: str, metadata: Optional[Dict[str, Any]] = None,
+                 move: bool = False) -> Dict[str, Any]:
+        """
+        Add a version to a slot. Local checkpoints (directories or files) are
+        copied (or moved) into the registry; anything else is taken as a hub
+        model name.
+        """
+        self.validate_slot(slot)
+        with self._lock:
+            entry = self._slots.setdefault(slot, {"active": None, "previous": None, "next_number": 1, "versions": {}})
+            version = f"v{entry['next_number']}"
+            entry["next_number"] += 1
+
+        checkpoint = source
+        source_path = Path(source)
+        if source_path.exists():
+            target = self.registry_dir / slot.replace(":", "_") / version
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_target = target.with_name(version + ".tmp")
+            shutil.rmtree(tmp_target, ignore_errors=True)
+            if source_path.is_dir():
+                if move:
+                    shutil.move(str(source_path), str(tmp_target))
+                else:
+                    shutil.copytree(source_path, tmp_target)
+                os.replace(tmp_target, target)
+                checkpoint = str(target)
+            else:
+                target.mkdir()
+                (shutil.move if move else shutil.copy2)(str(source_path), str(target / source_path.name))
+                checkpoint = str(target / source_path.name)
+
+        record = {
+            "version": version,
+            "checkpoint": checkpoint,
+            "source": source,
+            "registered_at": time.time(),
+            "state": "registered",
+            "activated_at": None,
+            "warmup_seconds": None,
+            "error": None,
+            **({"metadata": metadata} if metadata else {}),
+        }
+        with self._lock:
+            self._slots[slot]["versions"][version] = record
+            self._save_locked()
+        logger.info(f"Registered {slot} {version} from {source}")
+        return dict(record)
+
+    def activate(self, slot: str, version: str) -> Dict[str, Any]:
+        """Start loading and warming a version in the background; it goes live once ready."""
+        with self._lock:
+            entry = self._slots.get(slot)
+            if entry is None or version not in entry["versions"]:
+                raise ValueError(f"Unknown version {version} for {slot}")
+            if slot in self._activating:
+                raise RuntimeError(f"{slot} is already activating {self._activating[slot]}")
+            if entry["active"] == version:
+                return dict(entry["versions"][version])
+            self._activating[slot] = version
+            record = entry["versions"][version]
+            record.update(state="loading", error=None)
+            checkpoint = record["checkpoint"]
+            self._save_locked()
+
+        threading.Thread(target=self._activate, args=(slot, version, checkpoint),
+                         name=f"activate-{slot}-{version}", daemon=True).start()
+        return dict(record)
+
+    def _activate(self, slot: str, version: str, checkpoint: str):
+        started = time.time()
+        try:
+            self.prepare(slot, checkpoint)
+        except Exception as e:
+            logger.error(f"Activating {slot} {version} failed, keeping the current version: {e}")
+            with self._lock:
+                self._slots[slot]["versions"][version].update(state="failed", error=str(e))
+                del self._activating[slot]
+                self._save_locked()
+            return
+
+        with self._lock:
+            entry = self._slots[slot]
+            if entry["previous"] is not None and entry["previous"] != version:
+                entry["versions"][entry["previous"]]["state"] = "registered"
+            if entry["active"] is not None:
+                entry["versions"][entry["active"]]["state"] = "previous"
+            # The replaced version (None = the built-in default) stays available for rollback
+            entry["previous"] = entry["active"]
+            entry["active"] = version
+            entry["versions"][version].update(state="active", activated_at=time.time(),
+                                              warmup_seconds=round(time.time() - started, 2))
+            del self._activating[slot]
+            pruned = self._prune_locked(slot)
+            self._save_locked()
+        logger.info(f"{slot} now serves {version} (ready after {time.time() - started:.1f}s)")
+        for path in pruned:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def rollback(self, slot: str) -> Dict[str, Any]:
+        """
+        Swap the previous version back in; it is normally still loaded, so
+        this is instant. Rolling back the first activated version returns
+        the slot to the built-in default model.
+        """
+        with self._lock:
+            entry = self._slots.get(slot)
+            if entry is None or entry["active"] is None and entry["previous"] is None:
+                raise ValueError(f"{slot} has no previous version to roll back to")
+            if slot in self._activating:
+                raise RuntimeError(f"{slot} is activating {self._activating[slot]}")
+            entry["active"], entry["previous"] = entry["previous"], entry["active"]
+            if entry["previous"] is not None:
+                entry["versions"][entry["previous"]]["state"] = "previous"
+            record = {"version": None, "checkpoint": None, "state": "default"}
+            if entry["active"] is not None:
+                record = entry["versions"][entry["active"]]
+                record.update(state="active", activated_at=time.time())
+            self._save_locked()
+        logger.info(f"Rolled {slot} back to {record['version'] or 'the default model'}")
+        return dict(record)
+
+    def _prune_locked(self, slot: str):
+        """Forget the oldest inactive versions beyond keep_versions; returns directories to delete."""
+        entry = self._slots[slot]
+        kept = {entry["active"], entry["previous"]}
+        inactive = [record for version, record in entry["versions"].items() if version not in kept]
+        inactive.sort(key=lambda record: record["registered_at"])
+        pruned = []
+        for record in inactive[:max(0, len(entry["versions"]) - self.keep_versions)]:
+            del entry["versions"][record["version"]]
+            version_dir = self.registry_dir / slot.replace(":", "_") / record["version"]
+            if version_dir.exists():
+                pruned.append(version_dir)
+        return pruned
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                slot: {
+                    "active": entry["active"],
+                    "previous": entry["previous"],
+                    "activating": self._activating.get(slot),
+                    "versions": [dict(record) for record in entry["versions"].values()],
+                }
+                for slot, entry in self._slots.items()
+            }
+
+    def _load_state(self):
+        if not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self._slots = json.load(f).get("slots", {})
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read model registry {self.state_path}: {e}")
+            return
+        for entry in self._slots.values():
+            for record in entry["versions"].values():
+                if record["state"] == "loading":
+                    # The server stopped mid-activation; the old pointer still stands
+                    record.update(state="failed", error="Interrupted by a server restart")
+
+    def _save_locked(self):
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"slots": self._slots}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
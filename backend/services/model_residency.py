@@ -0,0 +1,148 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def _process_rss_bytes() -> int:
+    """Resident set size of this process, or 0 when it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def measure_model_size(obj: Any) -> int:
+    """Sum the parameter and buffer bytes of torch modules inside obj."""
+    if isinstance(obj, (tuple, list)):
+        return sum(measure_model_size(item) for item in obj)
+    size = 0
+    if callable(getattr(obj, "parameters", None)):
+        size += sum(p.numel() * p.element_size() for p in obj.parameters())
+    if callable(getattr(obj, "buffers", None)):
+        size += sum(b.numel() * b.element_size() for b in obj.buffers())
+    return size
+
+class ModelResidencyManager:
+    """
+    Keeps loaded models within a RAM budget.
+
+    Models are registered under a name together with their measured size. When
+    loading another model would exceed the budget, the least recently used
+    models are evicted first. Requests already holding a reference to an
+    evicted model finish normally; the memory is freed once they let go of it.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._resident: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._history: Dict[str, Dict[str, int]] = {}  # name -> load/eviction counters
+        self._load_locks: Dict[str, threading.Lock] = {}  # name -> single-flight lock
+
+    def _counters(self, name: str) -> Dict[str, int]:
+        return self._history.setdefault(name, {"loads": 0, "evictions": 0})
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return a resident model and mark it as recently used, or None."""
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is None:
+                return None
+            self._resident.move_to_end(name)
+            entry["last_used"] = time.time()
+            return entry["model"]
+
+    def load(self, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the resident model for name, loading it with loader() if needed.
+
+        Concurrent callers asking for the same name wait for a single load
+        instead of each running loader().
+        """
+        model = self.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            model = self.get(name)
+            if model is not None:
+                return model
+            return self._load_locked(name, loader)
+
+    def _load_locked(self, name: str, loader: Callable[[], Any]) -> Any:
+        rss_before = _process_rss_bytes()
+        started = time.time()
+        model = loader()
+        load_seconds = time.time() - started
+        size = measure_model_size(model)
+        if size == 0:
+            # Not a torch module (or torch missing); fall back to RSS growth
+            size = max(0, _process_rss_bytes() - rss_before)
+
+        with self._lock:
+            self._make_room(size, exclude=name)
+            self._resident[name] = {
+                "model": model,
+                "size_bytes": size,
+                "loaded_at": time.time(),
+                "last_used": time.time(),
+                "load_seconds": round(load_seconds, 2),
+            }
+            self._counters(name)["loads"] += 1
+
+        logger.info(f"Loaded model '{name}' ({size / 2**20:.1f} MiB in {load_seconds:.1f}s)")
+        return model
+
+    def _make_room(self, size: int, exclude: str):
+        """Evict least recently used models until size fits in the budget. Caller holds the lock."""
+        if size > self.budget_bytes:
+            logger.warning(f"Model '{exclude}' ({size / 2**20:.1f} MiB) is larger than the memory budget")
+        while self._resident and self._used_bytes() + size > self.budget_bytes:
+            victim = next(iter(self._resident))
+            if victim == exclude:
+                break
+            self._evict_locked(victim)
+
+    def _used_bytes(self) -> int:
+        return sum(entry["size_bytes"] for entry in self._resident.values())
+
+    def _evict_locked(self, name: str):
+        entry = self._resident.pop(name)
+        self._counters(name)["evictions"] += 1
+        logger.info(f"Evicted model '{name}' ({entry['size_bytes'] / 2**20:.1f} MiB)")
+
+    def evict(self, name: str) -> bool:
+        """Drop a model from memory. Returns False if it was not resident."""
+        with self._lock:
+            if name not in self._resident:
+                return False
+            self._evict_locked(name)
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Report resident models, their sizes and load/eviction counts."""
+        with self._lock:
+            resident = [
+                {
+                    "name": name,
+                    "size_mb": round(entry["size_bytes"] / 2**20, 1),
+                    "loaded_at": entry["loaded_at"],
+                    "last_used": entry["last_used"],
+                    "load_seconds": entry["load_seconds"],
+                    **self._history[name],
+                }
+                for name, entry in reversed(self._resident.items())
+            ]
+            return {
+                "budget_mb": round(self.budget_bytes / 2**20, 1),
+                "used_mb": round(self._used_bytes() / 2**20, 1),
+                "process_rss_mb": round(_process_rss_bytes() / 2**20, 1),
+                "resident_models": resident,
+                "history": dict(self._history),
+            }
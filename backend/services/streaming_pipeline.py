@@ -0,0 +1,73 @@
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+Stage = Tuple[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]]
+
+_END = object()
+
+class StagedPipeline:
+    """
+    Runs items through a chain of async stages concurrently, e.g. STT ->
+    translation -> TTS. Each stage is its own task connected to the next by
+    a bounded queue, so segment 2 can be transcribed while segment 1 is
+    translated and segment 0 synthesized. Items come out in input order with
+    per-stage timings under item["timings"].
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 4):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.totals_ms: Dict[str, float] = {name: 0.0 for name, _ in stages}
+
+    async def run(self, source: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield processed items as soon as they leave the last stage."""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        tasks = [asyncio.create_task(self._feed(source, queues[0]))]
+        for (name, fn), inbox, outbox in zip(self.stages, queues, queues[1:]):
+            tasks.append(asyncio.create_task(self._stage(name, fn, inbox, outbox)))
+
+        try:
+            while True:
+                item = await queues[-1].get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _feed(self, source: AsyncIterator[Dict[str, Any]], outbox: asyncio.Queue):
+        try:
+            async for item in source:
+                item.setdefault("timings", {})
+                await outbox.put(item)
+        except Exception as e:
+            await outbox.put(e)
+            return
+        await outbox.put(_END)
+
+    async def _stage(self, name: str, fn, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        while True:
+            item = await inbox.get()
+            if item is _END or isinstance(item, BaseException):
+                # Pass end-of-stream and upstream errors along
+                await outbox.put(item)
+                return
+            started = time.perf_counter()
+            try:
+                item = await fn(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage '{name}' failed: {e}")
+                await outbox.put(e)
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            item["timings"][name] = round(elapsed_ms, 1)
+            self.totals_ms[name] += elapsed_ms
+            await outbox.put(item)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+SAMPLE_RATE = 16000
+
+class SpeechSegmenter:
+    """
+    Splits a live 16 kHz mono stream into speech segments with voice activity
+    detection. Uses webrtcvad when installed and an adaptive energy threshold
+    otherwise.
+
+    feed() returns events for the caller to transcribe:
+      {"type": "partial", "audio", "start", "end"} while the user is still talking
+      {"type": "final", "audio", "start", "end"} once a segment is finished
+    Times are in seconds from the start of the stream.
+    """
+
+    def __init__(self,
+                 frame_ms: int = 30,
+                 end_silence_ms: int = 600,
+                 partial_interval_ms: int = 1500,
+                 max_segment_s: float = 20.0,
+                 min_speech_ms: int = 250,
+                 vad_aggressiveness: int = 2):
+        self.frame_size = SAMPLE_RATE * frame_ms // 1000
+        self.end_silence_frames = max(1, end_silence_ms // frame_ms)
+        self.partial_interval_frames = max(1, partial_interval_ms // frame_ms)
+        self.max_segment_frames = int(max_segment_s * 1000 / frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+
+        self._vad = webrtcvad.Vad(vad_aggressiveness) if webrtcvad is not None else None
+        self._noise_floor = 0.005
+
+        self._pending = np.zeros(0, dtype=np.float32)  # samples not yet framed
+        self._position = 0  # samples consumed so far
+        self._segment: List[np.ndarray] = []
+        self._segment_start = 0
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        if self._vad is not None:
+            pcm16 = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            return self._vad.is_speech(pcm16, SAMPLE_RATE)
+
+        rms = float(np.sqrt(np.mean(frame ** 2)) + 1e-9)
+        # Minimum tracking: drop to quiet frames at once, rise slowly so the
+        # threshold follows background noise but not the speech itself
+        self._noise_floor = min(rms, self._noise_floor * 1.01)
+        return rms > max(self._noise_floor * 3.0, 0.01)
+
+    def feed(self, samples: np.ndarray) -> List[Dict[str, Any]]:
+        """Add float32 samples in [-1, 1] and return any segment events."""
+        events = []
+        self._pending = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        while len(self._pending) >= self.frame_size:
+            frame = self._pending[:self.frame_size]
+            self._pending = self._pending[self.frame_size:]
+            event = self._process_frame(frame)
+            if event is not None:
+                events.append(event)
+            self._position += self.frame_size
+        return events
+
+    def _process_frame(self, frame: np.ndarray) -> Optional[Dict[str, Any]]:
+        speech = self._is_speech(frame)
+
+        if not self._segment:
+            if speech:
+                self._segment = [frame]
+                self._segment_start = self._position
+                self._speech_frames = 1
+                self._silence_frames = 0
+                self._frames_since_partial = 1
+            return None
+
+        self._segment.append(frame)
+        self._frames_since_partial += 1
+        if speech:
+            self._speech_frames += 1
+            self._silence_frames = 0
+        else:
+            self._silence_frames += 1
+
+        if self._silence_frames >= self.end_silence_frames or len(self._segment) >= self.max_segment_frames:
+            return self._finish_segment()
+
+        if self._frames_since_partial >= self.partial_interval_frames and self._speech_frames >= self.min_speech_frames:
+            self._frames_since_partial = 0
+            return self._event("partial")
+        return None
+
+    def _event(self, event_type: str) -> Dict[str, Any]:
+        audio = np.concatenate(self._segment)
+        return {
+            "type": event_type,
+            "audio": audio,
+            "start": round(self._segment_start / SAMPLE_RATE, 2),
+            "end": round((self._segment_start + len(audio)) / SAMPLE_RATE, 2),
+        }
+
+    def _finish_segment(self) -> Optional[Dict[str, Any]]:
+        event = self._event("final") if self._speech_frames >= self.min_speech_frames else None
+        self._segment = []
+        self._speech_frames = 0
+        self._silence_frames = 0
+        return event
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Finish the segment in progress at the end of the stream."""
+        if not self._segment:
+            return []
+        event = self._finish_segment()
+        return [event] if event is not None else []
+
+class Pcm16Decoder:
+    """Converts little-endian 16-bit PCM chunks to float32, carrying odd bytes between chunks."""
+
+    def __init__(self):
+        self._remainder = b""
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self._remainder + data
+        usable = len(data) - len(data) % 2
+        self._remainder = data[usable:]
+        return np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+class OpusStreamDecoder:
+    """
+    Decodes an Ogg/WebM Opus byte stream (e.g. from MediaRecorder) to 16 kHz
+    mono PCM through a long-running ffmpeg process.
+    """
+
+    def __init__(self):
+        self._process = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+
+    async def write(self, data: bytes):
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def read(self) -> bytes:
+        """Return the next chunk of decoded PCM, or b"" at the end of the stream."""
+        return await self._process.stdout.read(SAMPLE_RATE)
+
+    async def close_input(self):
+        if self._process.stdin and not self._process.stdin.is_closing():
+            self._process.stdin.close()
+
+    async def stop(self):
+        if self._process is None:
+            return
+        await self.close_input()
+        if self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
@@ -0,0 +1,166 @@
+import re
+import json
+import time
+import hashlib
+import logging
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+class HashSet:
+    """
+    Set of 64-bit hashes in a sorted numpy array: 8 bytes per entry instead
+    of the ~70-100 a Python set of ints takes. New hashes collect in a small
+    Python set that is merged into the array once it holds buffer_size
+    entries.
+    """
+
+    def __init__(self, buffer_size: int = 65536):
+        self.buffer_size = buffer_size
+        self._sorted = np.empty(0, dtype=np.uint64)
+        self._buffer = set()
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._buffer)
+
+    def __contains__(self, value: int) -> bool:
+        if value in self._buffer:
+            return True
+        i = int(np.searchsorted(self._sorted, np.uint64(value)))
+        return i < len(self._sorted) and int(self._sorted[i]) == value
+
+    def add(self, value: int):
+        if value in self:
+            return
+        self._buffer.add(value)
+        if len(self._buffer) >= self.buffer_size:
+            new = np.fromiter(self._buffer, dtype=np.uint64, count=len(self._buffer))
+            new.sort()
+            self._sorted = np.insert(self._sorted, np.searchsorted(self._sorted, new), new)
+            self._buffer = set()
+
+class PairDeduplicator:
+    """
+    Drops repeated (source, target, language pair) examples. Exact duplicates
+    match byte for byte; near duplicates only differ in case, punctuation,
+    unicode form or whitespace. Only 64-bit hashes are kept, in two HashSets
+    (exact and normalized), so memory grows by about 16 bytes per unique
+    pair, independent of the text length: roughly 160 MB for 10 million pairs.
+    """
+
+    def __init__(self):
+        self._exact = HashSet()
+        self._normalized = HashSet()
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = unicodedata.normalize("NFKC", text or "").casefold()
+        return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+    @staticmethod
+    def _hash(*parts: str) -> int:
+        digest = hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def is_duplicate(self, example: Dict[str, Any]) -> bool:
+        pair = f"{example.get('source_lang')}-{example.get('target_lang')}"
+        source, target = example.get("source_text") or "", example.get("target_text") or ""
+        exact = self._hash(pair, source, target)
+        if exact in self._exact:
+            self.exact_duplicates += 1
+            return True
+        self._exact.add(exact)
+        normalized = self._hash(pair, self.normalize(source), self.normalize(target))
+        if normalized in self._normalized:
+            self.near_duplicates += 1
+            return True
+        self._normalized.add(normalized)
+        return False
+
+class ShardedExportWriter:
+    """
+    Writes examples to numbered JSONL shards of at most shard_rows rows, plus
+    a Parquet copy of each shard when pyarrow is installed, and describes the
+    shards in manifest.json. Only the current shard is held in memory.
+    """
+
+    def __init__(self, output_dir: str, shard_rows: int = 100000, parquet: bool = True):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_rows = max(1, shard_rows)
+        self.parquet = parquet and pa is not None
+        self.shards: List[Dict[str, Any]] = []
+        self._rows: List[Dict[str, Any]] = []
+        self.total_rows = 0
+
+    def write(self, example: Dict[str, Any]):
+        self._rows.append(example)
+        if len(self._rows) >= self.shard_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        index = len(self.shards)
+        jsonl_path = self.output_dir / f"shard-{index:05d}.jsonl"
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            for row in self._rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        shard = {"rows": len(self._rows), "jsonl": jsonl_path.name, "jsonl_bytes": jsonl_path.stat().st_size}
+        if self.parquet:
+            parquet_path = self.output_dir / f"shard-{index:05d}.parquet"
+            pq.write_table(pa.Table.from_pylist(self._rows), parquet_path, compression="zstd")
+            shard["parquet"] = parquet_path.name
+            shard["parquet_bytes"] = parquet_path.stat().st_size
+        self.shards.append(shard)
+        self.total_rows += len(self._rows)
+        self._rows = []
+
+    def close(self, extra: Optional[Dict[str, Any]] = None) -> Path:
+        """Flush the last shard and write the manifest; returns the manifest path."""
+        self._flush()
+        manifest = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_rows": self.total_rows,
+            "shard_rows": self.shard_rows,
+            "formats": ["jsonl", "parquet"] if self.parquet else ["jsonl"],
+            "shards": self.shards,
+            **(extra or {}),
+        }
+        manifest_path = self.output_dir / "manifest.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest_path
+
+def export_examples(examples: Iterable[Dict[str, Any]], output_dir: str, shard_rows: int = 100000) -> Dict[str, Any]:
+    """Deduplicate a stream of examples into sharded files and return export statistics."""
+    deduplicator = PairDeduplicator()
+    writer = ShardedExportWriter(output_dir, shard_rows=shard_rows)
+    seen = 0
+    for example in examples:
+        seen += 1
+        if not deduplicator.is_duplicate(example):
+            writer.write(example)
+    stats = {
+        "examples_seen": seen,
+        "exact_duplicates": deduplicator.exact_duplicates,
+        "near_duplicates": deduplicator.near_duplicates,
+    }
+    manifest_path = writer.close(stats)
+    logger.info(f"Exported {writer.total_rows} of {seen} examples to {len(writer.shards)} shards in {output_dir}")
+    return {**stats, "rows": writer.total_rows, "shards": len(writer.shards), "manifest": str(manifest_path)}
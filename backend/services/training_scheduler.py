@@ -0,0 +1,366 @@
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import shutil
+import sqlite3
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+CANCEL_GRACE_SECONDS = 15
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """Parse a Linux-style CPU list such as "2-5,7" into [2, 3, 4, 5, 7]."""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def default_training_cpus(reserved: int = 1) -> Optional[List[int]]:
+    """All CPUs this process may use except the first `reserved`, which are left to serving."""
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    return cpus[reserved:] if len(cpus) > reserved else cpus
+
+class TrainingScheduler:
+    """
+    Persistent queue for training runs.
+
+    Jobs are recorded in SQLite and started in submission order, at most
+    max_concurrent at a time, as subprocesses pinned to cpu_affinity and
+    lowered to the given nice level so they cannot starve the serving path.
+    Output goes to a per-job log file; CPU time and peak memory come from
+    os.wait4 when the process exits. Jobs that were running when the server
+    stopped are queued again on start-up and resume from their last
+    checkpoint.
+    """
+
+    def __init__(self, db_path: str = "./training_jobs/jobs.sqlite3", jobs_dir: str = "./training_jobs",
+                 max_concurrent: int = 1, nice: int = 10, cpu_affinity: Optional[Sequence[int]] = None,
+                 poll_interval: float = 5.0, on_success: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_concurrent = max(1, max_concurrent)
+        self.nice = nice
+        self.cpu_affinity = sorted(cpu_affinity) if cpu_affinity else None
+        self.poll_interval = poll_interval
+        self.on_success = on_success  # called with the job (including results) after a successful run
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._procs: Dict[str, subprocess.Popen] = {}
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS training_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                command TEXT NOT NULL,
+                params TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                pid INTEGER,
+                exit_code INTEGER,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                wall_seconds REAL,
+                user_cpu_seconds REAL,
+                system_cpu_seconds REAL,
+                max_rss_mb REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_training_jobs_status ON training_jobs (status, created_at)")
+        self._conn.commit()
+
+        self._recover()
+        threading.Thread(target=self._dispatch_loop, name="training-scheduler", daemon=True).start()
+
+    def job_dir(self, job_id: str) -> Path:
+        return self.jobs_dir / job_id
+
+    def submit(self, dataset_path: str, script: str, args: Optional[List[str]] = None,
+               params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Queue `python script --dataset <dataset> *args`. The dataset file is
+        moved into the job's directory and deleted when the job ends;
+        "{job_dir}" in args is replaced by that directory.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        job_dir.mkdir(parents=True)
+        dataset = job_dir / ("dataset" + Path(dataset_path).suffix)
+        shutil.move(dataset_path, dataset)
+        command = [sys.executable, script, "--dataset", str(dataset),
+                   "--results-path", str(job_dir / "results.json"),
+                   *(arg.replace("{job_dir}", str(job_dir)) for arg in args or [])]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO training_jobs (id, status, command, params, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(command), json.dumps(params or {}), time.time()),
+            )
+            self._conn.commit()
+        logger.info(f"Queued training job {job_id}")
+        self._wake.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM training_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._to_dict(row)
+            if job["status"] == "queued":
+                job["queue_position"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM training_jobs WHERE status = 'queued' AND created_at < ?",
+                    (row["created_at"],),
+                ).fetchone()[0] + 1
+        results_path = self.job_dir(job_id) / "results.json"
+        if results_path.exists():
+            try:
+                with open(results_path, 'r', encoding='utf-8') as f:
+                    job["results"] = json.load(f)
+            except (OSError, ValueError):
+                pass
+        return job
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM training_jobs"
+        params: List[Any] = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def read_log(self, job_id: str, tail_bytes: int = 65536) -> Optional[str]:
+        """Return the last tail_bytes of a job's output, or None if it has none yet."""
+        log_path = self.job_dir(job_id) / "train.log"
+        if not log_path.exists():
+            return None
+        with open(log_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - tail_bytes))
+            return f.read().decode("utf-8", errors="replace")
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued job, or stop a running one (SIGTERM, then SIGKILL after a grace period)."""
+        with self._lock:
+            row = self._conn.execute("SELECT status, pid FROM training_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise HTTPException(404, "Unknown training job")
+            if row["status"] not in ACTIVE_STATES:
+                raise HTTPException(409, f"The job has already {row['status']}")
+            if row["status"] == "queued":
+                self._conn.execute(
+                    "UPDATE training_jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                    (time.time(), job_id),
+                )
+            else:
+                self._conn.execute("UPDATE training_jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            self._conn.commit()
+            proc = self._procs.get(job_id)
+
+        if proc is None:
+            self._remove_dataset(job_id)
+        else:
+            logger.info(f"Stopping training job {job_id} (pid {proc.pid})")
+            self._signal(proc.pid, signal.SIGTERM)
+            timer = threading.Timer(CANCEL_GRACE_SECONDS, self._kill_if_running, args=(job_id, proc.pid))
+            timer.daemon = True
+            timer.start()
+        return self.get(job_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM training_jobs GROUP BY status").fetchall()
+        return {
+            "max_concurrent": self.max_concurrent,
+            "nice": self.nice,
+            "cpu_affinity": self.cpu_affinity,
+            "jobs": {row[0]: row[1] for row in rows},
+        }
+
+    # --- internals ---
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["job_id"] = job.pop("id")
+        job["params"] = json.loads(job["params"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        del job["command"]
+        return job
+
+    def _recover(self):
+        """Requeue jobs cut off by a restart, stopping any training process they left behind."""
+        rows = self._conn.execute("SELECT id, pid FROM training_jobs WHERE status = 'running'").fetchall()
+        for row in rows:
+            if row["pid"] and self._is_orphan(row["pid"], row["id"]):
+                logger.warning(f"Stopping leftover process {row['pid']} of training job {row['id']}")
+                self._signal(row["pid"], signal.SIGKILL)
+            self._conn.execute(
+                "UPDATE training_jobs SET status = 'queued', pid = NULL, started_at = NULL WHERE id = ?",
+                (row["id"],),
+            )
+        self._conn.commit()
+        if rows:
+            logger.info(f"Requeued {len(rows)} interrupted training jobs")
+
+    @staticmethod
+    def _is_orphan(pid: int, job_id: str) -> bool:
+        """True if pid is still the training process of this job (and not a reused pid)."""
+        try:
+            with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                return job_id.encode() in f.read()
+        except OSError:
+            return False
+
+    @staticmethod
+    def _signal(pid: int, sig: int):
+        try:
+            # Training runs in its own session, so this also reaches its children
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _kill_if_running(self, job_id: str, pid: int):
+        with self._lock:
+            proc = self._procs.get(job_id)
+        if proc is not None and proc.pid == pid:
+            logger.warning(f"Training job {job_id} ignored SIGTERM, killing it")
+            self._signal(pid, signal.SIGKILL)
+
+    def _dispatch_loop(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._start_queued()
+            except Exception as e:
+                logger.error(f"Training scheduler error: {e}")
+
+    def _start_queued(self):
+        while True:
+            with self._lock:
+                if len(self._procs) >= self.max_concurrent:
+                    return
+                row = self._conn.execute(
+                    "SELECT id, command FROM training_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return
+                job_id = row["id"]
+                try:
+                    proc = self._launch(job_id, json.loads(row["command"]))
+                except OSError as e:
+                    logger.error(f"Could not start training job {job_id}: {e}")
+                    self._conn.execute(
+                        "UPDATE training_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                        (str(e), time.time(), job_id),
+                    )
+                    self._conn.commit()
+                    continue
+                self._procs[job_id] = proc
+                self._conn.execute(
+                    "UPDATE training_jobs SET status = 'running', started_at = ?, pid = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (time.time(), proc.pid, job_id),
+                )
+                self._conn.commit()
+            logger.info(f"Started training job {job_id} (pid {proc.pid})")
+            threading.Thread(target=self._monitor, args=(job_id, proc), name=f"training-{job_id[:8]}",
+                             daemon=True).start()
+
+    def _launch(self, job_id: str, command: List[str]) -> subprocess.Popen:
+        nice, cpus = self.nice, self.cpu_affinity
+        env = dict(os.environ)
+        if cpus:
+            # Keep OpenMP/MKL pools inside the pinned cores
+            env["OMP_NUM_THREADS"] = str(len(cpus))
+            env["MKL_NUM_THREADS"] = str(len(cpus))
+        with open(self.job_dir(job_id) / "train.log", 'ab') as log_file:
+            proc = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                env=env,
+                start_new_session=True,
+            )
+        # Applied from the parent right after the spawn (preexec_fn is not safe
+        # with the server's threads); the trainer only starts its worker
+        # threads after importing torch, so they inherit both settings.
+        try:
+            if nice:
+                os.setpriority(os.PRIO_PROCESS, proc.pid, os.getpriority(os.PRIO_PROCESS, proc.pid) + nice)
+            if cpus and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(proc.pid, cpus)
+        except OSError as e:
+            logger.warning(f"Could not limit resources of training job {job_id}: {e}")
+        return proc
+
+    def _monitor(self, job_id: str, proc: subprocess.Popen):
+        started = time.time()
+        _, status, rusage = os.wait4(proc.pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        # The process has been reaped here, tell Popen so it does not try again
+        proc.returncode = exit_code
+
+        with self._lock:
+            cancel_requested = self._conn.execute(
+                "SELECT cancel_requested FROM training_jobs WHERE id = ?", (job_id,)
+            ).fetchone()[0]
+            if cancel_requested:
+                state, error = "cancelled", None
+            elif exit_code == 0:
+                state, error = "succeeded", None
+            else:
+                state, error = "failed", f"Training exited with code {exit_code}"
+            self._conn.execute(
+                "UPDATE training_jobs SET status = ?, error = ?, exit_code = ?, finished_at = ?, wall_seconds = ?, "
+                "user_cpu_seconds = ?, system_cpu_seconds = ?, max_rss_mb = ? WHERE id = ?",
+                (state, error, exit_code, time.time(), round(time.time() - started, 1),
+                 round(rusage.ru_utime, 1), round(rusage.ru_stime, 1),
+                 # ru_maxrss is in kilobytes on Linux
+                 round(rusage.ru_maxrss / 1024, 1), job_id),
+            )
+            self._conn.commit()
+            del self._procs[job_id]
+        logger.info(f"Training job {job_id} {state} (exit code {exit_code})")
+        self._remove_dataset(job_id)
+        self._wake.set()
+        if state == "succeeded" and self.on_success is not None:
+            try:
+                self.on_success(self.get(job_id))
+            except Exception as e:
+                logger.error(f"Post-processing of training job {job_id} failed: {e}")
+
+    def _remove_dataset(self, job_id: str):
+        for path in self.job_dir(job_id).glob("dataset*"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,125 @@
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class TranslationBatcher:
+    """
+    Collects translation requests for the same language pair over a short
+    window and runs them through the translation engine as one padded batch.
+    Callers wait at most result_timeout seconds for their results.
+    """
+
+    def __init__(self, model_handler, max_batch_size: int = 16, max_wait_ms: float = 10.0, cache=None,
+                 result_timeout: float = 600.0):
+        self.model_handler = model_handler
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.result_timeout = result_timeout
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], List[Tuple[str, Future]]] = {}
+        self._conditions: Dict[Tuple[str, str], threading.Condition] = {}
+        self._workers: Dict[Tuple[str, str], threading.Thread] = {}
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Translate a single text, sharing a model call with concurrent requests."""
+        return self.translate_many([text], source_lang, target_lang)[0]
+
+    def translate_many(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """Translate a list of texts, blocking until every result is available."""
+        if not texts:
+            return []
+        if self.cache is None:
+            futures = self.submit(texts, source_lang, target_lang)
+            return [future.result(timeout=self.result_timeout) for future in futures]
+
+        src = self.model_handler.normalize_lang_code(source_lang)
+        tgt = self.model_handler.normalize_lang_code(target_lang)
+        version = self.model_handler.get_translation_model_version(src, tgt)
+        results: List[Optional[str]] = [self.cache.get(src, tgt, text, version) for text in texts]
+
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if missing:
+            futures = self.submit([texts[i] for i in missing], src, tgt)
+            for i, future in zip(missing, futures):
+                results[i] = future.result(timeout=self.result_timeout)
+            # Results from a model version swapped in meanwhile must not be cached under the old key
+            if self.model_handler.get_translation_model_version(src, tgt) == version:
+                for i in missing:
+                    self.cache.put(src, tgt, texts[i], version, results[i])
+        return results
+
+    def submit(self, texts: List[str], source_lang: str, target_lang: str) -> List[Future]:
+        """Queue texts for translation and return one future per text."""
+        pair = (
+            self.model_handler.normalize_lang_code(source_lang),
+            self.model_handler.normalize_lang_code(target_lang),
+        )
+        futures = [Future() for _ in texts]
+
+        with self._lock:
+            condition = self._conditions.get(pair)
+            if condition is None:
+                condition = threading.Condition(self._lock)
+                self._conditions[pair] = condition
+                self._pending[pair] = []
+            self._pending[pair].extend(zip(texts, futures))
+
+            worker = self._workers.get(pair)
+            if worker is None or not worker.is_alive():
+                worker = threading.Thread(
+                    target=self._run_pair,
+                    args=(pair,),
+                    name=f"translation-batcher-{pair[0]}-{pair[1]}",
+                    daemon=True,
+                )
+                self._workers[pair] = worker
+                worker.start()
+            condition.notify()
+
+        return futures
+
+    def _run_pair(self, pair: Tuple[str, str]):
+        """Worker loop for one language pair."""
+        condition = self._conditions[pair]
+        while True:
+            with self._lock:
+                while not self._pending[pair]:
+                    condition.wait()
+
+                # Give other callers a short window to join the batch
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending[pair]) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+
+                batch = self._pending[pair][:self.max_batch_size]
+                del self._pending[pair][:self.max_batch_size]
+
+            self._run_batch(pair, batch)
+
+    def _run_batch(self, pair: Tuple[str, str], batch: List[Tuple[str, Future]]):
+        """Run one padded generate call and hand each caller its own result."""
+        texts = [text for text, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            engine = self.model_handler.get_translation_engine(*pair)
+            translations = engine.translate_batch(texts)
+            if len(translations) != len(texts):
+                raise RuntimeError(f"The translation engine returned {len(translations)} results for {len(texts)} texts")
+            logger.debug(f"Translated batch of {len(texts)} for {pair[0]}-{pair[1]}")
+        except Exception as e:
+            logger.error(f"Batched translation failed for {pair[0]}-{pair[1]}: {e}")
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, translated in zip(futures, translations):
+            future.set_result(translated)
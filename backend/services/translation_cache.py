@@ -0,0 +1,194 @@
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class TranslationCache:
+    """
+    Two-tier cache for translation results: an in-memory LRU in front of a
+    SQLite store. Entries are keyed by language pair, normalized text and model
+    version, so a newly saved fine-tuned model never serves stale results.
+    """
+
+    def __init__(self,
+                 db_path: str = "./models_cache/translation_cache.sqlite3",
+                 max_memory_entries: int = 10000,
+                 max_disk_entries: int = 200000,
+                 ttl_seconds: Optional[float] = 30 * 24 * 3600):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._memory_pairs: Dict[str, Tuple[str, str, str]] = {}  # key -> (src, tgt, version)
+        self._active_versions: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "invalidations": 0}
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                translated_text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_pair ON translations (source_lang, target_lang, model_version)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_access ON translations (last_access)")
+        self._conn.commit()
+        self._disk_count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize unicode form and whitespace so trivially different inputs share an entry."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+    def _make_key(self, source_lang: str, target_lang: str, text: str, model_version: str) -> str:
+        raw = "\x1f".join([source_lang, target_lang, model_version, self.normalize_text(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _check_version(self, source_lang: str, target_lang: str, model_version: str):
+        """Drop entries of older model versions the first time a new version is seen."""
+        pair = (source_lang, target_lang)
+        previous = self._active_versions.get(pair)
+        self._active_versions[pair] = model_version
+        if previous == model_version:
+            return
+
+        # On first use of a pair this also clears results left on disk by
+        # models that were replaced while the server was down.
+        if previous is not None:
+            logger.info(f"Translation model for {source_lang}-{target_lang} changed, invalidating cached results")
+        stale = [key for key, (src, tgt, version) in self._memory_pairs.items()
+                 if src == source_lang and tgt == target_lang and version != model_version]
+        for key in stale:
+            self._memory.pop(key, None)
+            self._memory_pairs.pop(key, None)
+        cursor = self._conn.execute(
+            "DELETE FROM translations WHERE source_lang = ? AND target_lang = ? AND model_version != ?",
+            (source_lang, target_lang, model_version),
+        )
+        self._conn.commit()
+        self._disk_count -= cursor.rowcount
+        if previous is not None or cursor.rowcount:
+            self._stats["invalidations"] += 1
+
+    def get(self, source_lang: str, target_lang: str, text: str, model_version: str) -> Optional[str]:
+        """Return a cached translation, or None on a miss."""
+        key = self._make_key(source_lang, target_lang, text, model_version)
+        now = time.time()
+        with self._lock:
+            self._check_version(source_lang, target_lang, model_version)
+
+            entry = self._memory.get(key)
+            if entry is not None:
+                translated, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return translated
+                self._memory.pop(key, None)
+                self._memory_pairs.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT translated_text, created_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                self._stats["misses"] += 1
+                return None
+
+            self._conn.execute("UPDATE translations SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, row[0], row[1], (source_lang, target_lang, model_version))
+            self._stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, source_lang: str, target_lang: str, text: str, model_version: str, translated: str):
+        """Store a translation in both tiers."""
+        key = self._make_key(source_lang, target_lang, text, model_version)
+        now = time.time()
+        with self._lock:
+            self._check_version(source_lang, target_lang, model_version)
+            self._remember(key, translated, now, (source_lang, target_lang, model_version))
+
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, source_lang, target_lang, model_version, translated, now, now),
+            )
+            if cursor.rowcount:
+                self._disk_count += 1
+            else:
+                self._conn.execute(
+                    "UPDATE translations SET translated_text = ?, created_at = ?, last_access = ? WHERE key = ?",
+                    (translated, now, now, key),
+                )
+            self._prune_disk()
+            self._conn.commit()
+            self._stats["writes"] += 1
+
+    def _remember(self, key: str, translated: str, created_at: float, pair: Tuple[str, str, str]):
+        self._memory[key] = (translated, created_at)
+        self._memory.move_to_end(key)
+        self._memory_pairs[key] = pair
+        while len(self._memory) > self.max_memory_entries:
+            evicted, _ = self._memory.popitem(last=False)
+            self._memory_pairs.pop(evicted, None)
+
+    def _prune_disk(self):
+        """Evict expired rows, then least recently used rows above the size cap."""
+        if self._disk_count <= self.max_disk_entries:
+            return
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._disk_count -= cursor.rowcount
+        excess = self._disk_count - self.max_disk_entries
+        if excess > 0:
+            # Trim a little extra so pruning does not run on every insert
+            excess += max(1, self.max_disk_entries // 100)
+            cursor = self._conn.execute(
+                "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
+            self._disk_count -= cursor.rowcount
+
+    def clear(self):
+        """Remove every cached translation."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_pairs.clear()
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+            self._disk_count = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current sizes of both tiers."""
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count,
+                "max_memory_entries": self.max_memory_entries,
+                "max_disk_entries": self.max_disk_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
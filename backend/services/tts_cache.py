@@ -0,0 +1,122 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {".mp3": "audio/mpeg", ".wav": "audio/wav"}
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized audio on disk.
+
+    Files are named after a hash of everything that determines the audio
+    (text, language, engine, voice, model version), so the hash doubles as a
+    strong ETag. Total size is bounded; least recently used files go first.
+    """
+
+    def __init__(self, cache_dir: str = "./models_cache/tts_cache", max_bytes: int = 512 * 2**20):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Path, int]]" = OrderedDict()  # key -> (path, size)
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from files left by earlier runs, oldest access first."""
+        files = [path for path in self.cache_dir.glob("*/*") if path.suffix in MEDIA_TYPES]
+        for path in sorted(files, key=lambda p: p.stat().st_atime):
+            size = path.stat().st_size
+            self._entries[path.stem] = (path, size)
+            self._total_bytes += size
+        if self._entries:
+            logger.info(f"TTS cache: {len(self._entries)} files, {self._total_bytes / 2**20:.1f} MiB")
+
+    @staticmethod
+    def make_key(text: str, language: str, engine: str, voice: Optional[str], model_version: str) -> str:
+        raw = "\x1f".join([text, language, engine, voice or "", model_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def media_type(path: Path) -> str:
+        return MEDIA_TYPES.get(path.suffix, "application/octet-stream")
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached file for key and mark it recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry[0].exists():
+                if entry is not None:
+                    self._drop(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            path = entry[0]
+        try:
+            os.utime(path)  # keeps LRU order across restarts
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, src_path: str) -> Path:
+        """Move a freshly synthesized file into the cache and return its cached path."""
+        suffix = Path(src_path).suffix
+        path = self.cache_dir / key[:2] / f"{key}{suffix}"
+        path.parent.mkdir(exist_ok=True)
+        # The source usually sits in the system temp dir, possibly on another
+        # filesystem: copy it next to the target first, then rename atomically
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.move(src_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        size = path.stat().st_size
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+            self._evict(keep=key)
+        return path
+
+    def _drop(self, key: str):
+        _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict(self, keep: str):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            path, _ = self._entries[key]
+            self._drop(key)
+            self._stats["evictions"] += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0,
+                "entries": len(self._entries),
+                "size_mb": round(self._total_bytes / 2**20, 1),
+                "max_size_mb": round(self.max_bytes / 2**20, 1),
+            }
@@ -1,18 +1,29 @@
 import os
+import struct
+import importlib.util
 import tempfile
 import logging
-from typing import Optional, Dict, Any
+from io import BytesIO
+from typing import Optional, Dict, Any, Iterator, Tuple
 from pathlib import Path
 
+from utils.text import split_sentences
+from services.voice_profiles import VoiceProfileStore
+
 logger = logging.getLogger(__name__)
 
 class TTSService:
     """Advanced TTS service supporting multiple engines."""
     
-    def __init__(self):
+    def __init__(self, residency=None, voices_dir: str = "./models_cache/voices"):
         self.gtts_available = False
         self.coqui_available = False
-        self.coqui_model = None
+        self.coqui_model_name = None
+        # Optional ModelResidencyManager; without one the Coqui model stays loaded
+        self.residency = residency
+        self._coqui_model = None
+        # Registered XTTS voices with precomputed speaker latents
+        self.voices = VoiceProfileStore(voices_dir)
         
         # Initialize available TTS engines
         self._initialize_gtts()
@@ -28,27 +39,52 @@ class TTSService:
             logger.warning("Google TTS not available")
     
     def _initialize_coqui(self):
-        """Initialize Coqui TTS."""
-        try:
-            from TTS.api import TTS
+        """Initialize Coqui TTS. The model itself is loaded lazily by load_coqui_model()."""
+        # Only check that the package is installed: importing it pulls in torch
+        if importlib.util.find_spec("TTS") is not None:
             self.coqui_available = True
-            
-            # Load a multilingual model that supports multiple languages
-            try:
-                self.coqui_model = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
-                logger.info("Coqui TTS multilingual model loaded successfully")
-            except Exception as e:
-                logger.warning(f"Could not load Coqui multilingual model: {e}")
-                # Fallback to English model
-                try:
-                    self.coqui_model = TTS("tts_models/en/ljspeech/tacotron2-DDC")
-                    logger.info("Coqui TTS English model loaded successfully")
-                except Exception as e2:
-                    logger.warning(f"Could not load Coqui English model: {e2}")
-                    self.coqui_available = False
-                    
-        except ImportError:
+        else:
             logger.warning("Coqui TTS not available")
+
+    def load_coqui_model(self):
+        """Load the Coqui model, preferring the multilingual XTTS model."""
+        if not self.coqui_available:
+            return None
+        if self.coqui_model_name is not None:
+            return self._load_coqui_model(self.coqui_model_name)
+
+        # Load a multilingual model that supports multiple languages
+        try:
+            model = self._load_coqui_model("tts_models/multilingual/multi-dataset/xtts_v2")
+            logger.info("Coqui TTS multilingual model loaded successfully")
+            return model
+        except Exception as e:
+            logger.warning(f"Could not load Coqui multilingual model: {e}")
+            # Fallback to English model
+            try:
+                model = self._load_coqui_model("tts_models/en/ljspeech/tacotron2-DDC")
+                logger.info("Coqui TTS English model loaded successfully")
+                return model
+            except Exception as e2:
+                logger.warning(f"Could not load Coqui English model: {e2}")
+                self.coqui_available = False
+                return None
+
+    def _load_coqui_model(self, model_name: str):
+        """Load a Coqui model, registering it with the residency manager if there is one."""
+        from TTS.api import TTS
+        if self.residency is not None:
+            model = self.residency.load(f"tts:{model_name}", lambda: TTS(model_name))
+        else:
+            model = self._coqui_model or TTS(model_name)
+            self._coqui_model = model
+        self.coqui_model_name = model_name
+        return model
+
+    @property
+    def coqui_model(self):
+        """The Coqui model, (re)loaded on demand if it is not in memory."""
+        return self.load_coqui_model()
     
     def get_supported_languages(self) -> Dict[str, Any]:
         """Get supported languages for each TTS engine."""
@@ -77,29 +113,49 @@ class TTSService:
         Returns:
             Path to generated audio file
         """
+        engine = self.resolve_engine(language, engine)
+        if engine == "gtts":
+            return self._synthesize_gtts(text, language)
+        return self._synthesize_coqui(text, language, voice)
+
+    def resolve_engine(self, language: str, engine: str = "auto") -> str:
+        """Return the concrete engine ("gtts" or "coqui") that synthesize_speech would use."""
         if engine == "auto":
             # Choose best available engine for the language
             if language in ["ha", "yo", "ig"] and self.gtts_available:
-                engine = "gtts"
+                return "gtts"
             elif self.coqui_available:
-                engine = "coqui"
+                return "coqui"
             elif self.gtts_available:
-                engine = "gtts"
+                return "gtts"
             else:
                 raise RuntimeError("No TTS engine available")
-        
-        if engine == "gtts":
-            return self._synthesize_gtts(text, language)
-        elif engine == "coqui":
-            return self._synthesize_coqui(text, language, voice)
-        else:
+        if engine not in ("gtts", "coqui"):
             raise ValueError(f"Unknown TTS engine: {engine}")
+        return engine
+
+    def get_model_version(self, engine: str, voice: Optional[str] = None) -> str:
+        """
+        Identify the model (and voice profile) behind an engine, so cached
+        audio changes when they do. For Coqui this loads the model if needed:
+        which model it is only becomes known once the fallbacks have run.
+        """
+        if engine == "coqui":
+            if self.coqui_model_name is None:
+                self.load_coqui_model()
+            version = self.coqui_model_name or "coqui-unavailable"
+            metadata = self.voices.get_metadata(voice) if self.voices.exists(voice) else None
+            if metadata is not None:
+                version += f"+voice@{metadata['created_at']}"
+            return version
+        return engine
     
     def _synthesize_gtts(self, text: str, language: str) -> str:
         """Synthesize speech using Google TTS."""
         if not self.gtts_available:
             raise RuntimeError("Google TTS not available")
         
+        tmp_path = None
         try:
             from gtts import gTTS
             
@@ -116,22 +172,30 @@ class TTSService:
             
         except Exception as e:
             logger.error(f"Error generating speech with Google TTS: {e}")
+            self._remove_tmp(tmp_path)
             raise
     
     def _synthesize_coqui(self, text: str, language: str, voice: Optional[str] = None) -> str:
         """Synthesize speech using Coqui TTS."""
-        if not self.coqui_available or self.coqui_model is None:
+        coqui_model = self.coqui_model
+        if not self.coqui_available or coqui_model is None:
             raise RuntimeError("Coqui TTS not available")
         
+        tmp_path = None
         try:
             # Create temporary file
             tmp_fd, tmp_path = tempfile.mkstemp(suffix=".wav")
             os.close(tmp_fd)
             
             # Generate speech
-            if hasattr(self.coqui_model, 'tts_to_file'):
+            if self.voices.exists(voice):
+                # Registered voice: reuse its stored conditioning latents
+                import soundfile as sf
+                wav, sample_rate = self._coqui_waveform(coqui_model, text, language, voice)
+                sf.write(tmp_path, wav, sample_rate)
+            elif hasattr(coqui_model, 'tts_to_file'):
                 # For XTTS models
-                self.coqui_model.tts_to_file(
+                coqui_model.tts_to_file(
                     text=text,
                     file_path=tmp_path,
                     language=language,
@@ -139,7 +203,7 @@ class TTSService:
                 )
             else:
                 # For other models
-                wav = self.coqui_model.tts(text)
+                wav = coqui_model.tts(text)
                 import numpy as np
                 import soundfile as sf
                 sf.write(tmp_path, wav, 22050)
@@ -149,8 +213,92 @@ class TTSService:
             
         except Exception as e:
             logger.error(f"Error generating speech with Coqui TTS: {e}")
+            self._remove_tmp(tmp_path)
             raise
+
+    @staticmethod
+    def _remove_tmp(path: Optional[str]):
+        if path and os.path.exists(path):
+            os.remove(path)
     
+    def stream_media_type(self, engine: str) -> str:
+        """Media type of the audio produced by iter_speech for a resolved engine."""
+        return "audio/mpeg" if engine == "gtts" else "audio/wav"
+
+    def iter_speech(self, text: str, language: str = "en", engine: str = "auto", voice: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Synthesize text one sentence at a time, yielding encoded audio as soon
+        as each sentence is ready. gTTS yields MP3 frames, which play back
+        when concatenated; Coqui yields a WAV header of unknown length followed
+        by 16-bit PCM.
+        """
+        engine = self.resolve_engine(language, engine)
+        sentences = split_sentences(text, language=language)
+        if engine == "gtts":
+            if not self.gtts_available:
+                raise RuntimeError("Google TTS not available")
+            from gtts import gTTS
+            for sentence in sentences:
+                buffer = BytesIO()
+                gTTS(text=sentence, lang=language, slow=False).write_to_fp(buffer)
+                yield buffer.getvalue()
+            return
+
+        coqui_model = self.coqui_model
+        if not self.coqui_available or coqui_model is None:
+            raise RuntimeError("Coqui TTS not available")
+        for i, sentence in enumerate(sentences):
+            pcm, sample_rate = self._coqui_pcm(coqui_model, sentence, language, voice)
+            yield (_wav_stream_header(sample_rate) + pcm) if i == 0 else pcm
+
+    def _coqui_pcm(self, coqui_model, text: str, language: str, voice: Optional[str] = None) -> Tuple[bytes, int]:
+        """Synthesize one sentence in-process and return (16-bit PCM bytes, sample rate)."""
+        import numpy as np
+
+        wav, sample_rate = self._coqui_waveform(coqui_model, text, language, voice)
+        return (np.clip(wav, -1.0, 1.0) * 32767).astype("<i2").tobytes(), sample_rate
+
+    def _coqui_waveform(self, coqui_model, text: str, language: str, voice: Optional[str] = None):
+        """Synthesize text in-process and return (float32 samples, sample rate)."""
+        import numpy as np
+
+        if self.voices.exists(voice):
+            tts_model = self._xtts_model(coqui_model)
+            metadata = self.voices.get_metadata(voice) or {}
+            if metadata.get("model") != self.coqui_model_name:
+                raise RuntimeError(f"Voice '{voice}' was registered with {metadata.get('model')}; register it again")
+            gpt_cond_latent, speaker_embedding = self.voices.get_latents(voice)
+            wav = tts_model.inference(text, language, gpt_cond_latent, speaker_embedding)["wav"]
+            if hasattr(wav, "cpu"):
+                wav = wav.cpu().numpy()
+            audio_config = getattr(getattr(tts_model, "config", None), "audio", None)
+            sample_rate = getattr(audio_config, "output_sample_rate", None) or 24000
+            return np.asarray(wav, dtype=np.float32), sample_rate
+
+        kwargs = {}
+        if getattr(coqui_model, "is_multi_lingual", False):
+            kwargs["language"] = language
+        if voice:
+            kwargs["speaker_wav"] = voice
+        wav = np.asarray(coqui_model.tts(text=text, **kwargs), dtype=np.float32)
+        synthesizer = getattr(coqui_model, "synthesizer", None)
+        sample_rate = getattr(synthesizer, "output_sample_rate", None) or 22050
+        return wav, sample_rate
+
+    @staticmethod
+    def _xtts_model(coqui_model):
+        tts_model = getattr(getattr(coqui_model, "synthesizer", None), "tts_model", None)
+        if tts_model is None or not hasattr(tts_model, "get_conditioning_latents"):
+            raise RuntimeError("Voice profiles need the XTTS model")
+        return tts_model
+
+    def register_voice(self, voice_id: str, reference_path: str) -> Dict[str, Any]:
+        """Register a named voice from a reference recording (XTTS only)."""
+        coqui_model = self.coqui_model
+        if not self.coqui_available or coqui_model is None:
+            raise RuntimeError("Coqui TTS not available")
+        return self.voices.register(voice_id, reference_path, self._xtts_model(coqui_model), self.coqui_model_name)
+
     def get_available_voices(self) -> Dict[str, Any]:
         """Get available voices for each TTS engine."""
         voices = {
@@ -160,7 +308,8 @@ class TTSService:
             },
             "coqui": {
                 "available": self.coqui_available,
-                "voices": ["default", "female", "male"] if self.coqui_available else []
+                "voices": ["default", "female", "male"] if self.coqui_available else [],
+                "profiles": [voice["voice_id"] for voice in self.voices.list()]
             }
         }
         return voices
@@ -168,3 +317,10 @@ class TTSService:
     def is_available(self) -> bool:
         """Check if any TTS engine is available."""
         return self.gtts_available or self.coqui_available
+
+def _wav_stream_header(sample_rate: int, channels: int = 1, bits: int = 16) -> bytes:
+    """RIFF header for 16-bit PCM whose length is not known yet (sizes set to the maximum)."""
+    block_align = channels * bits // 8
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
@@ -0,0 +1,99 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VOICE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+class VoiceProfileStore:
+    """
+    Named XTTS voices. The speaker conditioning latents are computed once from
+    the reference audio when a voice is registered and saved to disk, so
+    synthesis does not have to re-encode the reference clip on every request.
+
+    Each voice is stored as {voice_id}.pt (latents) and {voice_id}.json (metadata).
+    """
+
+    def __init__(self, voices_dir: str = "./models_cache/voices"):
+        self.voices_dir = Path(voices_dir)
+        self.voices_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._latents: Dict[str, Tuple[Any, Any]] = {}  # loaded lazily
+
+    def _meta_path(self, voice_id: str) -> Path:
+        return self.voices_dir / f"{voice_id}.json"
+
+    def _latents_path(self, voice_id: str) -> Path:
+        return self.voices_dir / f"{voice_id}.pt"
+
+    def exists(self, voice_id: Optional[str]) -> bool:
+        return bool(voice_id) and VOICE_ID_PATTERN.fullmatch(voice_id) is not None and self._meta_path(voice_id).exists()
+
+    def get_metadata(self, voice_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(voice_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def register(self, voice_id: str, reference_path: str, tts_model, model_name: str) -> Dict[str, Any]:
+        """Compute conditioning latents for a reference clip with an XTTS model and persist them."""
+        import torch
+
+        if not VOICE_ID_PATTERN.fullmatch(voice_id):
+            raise ValueError("Voice id may only contain letters, digits, '-' and '_' (max 64 characters)")
+
+        started = time.time()
+        gpt_cond_latent, speaker_embedding = tts_model.get_conditioning_latents(audio_path=[reference_path])
+        metadata = {
+            "voice_id": voice_id,
+            "model": model_name,
+            "created_at": time.time(),
+            "compute_seconds": round(time.time() - started, 2),
+        }
+        with self._lock:
+            torch.save({"gpt_cond_latent": gpt_cond_latent.cpu(), "speaker_embedding": speaker_embedding.cpu()},
+                       self._latents_path(voice_id))
+            with open(self._meta_path(voice_id), 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+            self._latents[voice_id] = (gpt_cond_latent, speaker_embedding)
+        logger.info(f"Registered voice '{voice_id}' in {metadata['compute_seconds']}s")
+        return metadata
+
+    def get_latents(self, voice_id: str) -> Tuple[Any, Any]:
+        """Return (gpt_cond_latent, speaker_embedding) for a registered voice."""
+        with self._lock:
+            if voice_id in self._latents:
+                return self._latents[voice_id]
+            if not self.exists(voice_id):
+                raise ValueError(f"Unknown voice: {voice_id}")
+            import torch
+            data = torch.load(self._latents_path(voice_id), map_location="cpu")
+            latents = (data["gpt_cond_latent"], data["speaker_embedding"])
+            self._latents[voice_id] = latents
+            return latents
+
+    def list(self) -> List[Dict[str, Any]]:
+        voices = []
+        for meta_path in sorted(self.voices_dir.glob("*.json")):
+            metadata = self.get_metadata(meta_path.stem)
+            if metadata is not None:
+                voices.append(metadata)
+        return voices
+
+    def delete(self, voice_id: str) -> bool:
+        if not self.exists(voice_id):
+            return False
+        with self._lock:
+            self._latents.pop(voice_id, None)
+            for path in (self._meta_path(voice_id), self._latents_path(voice_id)):
+                if path.exists():
+                    os.remove(path)
+        logger.info(f"Deleted voice '{voice_id}'")
+        return True
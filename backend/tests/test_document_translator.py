@@ -0,0 +1,79 @@
+from services.document_translator import DocumentTranslator
+
+
+class UpperEngine:
+    version = "v1"
+
+    class tokenizer:
+        @staticmethod
+        def tokenize(text):
+            return text.split()
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def translate_batch(self, batch):
+        self.calls.append(list(batch))
+        return [sentence.upper() for sentence in batch]
+
+
+class FakeHandler:
+    def __init__(self):
+        self.calls = []
+
+    def normalize_lang_code(self, code):
+        return code
+
+    def get_translation_model_version(self, src, tgt):
+        return "v1"
+
+    def get_translation_engine(self, src, tgt):
+        return UpperEngine(self.calls)
+
+
+def test_document_keeps_line_breaks_and_indentation():
+    handler = FakeHandler()
+    text = "Title\n\n  - First item.  Second part.\n  - Second item\nLast line"
+    result = DocumentTranslator(handler).translate(text, "en", "ha")
+
+    assert result["translated_text"] == "TITLE\n\n  - FIRST ITEM. SECOND PART.\n  - SECOND ITEM\nLAST LINE"
+    assert result["paragraphs"] == 2
+    assert result["sentences"] == 5
+
+
+def test_repeated_sentences_are_translated_once_in_length_sorted_batches():
+    handler = FakeHandler()
+    translator = DocumentTranslator(handler, max_batch_size=2)
+    text = "Hello there. A much longer sentence with many words. Hello there. Hi."
+
+    result = translator.translate(text, "en", "ha")
+
+    assert result["unique_sentences"] == 3
+    translated = [sentence for batch in handler.calls for sentence in batch]
+    assert sorted(translated) == sorted(["Hello there.", "A much longer sentence with many words.", "Hi."])
+    assert translated[0] == "Hi."
+    assert all(len(batch) <= 2 for batch in handler.calls)
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, src, tgt, text, version):
+        return self.entries.get((text, version))
+
+    def put(self, src, tgt, text, version, translated):
+        self.entries[(text, version)] = translated
+
+
+def test_cached_sentences_are_not_translated_again():
+    handler = FakeHandler()
+    cache = DictCache()
+    translator = DocumentTranslator(handler, cache=cache)
+    translator.translate("One. Two.", "en", "ha")
+    handler.calls.clear()
+
+    result = translator.translate("One. Two. Three.", "en", "ha")
+
+    assert handler.calls == [["Three."]]
+    assert result["cached_sentences"] == 2
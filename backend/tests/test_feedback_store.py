@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from services.feedback_store import FeedbackStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.sqlite3"), recent_size=3)
+    yield store
+    store._conn.close()
+
+
+def rating(value, src="en", tgt="ha", timestamp="2024-01-01T00:00:00"):
+    return {"timestamp": timestamp, "input_text": "hi", "translated_text": "sannu",
+            "source_lang": src, "target_lang": tgt, "user_rating": value}
+
+
+def test_aggregates_track_counts_averages_and_histograms_per_pair(store):
+    for value, tgt in [(5, "ha"), (3, "ha"), (4, "yo"), (None, "yo")]:
+        store.add("translation", rating(value, tgt=tgt))
+
+    aggregates = store.get_aggregates("translation")
+
+    assert aggregates["*"]["count"] == 4
+    assert aggregates["*"]["rated"] == 3
+    assert aggregates["*"]["average_rating"] == 4
+    assert aggregates["en-ha"]["average_rating"] == 4
+    assert aggregates["en-ha"]["rating_histogram"]["5"] == 1
+    assert aggregates["en-yo"] == {"count": 2, "rated": 1, "average_rating": 4,
+                                   "rating_histogram": {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0}}
+
+
+def test_recent_ring_keeps_only_the_newest_entries(store):
+    ids = [store.add("translation", rating(r)) for r in (1, 2, 3, 4, 5)]
+
+    recent = store.recent("translation", limit=10)
+
+    assert [entry["id"] for entry in recent] == ids[::-1][:3]
+
+
+def test_query_filters_by_pair_rating_and_time(store):
+    store.add("translation", rating(5, timestamp="2024-01-01T00:00:00"))
+    store.add("translation", rating(2, timestamp="2024-02-01T00:00:00"))
+    store.add("translation", rating(4, tgt="yo", timestamp="2024-03-01T00:00:00"))
+
+    assert [e["user_rating"] for e in store.query("translation", target_lang="ha", min_rating=3)] == [5]
+    assert store.count("translation", since="2024-01-15") == 2
+    assert [e["user_rating"] for e in store.iter_entries("translation", batch_size=1)] == [5, 2, 4]
+
+
+def test_rebuilt_aggregates_match_incremental_ones(store):
+    for value in (1, 4, 5):
+        store.add("translation", rating(value))
+    incremental = store.get_aggregates("translation")
+
+    store._rebuild_aggregates("translation")
+
+    assert store.get_aggregates("translation") == incremental
+
+
+def test_json_migration_imports_once_and_renames_the_file(store, tmp_path):
+    legacy = tmp_path / "translation_feedback.json"
+    legacy.write_text(json.dumps([rating(5), rating(1)]), encoding="utf-8")
+
+    assert store.migrate_json("translation", legacy) == 2
+    assert not legacy.exists()
+    assert (tmp_path / "translation_feedback.json.migrated").exists()
+    assert store.get_aggregates("translation")["*"]["count"] == 2
+
+
+def test_json_migration_interrupted_before_the_rename_is_not_imported_twice(store, tmp_path, monkeypatch):
+    legacy = tmp_path / "translation_feedback.json"
+    legacy.write_text(json.dumps([rating(5)]), encoding="utf-8")
+
+    def crash(*args):
+        raise OSError("crash before rename")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("services.feedback_store.os.replace", crash)
+        with pytest.raises(OSError):
+            store.migrate_json("translation", legacy)
+
+    assert store.migrate_json("translation", legacy) == 0
+    assert store.count("translation") == 1
+    assert not legacy.exists()
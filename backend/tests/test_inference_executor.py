@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from services.inference_executor import InferenceExecutor
+
+
+def test_runs_work_off_the_event_loop():
+    executor = InferenceExecutor({"stt": 1})
+    try:
+        result = asyncio.run(executor.run("stt", threading.current_thread))
+        assert result is not threading.main_thread()
+    finally:
+        executor.shutdown()
+
+
+def test_full_queue_is_refused_with_503_and_retry_after():
+    executor = InferenceExecutor({"stt": 1}, max_queue=1, retry_after=7)
+    release = threading.Event()
+
+    async def scenario():
+        # One running and one queued fill the capacity of workers + max_queue
+        running = [asyncio.ensure_future(executor.run("stt", release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as excinfo:
+            await executor.run("stt", release.wait)
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers["Retry-After"] == "7"
+        # Other kinds are not affected
+        assert await executor.run("tts", lambda: "ok") == "ok"
+        release.set()
+        await asyncio.gather(*running)
+
+    try:
+        asyncio.run(scenario())
+        assert executor.get_stats()["stt"]["pending"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_cancelled_request_keeps_its_slot_until_the_work_finishes():
+    executor = InferenceExecutor({"stt": 1}, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        task = asyncio.ensure_future(executor.run("stt", release.wait))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        assert executor.get_stats()["stt"]["pending"] == 1
+        with pytest.raises(HTTPException):
+            await executor.run("stt", release.wait)
+
+    try:
+        asyncio.run(scenario())
+        release.set()
+        executor._pools["stt"].submit(lambda: None).result()
+        assert executor.get_stats()["stt"]["pending"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_blocking_call_waits_instead_of_refusing():
+    executor = InferenceExecutor({"media": 1}, max_queue=0)
+    release = threading.Event()
+    try:
+        first = executor._submit("media", release.wait, (), {}, refuse_when_full=True)
+        threading.Timer(0.1, release.set).start()
+        assert executor.call("media", lambda: "done") == "done"
+        assert first.result() is True
+    finally:
+        release.set()
+        executor.shutdown()
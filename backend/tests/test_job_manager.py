@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from services.job_manager import JobManager
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    manager = JobManager(str(tmp_path / "jobs"), max_workers=2, max_jobs_per_key=2, ttl_seconds=60)
+    yield manager
+    manager.shutdown()
+
+
+def wait_for(jobs, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_in_its_directory_and_reports_progress(jobs):
+    def work(job_dir, report, name):
+        (job_dir / name).write_text("data")
+        report(1, 2, "halfway")
+        return {"file": name}
+
+    job = jobs.create("key", "test")
+    jobs.submit(job["job_id"], work, "out.txt")
+    finished = wait_for(jobs, job["job_id"])
+
+    assert finished["status"] == "succeeded"
+    assert finished["result"] == {"file": "out.txt"}
+    assert finished["stage"] == "halfway"
+    assert finished["progress"] == 1.0
+    assert "owner" not in finished
+    assert jobs.file_path(job["job_id"], "out.txt").read_text() == "data"
+
+
+def test_failures_are_recorded(jobs):
+    def work(job_dir, report):
+        raise HTTPException(413, "too long")
+
+    job = jobs.create("key", "test")
+    jobs.submit(job["job_id"], work)
+
+    assert wait_for(jobs, job["job_id"])["error"] == "too long"
+
+
+def test_active_jobs_per_key_are_limited(jobs):
+    release = threading.Event()
+    first = jobs.create("key", "test")
+    jobs.create("key", "test")
+
+    with pytest.raises(HTTPException) as excinfo:
+        jobs.create("key", "test")
+    assert excinfo.value.status_code == 429
+    jobs.create("other-key", "test")
+
+    jobs.submit(first["job_id"], lambda job_dir, report: release.wait(5) and {})
+    release.set()
+    wait_for(jobs, first["job_id"])
+    jobs.create("key", "test")
+
+
+def test_ownership_is_checked_by_key(jobs):
+    job = jobs.create("secret", "test")
+
+    assert jobs.is_owner(job["job_id"], "secret")
+    assert not jobs.is_owner(job["job_id"], "other")
+
+
+def test_file_path_refuses_traversal_and_the_job_record(jobs, tmp_path):
+    job = jobs.create("key", "test")
+    (tmp_path / "outside.txt").write_text("secret")
+
+    assert jobs.file_path(job["job_id"], "../../outside.txt") is None
+    assert jobs.file_path(job["job_id"], "job.json") is None
+    assert jobs.file_path(job["job_id"], "missing.txt") is None
+    assert jobs.file_path("unknown", "out.txt") is None
+
+
+def test_unfinished_jobs_cannot_be_deleted(jobs):
+    job = jobs.create("key", "test")
+
+    with pytest.raises(HTTPException) as excinfo:
+        jobs.delete(job["job_id"])
+    assert excinfo.value.status_code == 409
+
+
+def test_finished_jobs_expire_with_their_files(jobs):
+    job = jobs.create("key", "test")
+    jobs.submit(job["job_id"], lambda job_dir, report: {})
+    finished = wait_for(jobs, job["job_id"])
+    assert finished["expires_at"] == pytest.approx(finished["finished_at"] + 60)
+
+    assert jobs.sweep() == 0
+    jobs._jobs[job["job_id"]]["finished_at"] -= 120
+    assert jobs.sweep() == 1
+
+    assert jobs.get(job["job_id"]) is None
+    assert not job["dir"].exists()
+
+
+def test_finished_jobs_survive_a_restart_and_interrupted_ones_fail(tmp_path):
+    first = JobManager(str(tmp_path / "jobs"))
+    done = first.create("key", "test")
+    first.submit(done["job_id"], lambda job_dir, report: {"ok": True})
+    wait_for(first, done["job_id"])
+    interrupted = first.create("key", "test")
+    first.shutdown()
+
+    second = JobManager(str(tmp_path / "jobs"))
+    try:
+        assert second.get(done["job_id"])["result"] == {"ok": True}
+        assert second.get(interrupted["job_id"])["error"] == "Interrupted by a server restart"
+    finally:
+        second.shutdown()
@@ -0,0 +1,43 @@
+import numpy as np
+
+from services.long_audio import split_on_silence
+from utils.audio_ingest import SAMPLE_RATE
+
+
+def tone(seconds, amplitude=0.5):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_short_audio_is_one_chunk():
+    audio = tone(5)
+    assert split_on_silence(audio, max_chunk_s=30) == [(0, len(audio))]
+
+
+def test_empty_audio_has_no_chunks():
+    assert split_on_silence(np.zeros(0, dtype=np.float32)) == []
+
+
+def test_cuts_fall_in_the_pause_before_the_limit():
+    # Speech 0-8 s, a pause at 8-9 s, speech until 15 s
+    audio = np.concatenate([tone(8), silence(1), tone(6)])
+    chunks = split_on_silence(audio, max_chunk_s=10, search_window_s=4)
+
+    first_end = chunks[0][1] / SAMPLE_RATE
+    assert 8 <= first_end <= 9
+    assert chunks[-1][1] == len(audio)
+
+
+def test_chunks_cover_the_audio_without_gaps_and_respect_the_limit():
+    audio = np.concatenate([tone(7), silence(0.5)] * 10)
+    chunks = split_on_silence(audio, max_chunk_s=12, search_window_s=5)
+
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+    assert all(end - start <= 12 * SAMPLE_RATE for start, end in chunks)
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from services.model_registry import ModelRegistry
+
+SLOT = "translation:en-ha"
+
+
+class Preparer:
+    def __init__(self):
+        self.prepared = []
+        self.fail = set()
+
+    def __call__(self, slot, checkpoint):
+        if checkpoint in self.fail:
+            raise RuntimeError("broken checkpoint")
+        self.prepared.append((slot, checkpoint))
+
+
+@pytest.fixture
+def prepare():
+    return Preparer()
+
+
+@pytest.fixture
+def registry(tmp_path, prepare):
+    return ModelRegistry(str(tmp_path / "registry"), prepare, keep_versions=2)
+
+
+def checkpoint(tmp_path, name):
+    path = tmp_path / name
+    path.mkdir()
+    (path / "config.json").write_text("{}")
+    return str(path)
+
+
+def wait_until_idle(registry, slot=SLOT, timeout=5):
+    deadline = time.time() + timeout
+    while registry.get_status()[slot]["activating"] is not None:
+        if time.time() > deadline:
+            raise AssertionError("activation did not finish")
+        time.sleep(0.01)
+
+
+def test_slots_are_validated():
+    assert ModelRegistry.validate_slot("whisper") == "whisper"
+    with pytest.raises(ValueError):
+        ModelRegistry.validate_slot("translation:english")
+
+
+def test_registered_checkpoints_are_copied_and_go_live_once_prepared(registry, prepare, tmp_path):
+    source = checkpoint(tmp_path, "model")
+    record = registry.register(SLOT, source, metadata={"job": "1"})
+
+    assert record["version"] == "v1"
+    assert record["checkpoint"] != source
+    assert registry.active_checkpoint(SLOT) is None
+
+    registry.activate(SLOT, "v1")
+    wait_until_idle(registry)
+
+    assert registry.active_checkpoint(SLOT) == record["checkpoint"]
+    assert prepare.prepared == [(SLOT, record["checkpoint"])]
+
+
+def test_failed_activation_keeps_the_current_version(registry, prepare, tmp_path):
+    good = registry.register(SLOT, checkpoint(tmp_path, "good"))
+    bad = registry.register(SLOT, checkpoint(tmp_path, "bad"))
+    registry.activate(SLOT, good["version"])
+    wait_until_idle(registry)
+    prepare.fail.add(bad["checkpoint"])
+
+    registry.activate(SLOT, bad["version"])
+    wait_until_idle(registry)
+
+    assert registry.active_checkpoint(SLOT) == good["checkpoint"]
+    versions = {record["version"]: record for record in registry.get_status()[SLOT]["versions"]}
+    assert versions[bad["version"]]["state"] == "failed"
+
+
+def test_concurrent_activation_of_a_slot_is_refused(tmp_path):
+    release = threading.Event()
+    registry = ModelRegistry(str(tmp_path / "registry"), lambda slot, path: release.wait(5))
+    first = registry.register(SLOT, checkpoint(tmp_path, "a"))
+    second = registry.register(SLOT, checkpoint(tmp_path, "b"))
+
+    registry.activate(SLOT, first["version"])
+    with pytest.raises(RuntimeError):
+        registry.activate(SLOT, second["version"])
+    release.set()
+    wait_until_idle(registry)
+
+
+def test_rollback_swaps_back_and_can_return_to_the_default(registry, tmp_path):
+    first = registry.register(SLOT, checkpoint(tmp_path, "a"))
+    second = registry.register(SLOT, checkpoint(tmp_path, "b"))
+    for record in (first, second):
+        registry.activate(SLOT, record["version"])
+        wait_until_idle(registry)
+
+    assert registry.rollback(SLOT)["version"] == first["version"]
+    assert registry.active_checkpoint(SLOT) == first["checkpoint"]
+    assert registry.rollback(SLOT)["version"] == second["version"]
+
+    single = ModelRegistry(str(tmp_path / "single"), lambda slot, path: None)
+    only = single.register(SLOT, checkpoint(tmp_path, "c"))
+    single.activate(SLOT, only["version"])
+    wait_until_idle(single)
+    assert single.rollback(SLOT)["state"] == "default"
+    assert single.active_checkpoint(SLOT) is None
+
+
+def test_rollback_without_history_is_refused(registry):
+    with pytest.raises(ValueError):
+        registry.rollback(SLOT)
+
+
+def test_old_inactive_versions_are_pruned(registry, tmp_path):
+    records = [registry.register(SLOT, checkpoint(tmp_path, f"m{i}")) for i in range(4)]
+    for record in records[2:]:
+        registry.activate(SLOT, record["version"])
+        wait_until_idle(registry)
+
+    versions = [record["version"] for record in registry.get_status()[SLOT]["versions"]]
+    assert versions == ["v3", "v4"]
+    assert registry.retained_checkpoints() == {records[2]["checkpoint"], records[3]["checkpoint"]}
+
+
+def test_state_survives_a_restart(registry, prepare, tmp_path):
+    record = registry.register(SLOT, checkpoint(tmp_path, "a"))
+    registry.activate(SLOT, record["version"])
+    wait_until_idle(registry)
+
+    reloaded = ModelRegistry(str(tmp_path / "registry"), prepare)
+
+    assert reloaded.active_checkpoint(SLOT) == record["checkpoint"]
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from services.model_residency import ModelResidencyManager, measure_model_size
+
+MIB = 2**20
+
+
+class FakeTensor:
+    def __init__(self, size_bytes):
+        self.size_bytes = size_bytes
+
+    def numel(self):
+        return self.size_bytes
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    """Looks like a torch module to measure_model_size."""
+
+    def __init__(self, size_bytes):
+        self._params = [FakeTensor(size_bytes)]
+
+    def parameters(self):
+        return iter(self._params)
+
+    def buffers(self):
+        return iter([])
+
+
+def test_measure_model_size_sums_tuples():
+    assert measure_model_size((FakeModel(3), FakeModel(4))) == 7
+    assert measure_model_size("tokenizer") == 0
+
+
+def test_least_recently_used_model_is_evicted_to_fit_the_budget():
+    residency = ModelResidencyManager(budget_bytes=10 * MIB)
+    residency.load("a", lambda: FakeModel(4 * MIB))
+    residency.load("b", lambda: FakeModel(4 * MIB))
+    residency.get("a")  # "b" is now the least recently used
+
+    residency.load("c", lambda: FakeModel(4 * MIB))
+
+    assert residency.get("a") is not None
+    assert residency.get("b") is None
+    assert residency.get("c") is not None
+    stats = residency.get_stats()
+    assert stats["history"]["b"] == {"loads": 1, "evictions": 1}
+    assert stats["used_mb"] == 8
+
+
+def test_evicted_model_is_reloaded_on_demand():
+    residency = ModelResidencyManager(budget_bytes=10 * MIB)
+    residency.load("a", lambda: FakeModel(MIB))
+    assert residency.evict("a")
+    assert not residency.evict("a")
+
+    residency.load("a", lambda: FakeModel(MIB))
+
+    assert residency.get_stats()["history"]["a"] == {"loads": 2, "evictions": 1}
+
+
+def test_concurrent_loads_of_one_model_run_the_loader_once():
+    residency = ModelResidencyManager(budget_bytes=10 * MIB)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return FakeModel(MIB)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(residency.load("m", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(model is results[0] for model in results)
@@ -0,0 +1,64 @@
+import json
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from utils.spreadsheet_ingest import extract_translation_pairs, find_pair_columns, iter_spreadsheet_pairs
+
+
+def test_find_pair_columns_skips_id_columns():
+    assert find_pair_columns(["id", "English", "Hausa"]) == (1, 2)
+    assert find_pair_columns(["source", "target"]) == (0, 1)
+    assert find_pair_columns(["id", "notes"]) == (None, None)
+
+
+def test_csv_is_read_in_chunks_and_cleaned(tmp_path):
+    path = tmp_path / "pairs.csv"
+    pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "english": ["hello ", "bye", None, "thanks", "  "],
+        "hausa": ["sannu", "sai anjima", "x", " na gode", "y"],
+    }).to_csv(path, index=False)
+
+    chunks = list(iter_spreadsheet_pairs(str(path), chunk_rows=2))
+
+    assert len(chunks) == 3
+    pairs = pd.concat(chunks, ignore_index=True)
+    assert pairs["source_text"].tolist() == ["hello", "bye", "thanks"]
+    assert pairs["target_text"].tolist() == ["sannu", "sai anjima", "na gode"]
+    assert pairs["row_number"].tolist() == [1, 2, 4]
+
+
+def test_excel_sheets_without_pair_columns_are_skipped(tmp_path):
+    path = tmp_path / "pairs.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"english": ["hi", "bye"], "yoruba": ["bawo", "o dabo"]}).to_excel(writer, sheet_name="yo", index=False)
+        pd.DataFrame({"id": [1], "notes": ["n"]}).to_excel(writer, sheet_name="notes", index=False)
+
+    result = extract_translation_pairs(str(path), chunk_rows=1)
+
+    assert result["count"] == 2
+    assert result["columns"]["target_text"] == ["bawo", "o dabo"]
+    assert result["columns"]["sheet_name"] == ["yo", "yo"]
+
+
+def test_pairs_can_be_written_to_a_jsonl_dataset(tmp_path):
+    path = tmp_path / "pairs.csv"
+    pd.DataFrame({"source": ["a", "b", "c"], "target": ["x", "y", "z"]}).to_csv(path, index=False)
+    output = tmp_path / "out" / "pairs.jsonl"
+
+    result = extract_translation_pairs(str(path), output_path=str(output), chunk_rows=2)
+
+    assert result == {"count": 3, "output_path": str(output)}
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [row["source_text"] for row in rows] == ["a", "b", "c"]
+
+
+def test_csv_without_pair_columns_is_a_client_error(tmp_path):
+    path = tmp_path / "bad.csv"
+    pd.DataFrame({"id": [1], "notes": ["n"]}).to_csv(path, index=False)
+
+    with pytest.raises(HTTPException) as excinfo:
+        extract_translation_pairs(str(path))
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,21 @@
+from utils.text import split_sentences
+
+
+def test_splits_on_terminal_punctuation_and_closing_quotes():
+    text = 'He said "Stop!" Then he left. Did she follow? Yes.'
+    assert split_sentences(text) == ['He said "Stop!"', "Then he left.", "Did she follow?", "Yes."]
+
+
+def test_abbreviations_and_initials_do_not_end_a_sentence():
+    assert split_sentences("Dr. Bello met J. Smith on Jan. 5. They talked.", language="en") == [
+        "Dr. Bello met J. Smith on Jan. 5.",
+        "They talked.",
+    ]
+    assert split_sentences("Alh. Musa ya zo. Ya tafi.", language="ha") == ["Alh. Musa ya zo.", "Ya tafi."]
+
+
+def test_long_sentences_are_split_at_clauses_then_words():
+    sentence = "first clause here, second clause here, " + "word " * 40
+    pieces = split_sentences(sentence, max_chars=40)
+    assert all(len(piece) <= 40 for piece in pieces)
+    assert " ".join(pieces).split() == sentence.split()
@@ -0,0 +1,56 @@
+import json
+
+from services.training_export import HashSet, PairDeduplicator, ShardedExportWriter, export_examples
+
+
+def example(source, target, tgt="ha"):
+    return {"source_text": source, "target_text": target, "source_lang": "en", "target_lang": tgt}
+
+
+def test_hash_set_membership_across_buffer_merges():
+    hashes = HashSet(buffer_size=4)
+    values = [2**64 - 1, 0, 17, 5, 99, 3, 2**63, 42, 7]
+    for value in values:
+        hashes.add(value)
+    hashes.add(17)
+
+    assert len(hashes) == len(values)
+    assert all(value in hashes for value in values)
+    assert 18 not in hashes
+
+
+def test_exact_and_near_duplicates_are_counted_separately():
+    deduplicator = PairDeduplicator()
+    results = [
+        deduplicator.is_duplicate(example("Good morning!", "Ina kwana")),
+        deduplicator.is_duplicate(example("Good morning!", "Ina kwana")),
+        deduplicator.is_duplicate(example("good  MORNING", "ina kwana.")),
+        deduplicator.is_duplicate(example("Good morning!", "Ina kwana", tgt="yo")),
+    ]
+
+    assert results == [False, True, True, False]
+    assert (deduplicator.exact_duplicates, deduplicator.near_duplicates) == (1, 1)
+
+
+def test_writer_splits_rows_into_shards_and_describes_them(tmp_path):
+    writer = ShardedExportWriter(str(tmp_path), shard_rows=2, parquet=False)
+    for i in range(5):
+        writer.write(example(f"s{i}", f"t{i}"))
+    manifest = json.loads(writer.close({"note": "x"}).read_text(encoding="utf-8"))
+
+    assert [shard["rows"] for shard in manifest["shards"]] == [2, 2, 1]
+    assert manifest["total_rows"] == 5
+    assert manifest["note"] == "x"
+    lines = (tmp_path / manifest["shards"][2]["jsonl"]).read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0])["source_text"] == "s4"
+
+
+def test_export_drops_duplicates_before_sharding(tmp_path):
+    examples = [example("a", "b"), example("A", "b"), example("c", "d"), example("a", "b")]
+
+    stats = export_examples(iter(examples), str(tmp_path), shard_rows=1)
+
+    assert stats["examples_seen"] == 4
+    assert stats["rows"] == 2
+    assert stats["shards"] == 2
+    assert (stats["exact_duplicates"], stats["near_duplicates"]) == (1, 1)
@@ -0,0 +1,119 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.translation_batcher import TranslationBatcher
+
+
+class RecordingEngine:
+    def __init__(self, handler):
+        self.handler = handler
+
+    def translate_batch(self, texts):
+        self.handler.batches.append(list(texts))
+        outputs = [f"{self.handler.prefix}{text}" for text in texts]
+        return outputs[:-1] if self.handler.drop_last else outputs
+
+
+class FakeHandler:
+    def __init__(self, prefix="T:", version="v1"):
+        self.prefix = prefix
+        self.version = version
+        self.batches = []
+        self.drop_last = False
+
+    def normalize_lang_code(self, code):
+        return code.lower()
+
+    def get_translation_engine(self, src, tgt):
+        return RecordingEngine(self)
+
+    def get_translation_model_version(self, src, tgt):
+        return self.version
+
+
+def test_concurrent_requests_share_one_batch_and_get_their_own_results():
+    handler = FakeHandler()
+    batcher = TranslationBatcher(handler, max_batch_size=8, max_wait_ms=200)
+    texts = [f"text {i}" for i in range(8)]
+    start = threading.Barrier(len(texts))
+
+    def translate(text):
+        start.wait()
+        return batcher.translate(text, "en", "ha")
+
+    with ThreadPoolExecutor(len(texts)) as pool:
+        results = list(pool.map(translate, texts))
+
+    assert results == [f"T:{text}" for text in texts]
+    assert sum(len(batch) for batch in handler.batches) == len(texts)
+    assert len(handler.batches) < len(texts)
+
+
+def test_batches_are_capped_at_max_batch_size():
+    handler = FakeHandler()
+    batcher = TranslationBatcher(handler, max_batch_size=3, max_wait_ms=50)
+
+    results = batcher.translate_many([str(i) for i in range(7)], "en", "ha")
+
+    assert results == [f"T:{i}" for i in range(7)]
+    assert all(len(batch) <= 3 for batch in handler.batches)
+
+
+def test_language_pairs_are_batched_separately():
+    handler = FakeHandler()
+    batcher = TranslationBatcher(handler, max_batch_size=8, max_wait_ms=10)
+
+    batcher.translate_many(["a", "b"], "en", "ha")
+    batcher.translate_many(["c"], "en", "yo")
+
+    assert sorted(map(sorted, handler.batches)) == [["a", "b"], ["c"]]
+
+
+def test_short_engine_output_fails_every_caller():
+    handler = FakeHandler()
+    handler.drop_last = True
+    batcher = TranslationBatcher(handler, max_batch_size=4, max_wait_ms=50, result_timeout=5)
+
+    with pytest.raises(RuntimeError, match="returned 1 results for 2 texts"):
+        batcher.translate_many(["a", "b"], "en", "ha")
+
+
+class MemoryCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, src, tgt, text, version):
+        return self.entries.get((src, tgt, text, version))
+
+    def put(self, src, tgt, text, version, translated):
+        self.entries[(src, tgt, text, version)] = translated
+
+
+def test_cached_texts_skip_the_engine():
+    handler = FakeHandler()
+    cache = MemoryCache()
+    batcher = TranslationBatcher(handler, max_batch_size=8, max_wait_ms=0, cache=cache)
+
+    assert batcher.translate_many(["a", "b"], "EN", "HA") == ["T:a", "T:b"]
+    assert batcher.translate_many(["a", "c"], "en", "ha") == ["T:a", "T:c"]
+
+    assert handler.batches == [["a", "b"], ["c"]]
+    assert cache.get("en", "ha", "c", "v1") == "T:c"
+
+
+def test_results_of_a_swapped_model_are_not_cached_under_the_old_version():
+    handler = FakeHandler()
+    cache = MemoryCache()
+    batcher = TranslationBatcher(handler, max_batch_size=8, max_wait_ms=0, cache=cache)
+    original_engine = handler.get_translation_engine
+
+    def engine_after_swap(src, tgt):
+        handler.version = "v2"
+        return original_engine(src, tgt)
+
+    handler.get_translation_engine = engine_after_swap
+    batcher.translate_many(["a"], "en", "ha")
+
+    assert cache.entries == {}
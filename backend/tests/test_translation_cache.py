@@ -0,0 +1,59 @@
+import pytest
+
+from services.translation_cache import TranslationCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), max_memory_entries=2, max_disk_entries=100)
+    yield cache
+    cache._conn.close()
+
+
+def test_round_trip_ignores_whitespace_and_unicode_form(cache):
+    cache.put("en", "ha", "Good  morning\n", "v1", "Ina kwana")
+
+    assert cache.get("en", "ha", " Good morning", "v1") == "Ina kwana"
+    assert cache.get("en", "yo", "Good morning", "v1") is None
+
+
+def test_memory_tier_evicts_least_recently_used_but_disk_keeps_entries(cache):
+    cache.put("en", "ha", "one", "v1", "1")
+    cache.put("en", "ha", "two", "v1", "2")
+    cache.get("en", "ha", "one", "v1")  # "two" is now the least recently used
+    cache.put("en", "ha", "three", "v1", "3")
+
+    assert cache.get_stats()["memory_entries"] == 2
+    before = cache.get_stats()["disk_hits"]
+    assert cache.get("en", "ha", "two", "v1") == "2"
+    assert cache.get_stats()["disk_hits"] == before + 1
+
+
+def test_new_model_version_invalidates_old_results(cache):
+    cache.put("en", "ha", "hello", "v1", "sannu")
+    cache.put("en", "yo", "hello", "v1", "bawo")
+
+    assert cache.get("en", "ha", "hello", "v2") is None
+    assert cache.get("en", "ha", "hello", "v1") is None  # v1 rows were dropped, not just shadowed
+    assert cache.get("en", "yo", "hello", "v1") == "bawo"
+    assert cache.get_stats()["invalidations"] >= 1
+
+
+def test_results_of_a_model_replaced_while_down_are_dropped(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = TranslationCache(path)
+    first.put("en", "ha", "hello", "v1", "sannu")
+    first._conn.close()
+
+    second = TranslationCache(path)
+    assert second.get("en", "ha", "hello", "v2") is None
+    assert second.get_stats()["disk_entries"] == 0
+    second._conn.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0)
+    cache.put("en", "ha", "hello", "v1", "sannu")
+
+    assert cache.get("en", "ha", "hello", "v1") is None
+    cache._conn.close()
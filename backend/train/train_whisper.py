@@ -1,185 +1,507 @@
 import argparse
 import time
 import os
+import sys
 import json
-import pandas as pd
+import random
+import shutil
+import hashlib
 import torch
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
-import openai_whisper as whisper
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple
+from torch.optim.lr_scheduler import LambdaLR
 from transformers import MarianMTModel, MarianTokenizer
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.spreadsheet_ingest import iter_spreadsheet_pairs
+
+try:
+    import openai_whisper as whisper
+except ImportError:
+    whisper = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+CSV_CHUNK_ROWS = 10000
+
+def _as_pair(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalise a raw record to a training pair, or None if either side is empty."""
+    source = str(item.get('source_text') or '').strip()
+    target = str(item.get('target_text') or '').strip()
+    if not source or not target:
+        return None
+    pair = {'source_text': source, 'target_text': target}
+    for key in ('source_lang', 'target_lang', 'audio_path'):
+        if item.get(key):
+            pair[key] = item[key]
+    return pair
+
+def _iter_raw_records(path: Path) -> Iterator[Dict[str, Any]]:
+    ext = path.suffix.lower()
+    if path.is_dir():
+        # Sharded export from /feedback/export-training-data/
+        with open(path / 'manifest.json', 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for shard in manifest.get('shards', []):
+            yield from _iter_raw_records(path / shard['jsonl'])
+    elif ext == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+    elif ext == '.parquet':
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet datasets")
+        for batch in pq.ParquetFile(str(path)).iter_batches(columns=['source_text', 'target_text']):
+            yield from batch.to_pylist()
+    elif ext in ['.csv', '.xlsx', '.xlsm', '.xls']:
+        # Same column detection as the upload ingest, so both train on the same columns
+        for chunk in iter_spreadsheet_pairs(str(path), chunk_rows=CSV_CHUNK_ROWS):
+            for source, target in zip(chunk['source_text'], chunk['target_text']):
+                yield {'source_text': source, 'target_text': target}
+    else:
+        # Assume it's a text file with translation pairs
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split('|')
+                if len(parts) == 2:
+                    yield {'source_text': parts[0], 'target_text': parts[1]}
+
+def iter_training_pairs(dataset_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream training pairs from a dataset file (csv/xlsx/json/jsonl/parquet/txt)
+    or an export directory with a manifest.json, without loading it whole
+    (legacy .xls and plain .json files are the exception).
+    """
+    for item in _iter_raw_records(Path(dataset_path)):
+        pair = _as_pair(item)
+        if pair is not None:
+            yield pair
+
+def dataset_fingerprint(dataset_path: str) -> str:
+    """Hash of a dataset file (or every file of an export directory) identifying a training run's input."""
+    path = Path(dataset_path)
+    files = sorted(item for item in path.rglob('*') if item.is_file()) if path.is_dir() else [path]
+    digest = hashlib.blake2b(digest_size=16)
+    for item in files:
+        digest.update(item.name.encode('utf-8') + b"\0")
+        with open(item, 'rb') as f:
+            for block in iter(lambda: f.read(2**20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def configure_threads(threads: Optional[int] = None) -> int:
+    """Use one intra-op thread per core this process may run on."""
+    if not threads:
+        threads = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    torch.set_num_threads(threads)
+    try:
+        # Training is one model on one batch at a time, inter-op threads only oversubscribe
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set before the first parallel operation
+    return threads
+
+class LengthBucketBatcher:
+    """
+    Turns a stream of pairs into token-budgeted batches of similar length.
+
+    Pairs are read pool_size at a time, tokenized together, sorted by length
+    and cut into batches of at most max_tokens padded tokens, then the
+    batches of the pool are shuffled. Padding is therefore only up to the
+    longest pair of a batch of near-equal pairs, while batch order stays
+    random. Shuffling is seeded, so an epoch always yields the same batches.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int = 4096, max_length: int = 256,
+                 max_batch_size: int = 64, pool_size: int = 4096):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.max_length = max_length
+        self.max_batch_size = max_batch_size
+        self.pool_size = pool_size
+
+    def _encode(self, pairs: List[Dict[str, Any]]) -> List[Tuple[List[int], List[int]]]:
+        sources = self.tokenizer([pair['source_text'] for pair in pairs],
+                                 truncation=True, max_length=self.max_length)["input_ids"]
+        targets = self.tokenizer(text_target=[pair['target_text'] for pair in pairs],
+                                 truncation=True, max_length=self.max_length)["input_ids"]
+        return list(zip(sources, targets))
+
+    def _split(self, encoded: List[Tuple[List[int], List[int]]]) -> List[List[Tuple[List[int], List[int]]]]:
+        encoded.sort(key=lambda item: max(len(item[0]), len(item[1])))
+        batches, batch, longest = [], [], 0
+        for item in encoded:
+            length = max(len(item[0]), len(item[1]))
+            if batch and (max(longest, length) * (len(batch) + 1) > self.max_tokens
+                          or len(batch) >= self.max_batch_size):
+                batches.append(batch)
+                batch, longest = [], 0
+            batch.append(item)
+            longest = max(longest, length)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def batches(self, pairs: Iterable[Dict[str, Any]], seed: int = 0) -> Iterator[List[Tuple[List[int], List[int]]]]:
+        rng = random.Random(seed)
+        pool = []
+        for pair in pairs:
+            pool.append(pair)
+            if len(pool) >= self.pool_size:
+                batches = self._split(self._encode(pool))
+                rng.shuffle(batches)
+                yield from batches
+                pool = []
+        if pool:
+            batches = self._split(self._encode(pool))
+            rng.shuffle(batches)
+            yield from batches
+
+def collate(batch: List[Tuple[List[int], List[int]]], pad_token_id: int) -> Dict[str, torch.Tensor]:
+    """Pad a batch to its own longest pair; padded label positions are ignored by the loss."""
+    source_len = max(len(source) for source, _ in batch)
+    target_len = max(len(target) for _, target in batch)
+    input_ids = torch.full((len(batch), source_len), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(batch), source_len), dtype=torch.long)
+    labels = torch.full((len(batch), target_len), -100, dtype=torch.long)
+    for i, (source, target) in enumerate(batch):
+        input_ids[i, :len(source)] = torch.tensor(source, dtype=torch.long)
+        attention_mask[i, :len(source)] = 1
+        labels[i, :len(target)] = torch.tensor(target, dtype=torch.long)
+    return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
 class ModelTrainer:
-    def __init__(self, model_size: str = "small"):
+    def __init__(self, model_size: str = "small", models_dir: str = "./models_cache", epochs: int = 1,
+                 batch_tokens: int = 4096, grad_accum_steps: int = 4, learning_rate: float = 5e-5,
+                 warmup_steps: int = 100, max_length: int = 256, threads: Optional[int] = None,
+                 save_every: int = 200, log_every: int = 20, base_model: Optional[str] = None,
+                 output_dir: Optional[str] = None, checkpoint_dir: Optional[str] = None):
         self.model_size = model_size
-        self.models_dir = Path("./models_cache")
+        self.models_dir = Path(models_dir)
         self.models_dir.mkdir(exist_ok=True)
-        
+        self.epochs = epochs
+        self.batch_tokens = batch_tokens
+        self.grad_accum_steps = max(1, grad_accum_steps)
+        self.learning_rate = learning_rate
+        self.warmup_steps = warmup_steps
+        self.max_length = max_length
+        self.threads = threads
+        self.save_every = save_every
+        self.log_every = log_every
+        self.base_model = base_model
+        self.output_dir = output_dir
+        self.checkpoint_dir = checkpoint_dir
+
     def load_training_data(self, dataset_path: str) -> List[Dict[str, Any]]:
-        """Load training data from various file formats."""
+        """Load all training pairs into memory; prefer iter_training_pairs for large files."""
         logger.info(f"Loading training data from: {dataset_path}")
-        
-        file_ext = Path(dataset_path).suffix.lower()
-        
-        if file_ext == '.csv':
-            df = pd.read_csv(dataset_path)
-        elif file_ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(dataset_path)
-        elif file_ext == '.json':
-            with open(dataset_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
-        else:
-            # Assume it's a text file with translation pairs
-            with open(dataset_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            pairs = []
-            for line in lines:
-                if '|' in line:
-                    parts = line.strip().split('|')
-                    if len(parts) == 2:
-                        pairs.append({
-                            'source_text': parts[0].strip(),
-                            'target_text': parts[1].strip()
-                        })
-            return pairs
-        
-        # Convert DataFrame to list of dictionaries
-        pairs = []
-        for _, row in df.iterrows():
-            if pd.notna(row.iloc[0]) and pd.notna(row.iloc[1]):
-                pairs.append({
-                    'source_text': str(row.iloc[0]).strip(),
-                    'target_text': str(row.iloc[1]).strip()
-                })
-        
+        pairs = list(iter_training_pairs(dataset_path))
         logger.info(f"Loaded {len(pairs)} training pairs")
         return pairs
-    
-    def fine_tune_whisper(self, training_data: List[Dict[str, Any]]) -> str:
+
+    def fine_tune_whisper(self, training_data: Iterable[Dict[str, Any]]) -> str:
         """Fine-tune Whisper model with training data."""
         logger.info("Starting Whisper fine-tuning...")
-        
+
         try:
-            # Load base Whisper model
-            model = whisper.load_model(self.model_size)
-            
             # Create training dataset
             audio_files = []
             transcripts = []
-            
+
             for item in training_data:
                 # For now, we'll simulate audio files
                 # In a real implementation, you'd have actual audio files
                 if 'audio_path' in item:
                     audio_files.append(item['audio_path'])
                     transcripts.append(item['target_text'])
-            
+
             if not audio_files:
                 logger.warning("No audio files found for Whisper training")
                 return None
-            
+
+            if whisper is None:
+                logger.warning("Whisper is not installed, skipping Whisper training")
+                return None
+
+            # Load base Whisper model
+            model = whisper.load_model(self.model_size)
+
             # Fine-tuning would go here
             # This is a simplified version - real fine-tuning requires more setup
             logger.info("Whisper fine-tuning completed (simulated)")
-            
+
             # Save the fine-tuned model
             model_path = self.models_dir / f"whisper_{self.model_size}_fine_tuned"
             model.save(str(model_path))
-            
+
             logger.info(f"Fine-tuned Whisper model saved to: {model_path}")
             return str(model_path)
-            
+
         except Exception as e:
             logger.error(f"Error fine-tuning Whisper: {e}")
             return None
-    
-    def fine_tune_translation_model(self, training_data: List[Dict[str, Any]], source_lang: str, target_lang: str) -> str:
-        """Fine-tune translation model with training data."""
+
+    def _initial_checkpoint(self, source_lang: str, target_lang: str) -> str:
+        """Start from base_model, else the served fine-tuned model if there is one, else opus-mt."""
+        if self.base_model:
+            return self.base_model
+        fine_tuned = self.models_dir / f"translation_{source_lang}_{target_lang}_fine_tuned"
+        if (fine_tuned / "config.json").exists():
+            return str(fine_tuned)
+        return f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
+
+    def _save_checkpoint(self, checkpoint_dir: Path, model, tokenizer, optimizer, scheduler, state: Dict[str, Any]):
+        """Write weights and trainer state to a fresh directory, then swap it in."""
+        tmp_dir = checkpoint_dir.with_name(checkpoint_dir.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        model.save_pretrained(str(tmp_dir))
+        tokenizer.save_pretrained(str(tmp_dir))
+        torch.save({
+            **state,
+            "optimizer": optimizer.state_dict(),
+            "scheduler": scheduler.state_dict(),
+        }, tmp_dir / "trainer_state.pt")
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        os.replace(tmp_dir, checkpoint_dir)
+        logger.info(f"Saved checkpoint at step {state['step']} to {checkpoint_dir}")
+
+    def _publish_model(self, checkpoint_dir: Path, output_path: Path):
+        """Move the final weights to where AIModelHandler looks for a fine-tuned pair."""
+        (checkpoint_dir / "trainer_state.pt").unlink(missing_ok=True)
+        old_path = output_path.with_name(output_path.name + ".old")
+        shutil.rmtree(old_path, ignore_errors=True)
+        if output_path.exists():
+            os.replace(output_path, old_path)
+        os.replace(checkpoint_dir, output_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def fine_tune_translation_model(self, training_data: Callable[[], Iterable[Dict[str, Any]]],
+                                    source_lang: str, target_lang: str, resume: bool = True,
+                                    dataset_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fine-tune the Marian model for a language pair on CPU.
+
+        training_data is called once per epoch and must return a fresh stream
+        of pairs. Batches are length-bucketed and padded per batch, gradients
+        are accumulated over grad_accum_steps batches, and a checkpoint is
+        saved every save_every optimizer steps to checkpoint_dir (by default
+        one directory per base model and dataset_id). With resume, an
+        interrupted run continues from its last checkpoint, skipping the
+        batches it had already trained on; a checkpoint written for another
+        base model or dataset is discarded instead. The result is saved to
+        output_dir, by default models_cache/translation_{src}_{tgt}_fine_tuned.
+        """
         logger.info(f"Starting translation model fine-tuning for {source_lang}-{target_lang}...")
-        
+
         try:
-            # Load base translation model
-            model_name = f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
+            threads = configure_threads(self.threads)
+            output_path = (Path(self.output_dir) if self.output_dir
+                           else self.models_dir / f"translation_{source_lang}_{target_lang}_fine_tuned")
+            base_model = self._initial_checkpoint(source_lang, target_lang)
+            run = {"base_model": base_model, "dataset_id": dataset_id, "source_lang": source_lang,
+                   "target_lang": target_lang, "epochs": self.epochs}
+            if self.checkpoint_dir:
+                checkpoint_dir = Path(self.checkpoint_dir)
+            else:
+                run_key = hashlib.blake2b(json.dumps(run, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+                checkpoint_dir = self.models_dir / "checkpoints" / f"translation_{source_lang}_{target_lang}_{run_key}"
+            checkpoint_dir.parent.mkdir(parents=True, exist_ok=True)
+            state_path = checkpoint_dir / "trainer_state.pt"
+
+            resume_state = None
+            if resume and state_path.exists():
+                resume_state = torch.load(state_path, map_location="cpu")
+                if resume_state.get("run") != run:
+                    logger.warning(f"Ignoring checkpoint in {checkpoint_dir}: it belongs to another run "
+                                   f"({resume_state.get('run')})")
+                    resume_state = None
+            if resume_state is None:
+                shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            model_name = str(checkpoint_dir) if resume_state is not None else base_model
+            logger.info(f"Training from {model_name} with {threads} threads")
             tokenizer = MarianTokenizer.from_pretrained(model_name)
             model = MarianMTModel.from_pretrained(model_name)
-            
-            # Prepare training data
-            source_texts = [item['source_text'] for item in training_data]
-            target_texts = [item['target_text'] for item in training_data]
-            
-            # Tokenize training data
-            source_encodings = tokenizer(source_texts, truncation=True, padding=True, max_length=512)
-            target_encodings = tokenizer(target_texts, truncation=True, padding=True, max_length=512)
-            
-            # Fine-tuning would go here
-            # This is a simplified version - real fine-tuning requires more setup
-            logger.info("Translation model fine-tuning completed (simulated)")
-            
+            model.train()
+
+            optimizer = torch.optim.AdamW(model.parameters(), lr=self.learning_rate, weight_decay=0.01)
+            warmup = max(1, self.warmup_steps)
+            scheduler = LambdaLR(optimizer, lambda step: min(1.0, (step + 1) / warmup))
+            step, start_epoch, skip_batches = 0, 0, 0
+            if resume_state is not None:
+                optimizer.load_state_dict(resume_state["optimizer"])
+                scheduler.load_state_dict(resume_state["scheduler"])
+                step = resume_state["step"]
+                start_epoch = resume_state["epoch"]
+                skip_batches = resume_state["batches_done"]
+                logger.info(f"Resuming at epoch {start_epoch}, step {step} ({skip_batches} batches done)")
+
+            batcher = LengthBucketBatcher(tokenizer, max_tokens=self.batch_tokens, max_length=self.max_length)
+            examples = tokens = padded_tokens = 0
+            recent_loss, recent_batches = 0.0, 0
+            started = time.perf_counter()
+
+            def optimizer_step():
+                torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+                optimizer.step()
+                scheduler.step()
+                optimizer.zero_grad(set_to_none=True)
+
+            for epoch in range(start_epoch, self.epochs):
+                pairs = (
+                    pair for pair in training_data()
+                    if pair.get('source_lang', source_lang) == source_lang
+                    and pair.get('target_lang', target_lang) == target_lang
+                )
+                pending = 0
+                for batch_index, batch in enumerate(batcher.batches(pairs, seed=epoch)):
+                    if epoch == start_epoch and batch_index < skip_batches:
+                        continue
+                    inputs = collate(batch, tokenizer.pad_token_id)
+                    loss = model(**inputs).loss
+                    (loss / self.grad_accum_steps).backward()
+                    pending += 1
+                    examples += len(batch)
+                    tokens += int(inputs["attention_mask"].sum()) + int((inputs["labels"] != -100).sum())
+                    padded_tokens += inputs["input_ids"].numel() + inputs["labels"].numel()
+                    recent_loss += loss.item()
+                    recent_batches += 1
+
+                    if pending < self.grad_accum_steps:
+                        continue
+                    optimizer_step()
+                    pending = 0
+                    step += 1
+                    if step % self.log_every == 0:
+                        elapsed = time.perf_counter() - started
+                        logger.info(f"epoch {epoch} step {step}: loss {recent_loss / recent_batches:.4f}, "
+                                    f"{examples / elapsed:.1f} examples/sec, {tokens / elapsed:.0f} tokens/sec")
+                        recent_loss, recent_batches = 0.0, 0
+                    if self.save_every and step % self.save_every == 0:
+                        self._save_checkpoint(checkpoint_dir, model, tokenizer, optimizer, scheduler,
+                                              {"run": run, "step": step, "epoch": epoch, "batches_done": batch_index + 1})
+
+                if pending:
+                    optimizer_step()
+                    step += 1
+                if step == 0:
+                    raise ValueError(f"No {source_lang}-{target_lang} training pairs found")
+                self._save_checkpoint(checkpoint_dir, model, tokenizer, optimizer, scheduler,
+                                      {"run": run, "step": step, "epoch": epoch + 1, "batches_done": 0})
+
             # Save the fine-tuned model
-            model_path = self.models_dir / f"translation_{source_lang}_{target_lang}_fine_tuned"
-            model.save_pretrained(str(model_path))
-            tokenizer.save_pretrained(str(model_path))
-            
-            logger.info(f"Fine-tuned translation model saved to: {model_path}")
-            return str(model_path)
-            
+            self._publish_model(checkpoint_dir, output_path)
+            elapsed = time.perf_counter() - started
+            stats = {
+                "model_path": str(output_path),
+                "base_model": base_model,
+                "resumed": resume_state is not None,
+                "epochs": self.epochs,
+                "optimizer_steps": step,
+                "examples": examples,
+                "seconds": round(elapsed, 1),
+                "examples_per_sec": round(examples / elapsed, 2) if elapsed else None,
+                "tokens_per_sec": round(tokens / elapsed, 1) if elapsed else None,
+                "padding_efficiency": round(tokens / padded_tokens, 3) if padded_tokens else None,
+                "threads": threads,
+            }
+            logger.info(f"Fine-tuned translation model saved to: {output_path} ({stats})")
+            return stats
+
         except Exception as e:
             logger.error(f"Error fine-tuning translation model: {e}")
             return None
-    
-    def train(self, dataset_path: str, source_lang: str = "en", target_lang: str = "ha") -> Dict[str, Any]:
+
+    def train(self, dataset_path: str, source_lang: str = "en", target_lang: str = "ha",
+              resume: bool = True) -> Dict[str, Any]:
         """Main training function."""
         logger.info(f"Starting training process...")
-        
-        # Load training data
-        training_data = self.load_training_data(dataset_path)
-        
-        if not training_data:
+
+        if next(iter_training_pairs(dataset_path), None) is None:
             raise ValueError("No training data found")
-        
+
         results = {
-            'training_data_count': len(training_data),
             'whisper_model_path': None,
             'translation_model_path': None,
             'status': 'completed'
         }
-        
+
         # Fine-tune Whisper model
-        whisper_path = self.fine_tune_whisper(training_data)
+        whisper_path = self.fine_tune_whisper(iter_training_pairs(dataset_path))
         results['whisper_model_path'] = whisper_path
-        
+
         # Fine-tune translation model
-        translation_path = self.fine_tune_translation_model(training_data, source_lang, target_lang)
-        results['translation_model_path'] = translation_path
-        
+        translation = self.fine_tune_translation_model(
+            lambda: iter_training_pairs(dataset_path), source_lang, target_lang, resume=resume,
+            dataset_id=dataset_fingerprint(dataset_path))
+        if translation is not None:
+            results['translation_model_path'] = translation['model_path']
+            results['translation_training'] = translation
+
         logger.info("Training process completed successfully")
         return results
 
 def main():
     parser = argparse.ArgumentParser(description="Train UweTalk models")
-    parser.add_argument("--dataset", required=True, help="Path to dataset file (csv/json/txt)")
+    parser.add_argument("--dataset", required=True, help="Path to dataset file (csv/xlsx/json/jsonl/parquet/txt) or export directory")
     parser.add_argument("--model", default="small", help="Whisper model size")
     parser.add_argument("--source-lang", default="en", help="Source language code")
     parser.add_argument("--target-lang", default="ha", help="Target language code")
+    parser.add_argument("--epochs", type=int, default=1, help="Passes over the dataset")
+    parser.add_argument("--batch-tokens", type=int, default=4096, help="Padded tokens per batch")
+    parser.add_argument("--grad-accum", type=int, default=4, help="Batches per optimizer step")
+    parser.add_argument("--lr", type=float, default=5e-5, help="Peak learning rate")
+    parser.add_argument("--warmup-steps", type=int, default=100, help="Linear warm-up optimizer steps")
+    parser.add_argument("--max-length", type=int, default=256, help="Token limit per sentence")
+    parser.add_argument("--threads", type=int, default=0, help="Torch threads (0 = one per available core)")
+    parser.add_argument("--save-every", type=int, default=200, help="Optimizer steps between checkpoints")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--results-path", help="Also write the results as JSON to this file")
+    parser.add_argument("--base-model", help="Checkpoint to fine-tune (default: the served fine-tuned model or opus-mt)")
+    parser.add_argument("--output-dir", help="Where to save the fine-tuned model (default: models_cache/translation_<src>_<tgt>_fine_tuned)")
+    parser.add_argument("--checkpoint-dir", help="Resume checkpoint of this run (default: keyed on base model and dataset)")
     args = parser.parse_args()
 
     logger.info(f"Starting training with model={args.model}, dataset={args.dataset}")
     logger.info(f"Language pair: {args.source_lang} -> {args.target_lang}")
-    
+
     try:
-        trainer = ModelTrainer(model_size=args.model)
-        results = trainer.train(args.dataset, args.source_lang, args.target_lang)
-        
+        trainer = ModelTrainer(
+            model_size=args.model,
+            epochs=args.epochs,
+            batch_tokens=args.batch_tokens,
+            grad_accum_steps=args.grad_accum,
+            learning_rate=args.lr,
+            warmup_steps=args.warmup_steps,
+            max_length=args.max_length,
+            threads=args.threads or None,
+            save_every=args.save_every,
+            base_model=args.base_model,
+            output_dir=args.output_dir,
+            checkpoint_dir=args.checkpoint_dir,
+        )
+        results = trainer.train(args.dataset, args.source_lang, args.target_lang, resume=not args.no_resume)
+
+        if args.results_path:
+            with open(args.results_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        if results['translation_model_path'] is None:
+            raise RuntimeError("Translation fine-tuning failed, see the log above")
+
         logger.info("Training completed successfully!")
         logger.info(f"Results: {results}")
-        
+
     except Exception as e:
         logger.error(f"Training failed: {e}")
         raise
@@ -0,0 +1,140 @@
+import wave
+import asyncio
+import logging
+import tempfile
+import subprocess
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from fastapi import UploadFile, HTTPException
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+READ_CHUNK_SIZE = 64 * 1024
+
+def _ffmpeg_decode_cmd(source: str, max_seconds: Optional[float] = None):
+    cmd = ["ffmpeg", "-loglevel", "error"]
+    if source != "pipe:0":
+        cmd.append("-nostdin")
+    cmd += ["-i", source]
+    if max_seconds:
+        # Decode one extra second so an over-long input is detected rather than silently cut
+        cmd += ["-t", str(max_seconds + 1)]
+    return cmd + ["-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+def _check_duration(samples: int, max_seconds: Optional[float]):
+    if max_seconds and samples > max_seconds * SAMPLE_RATE:
+        raise HTTPException(413, f"Audio is longer than the {max_seconds:.0f} second limit")
+
+def _is_iso_bmff(head: bytes) -> bool:
+    """MP4/M4A/MOV/3GP files start with an ftyp box."""
+    return head[4:8] == b"ftyp"
+
+async def decode_upload(upload: UploadFile,
+                        max_bytes: Optional[int] = None,
+                        max_seconds: Optional[float] = None) -> np.ndarray:
+    """
+    Stream an uploaded file through ffmpeg and return 16 kHz mono float32
+    samples, without writing the upload or a WAV file to disk. Size and
+    duration limits are enforced while streaming.
+
+    MP4-family files (phone recordings, M4A, MOV) usually keep their index
+    at the end, which ffmpeg cannot reach through a pipe; those are written
+    to a temporary file and decoded from there.
+    """
+    head = await upload.read(READ_CHUNK_SIZE)
+    if max_bytes and len(head) > max_bytes:
+        raise HTTPException(413, f"Upload is larger than the {max_bytes // 2**20} MB limit")
+
+    async def chunks():
+        received = len(head)
+        chunk = head
+        while chunk:
+            yield chunk
+            chunk = await upload.read(READ_CHUNK_SIZE)
+            received += len(chunk)
+            if max_bytes and received > max_bytes:
+                raise HTTPException(413, f"Upload is larger than the {max_bytes // 2**20} MB limit")
+
+    if not _is_iso_bmff(head):
+        return await _ffmpeg_decode("pipe:0", max_seconds, chunks())
+
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as tmp:
+        async for chunk in chunks():
+            tmp.write(chunk)
+        tmp.flush()
+        return await _ffmpeg_decode(tmp.name, max_seconds)
+
+async def _ffmpeg_decode(source: str, max_seconds: Optional[float],
+                         input_chunks: Optional[AsyncIterator[bytes]] = None) -> np.ndarray:
+    """Run ffmpeg on a file or on input_chunks fed to its stdin, enforcing the duration limit."""
+    process = await asyncio.create_subprocess_exec(
+        *_ffmpeg_decode_cmd(source, max_seconds),
+        stdin=asyncio.subprocess.PIPE if input_chunks is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    max_output = int((max_seconds + 1) * SAMPLE_RATE * 4) if max_seconds else None
+
+    async def feed():
+        if input_chunks is None:
+            return
+        try:
+            async for chunk in input_chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg stopped reading; its exit status is checked below
+        finally:
+            process.stdin.close()
+
+    async def collect() -> bytearray:
+        out = bytearray()
+        while True:
+            chunk = await process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return out
+            out.extend(chunk)
+            if max_output and len(out) > max_output:
+                raise HTTPException(413, f"Audio is longer than the {max_seconds:.0f} second limit")
+
+    feed_task = asyncio.create_task(feed())
+    collect_task = asyncio.create_task(collect())
+    stderr_task = asyncio.create_task(process.stderr.read())
+    try:
+        # gather fails fast, so a limit hit in either direction stops ffmpeg at once
+        _, out, stderr = await asyncio.gather(feed_task, collect_task, stderr_task)
+        returncode = await process.wait()
+    finally:
+        for task in (feed_task, collect_task, stderr_task):
+            task.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    if returncode != 0:
+        raise HTTPException(400, f"Could not decode audio: {stderr.decode(errors='ignore').strip()}")
+
+    audio = np.frombuffer(out, dtype=np.float32, count=len(out) // 4)
+    _check_duration(len(audio), max_seconds)
+    return audio
+
+def decode_file(path: str, max_seconds: Optional[float] = None) -> np.ndarray:
+    """Decode any audio/video file on disk to 16 kHz mono float32 samples."""
+    try:
+        out = subprocess.run(_ffmpeg_decode_cmd(path, max_seconds), capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise HTTPException(400, f"Could not decode audio: {e.stderr.decode(errors='ignore').strip()}")
+    audio = np.frombuffer(out, dtype=np.float32)
+    _check_duration(len(audio), max_seconds)
+    return audio
+
+def write_wav(audio: np.ndarray, path: str):
+    """Write float32 samples as a 16 kHz mono 16-bit WAV file."""
+    pcm16 = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm16.tobytes())
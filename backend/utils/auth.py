@@ -3,8 +3,17 @@ from typing import Optional
 from fastapi import HTTPException
 
 SECRET_API_KEY = os.getenv("SECRET_API_KEY")
+# Separate key for /admin/ endpoints; they are disabled while it is unset
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
 
 def require_key(key: Optional[str]):
     """Raises HTTPException if the provided API key is invalid."""
     if SECRET_API_KEY and key != SECRET_API_KEY:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+def require_admin_key(key: Optional[str]):
+    """Raises HTTPException unless admin endpoints are enabled and the admin key matches."""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_KEY is not set)")
+    if key != ADMIN_API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
\ No newline at end of file
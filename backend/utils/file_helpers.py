@@ -1,139 +1,46 @@
 import os
 import shutil
 import tempfile
-import pandas as pd
 import cv2
 from pathlib import Path
-from fastapi import UploadFile, HTTPException
-from typing import List, Dict, Any, Optional
+from fastapi import UploadFile
+from typing import Dict, Any, Optional, Callable
 import logging
 
-# audio helper
-from pydub import AudioSegment
+# audio helpers
+from utils.audio_ingest import decode_file, write_wav
+from utils.video_ingest import VideoAudioExtractor
+from utils.spreadsheet_ingest import extract_translation_pairs
 
 logger = logging.getLogger(__name__)
 
-def save_upload_to_tmp(upload: UploadFile) -> str:
-    """Saves an uploaded file to a temporary path and returns the path."""
+def save_upload_to_tmp(upload: UploadFile, directory: Optional[str] = None) -> str:
+    """Saves an uploaded file to a temporary path (in directory, if given) and returns the path."""
     suffix = Path(upload.filename or "default").suffix or ".bin"
-    tmp_fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix=suffix, dir=directory)
     with os.fdopen(tmp_fd, "wb") as f:
         shutil.copyfileobj(upload.file, f)
     return tmp_path
 
-def convert_to_wav(src_path: str) -> str:
-    """Converts an audio file to WAV format and returns the new path."""
-    try:
-        audio = AudioSegment.from_file(src_path)
-        wav_path = src_path.rsplit('.', 1)[0] + '.wav'
-        audio.export(wav_path, format="wav")
-        return wav_path
-    except Exception as e:
-        logger.error(f"Error converting audio to WAV: {e}")
-        raise HTTPException(400, f"Could not convert audio file: {e}")
+def convert_to_wav(src_path: str, max_seconds: Optional[float] = None) -> str:
+    """Converts an audio file to 16 kHz mono WAV and returns the new path."""
+    wav_path = src_path.rsplit('.', 1)[0] + '.wav'
+    if wav_path == src_path:
+        wav_path = src_path.rsplit('.', 1)[0] + '_16k.wav'
+    write_wav(decode_file(src_path, max_seconds=max_seconds), wav_path)
+    return wav_path
 
-def extract_audio_from_video(video_path: str) -> str:
-    """Extract audio from video file and return audio path."""
-    try:
-        audio = AudioSegment.from_file(video_path)
-        audio_path = video_path.rsplit('.', 1)[0] + '_audio.wav'
-        audio.export(audio_path, format="wav")
-        logger.info(f"Extracted audio from video: {audio_path}")
-        return audio_path
-    except Exception as e:
-        logger.error(f"Error extracting audio from video: {e}")
-        raise HTTPException(400, f"Could not extract audio from video: {e}")
+_default_video_extractor = None
 
-def process_csv_file(file_path: str) -> List[Dict[str, Any]]:
-    """Process CSV file and extract translation pairs."""
-    try:
-        df = pd.read_csv(file_path)
-        
-        # Look for common column patterns
-        possible_source_cols = ['english', 'en', 'source', 'text', 'input']
-        possible_target_cols = ['hausa', 'ha', 'yoruba', 'yo', 'igbo', 'ig', 'edo', 'bin', 'target', 'translation', 'output']
-        
-        source_col = None
-        target_col = None
-        
-        # Find source column
-        for col in df.columns:
-            if any(pattern in col.lower() for pattern in possible_source_cols):
-                source_col = col
-                break
-        
-        # Find target column
-        for col in df.columns:
-            if any(pattern in col.lower() for pattern in possible_target_cols):
-                target_col = col
-                break
-        
-        if not source_col or not target_col:
-            raise ValueError("Could not identify source and target columns")
-        
-        # Extract translation pairs
-        translation_pairs = []
-        for _, row in df.iterrows():
-            if pd.notna(row[source_col]) and pd.notna(row[target_col]):
-                translation_pairs.append({
-                    'source_text': str(row[source_col]).strip(),
-                    'target_text': str(row[target_col]).strip(),
-                    'row_number': _ + 1
-                })
-        
-        logger.info(f"Processed {len(translation_pairs)} translation pairs from CSV")
-        return translation_pairs
-        
-    except Exception as e:
-        logger.error(f"Error processing CSV file: {e}")
-        raise HTTPException(400, f"Could not process CSV file: {e}")
-
-def process_excel_file(file_path: str) -> List[Dict[str, Any]]:
-    """Process Excel file and extract translation pairs."""
-    try:
-        # Read all sheets
-        excel_file = pd.ExcelFile(file_path)
-        all_pairs = []
-        
-        for sheet_name in excel_file.sheet_names:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            
-            # Look for common column patterns
-            possible_source_cols = ['english', 'en', 'source', 'text', 'input']
-            possible_target_cols = ['hausa', 'ha', 'yoruba', 'yo', 'igbo', 'ig', 'edo', 'bin', 'target', 'translation', 'output']
-            
-            source_col = None
-            target_col = None
-            
-            # Find source column
-            for col in df.columns:
-                if any(pattern in col.lower() for pattern in possible_source_cols):
-                    source_col = col
-                    break
-            
-            # Find target column
-            for col in df.columns:
-                if any(pattern in col.lower() for pattern in possible_target_cols):
-                    target_col = col
-                    break
-            
-            if source_col and target_col:
-                # Extract translation pairs
-                for _, row in df.iterrows():
-                    if pd.notna(row[source_col]) and pd.notna(row[target_col]):
-                        all_pairs.append({
-                            'source_text': str(row[source_col]).strip(),
-                            'target_text': str(row[target_col]).strip(),
-                            'sheet_name': sheet_name,
-                            'row_number': _ + 1
-                        })
-        
-        logger.info(f"Processed {len(all_pairs)} translation pairs from Excel file")
-        return all_pairs
-        
-    except Exception as e:
-        logger.error(f"Error processing Excel file: {e}")
-        raise HTTPException(400, f"Could not process Excel file: {e}")
+def extract_audio_from_video(video_path: str, extractor: Optional[VideoAudioExtractor] = None) -> str:
+    """Extract the audio track of a video as 16 kHz mono WAV and return its path."""
+    global _default_video_extractor
+    if extractor is None:
+        if _default_video_extractor is None:
+            _default_video_extractor = VideoAudioExtractor()
+        extractor = _default_video_extractor
+    audio_path = video_path.rsplit('.', 1)[0] + '_audio.wav'
+    return extractor.extract(video_path, audio_path)["path"]
 
 def get_file_type(file_path: str) -> str:
     """Determine file type based on extension."""
@@ -158,8 +65,31 @@ def get_file_type(file_path: str) -> str:
     else:
         return 'unknown'
 
-def process_multimedia_file(file_path: str) -> Dict[str, Any]:
-    """Process multimedia files and extract relevant data."""
+def _add_transcript(result: Dict[str, Any], audio_path: str, transcriber: Callable[[str], Dict[str, Any]]):
+    """Transcribe extracted audio and add the transcript to the result."""
+    transcript = transcriber(audio_path)
+    result['extracted_data'].append({
+        'type': 'transcript',
+        'text': transcript.get('text'),
+        'segments': transcript.get('segments'),
+        'description': 'Speech transcribed from audio'
+    })
+
+def process_multimedia_file(file_path: str,
+                            transcriber: Optional[Callable[[str], Dict[str, Any]]] = None,
+                            translator: Optional[Callable[[str], Dict[str, Any]]] = None,
+                            pairs_output: Optional[str] = None,
+                            video_extractor: Optional[VideoAudioExtractor] = None,
+                            max_audio_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Process multimedia files and extract relevant data.
+
+    If a transcriber is given, audio and video files are also transcribed.
+    If a translator is given, text documents are also translated in full.
+    If pairs_output is given, spreadsheet pairs are written to that dataset
+    file (.jsonl or .parquet) instead of being returned. Audio longer than
+    max_audio_seconds is refused rather than decoded.
+    """
     file_type = get_file_type(file_path)
     result = {
         'file_type': file_type,
@@ -170,32 +100,32 @@ def process_multimedia_file(file_path: str) -> Dict[str, Any]:
     try:
         if file_type == 'video':
             # Extract audio from video
-            audio_path = extract_audio_from_video(file_path)
+            audio_path = extract_audio_from_video(file_path, video_extractor)
             result['extracted_data'].append({
                 'type': 'audio',
                 'path': audio_path,
                 'description': 'Audio extracted from video'
             })
+            if transcriber:
+                _add_transcript(result, audio_path, transcriber)
             
         elif file_type == 'audio':
             # Convert to WAV for processing
-            wav_path = convert_to_wav(file_path)
+            wav_path = convert_to_wav(file_path, max_seconds=max_audio_seconds)
             result['extracted_data'].append({
                 'type': 'audio',
                 'path': wav_path,
                 'description': 'Audio converted to WAV format'
             })
+            if transcriber:
+                _add_transcript(result, wav_path, transcriber)
             
         elif file_type == 'spreadsheet':
-            if file_path.endswith('.csv'):
-                pairs = process_csv_file(file_path)
-            else:
-                pairs = process_excel_file(file_path)
-            
+            pairs = extract_translation_pairs(file_path, output_path=pairs_output)
             result['extracted_data'].append({
                 'type': 'translation_pairs',
-                'data': pairs,
-                'description': f'Extracted {len(pairs)} translation pairs'
+                **pairs,
+                'description': f'Extracted {pairs["count"]} translation pairs'
             })
             
         elif file_type == 'document':
@@ -207,6 +137,13 @@ def process_multimedia_file(file_path: str) -> Dict[str, Any]:
                 'content': content,
                 'description': 'Text content extracted from document'
             })
+            if translator:
+                translation = translator(content)
+                result['extracted_data'].append({
+                    'type': 'translation',
+                    **translation,
+                    'description': 'Document translated sentence by sentence'
+                })
             
     except Exception as e:
         logger.error(f"Error processing multimedia file: {e}")
@@ -0,0 +1,170 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Look for common column patterns
+SOURCE_COLUMN_PATTERNS = ['english', 'en', 'source', 'text', 'input']
+TARGET_COLUMN_PATTERNS = ['hausa', 'ha', 'yoruba', 'yo', 'igbo', 'ig', 'edo', 'bin', 'target', 'translation', 'output']
+
+CHUNK_ROWS = 50000
+
+def find_pair_columns(columns: Sequence[Any]) -> Tuple[Optional[int], Optional[int]]:
+    """Return the positions of the source and target columns in a header row."""
+    names = [str(column).lower() if column is not None else "" for column in columns]
+
+    def first_match(patterns):
+        for i, name in enumerate(names):
+            if any(pattern in name for pattern in patterns):
+                return i
+        return None
+
+    return first_match(SOURCE_COLUMN_PATTERNS), first_match(TARGET_COLUMN_PATTERNS)
+
+def _clean_chunk(source: pd.Series, target: pd.Series, row_numbers, sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """Drop empty pairs and strip whitespace with column operations instead of a Python loop."""
+    mask = source.notna() & target.notna()
+    source = source[mask].astype(str).str.strip()
+    target = target[mask].astype(str).str.strip()
+    row_numbers = pd.Series(row_numbers, index=mask.index)[mask]
+    keep = (source != "") & (target != "")
+    chunk = pd.DataFrame({
+        "source_text": source[keep],
+        "target_text": target[keep],
+        "row_number": row_numbers[keep].astype("int64"),
+    })
+    if sheet_name is not None:
+        chunk["sheet_name"] = sheet_name
+    return chunk.reset_index(drop=True)
+
+def iter_csv_pairs(file_path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield cleaned pair chunks from a CSV file, reading only the two pair columns."""
+    header = pd.read_csv(file_path, nrows=0).columns
+    source_index, target_index = find_pair_columns(header)
+    if source_index is None or target_index is None:
+        raise ValueError("Could not identify source and target columns")
+    source_col, target_col = header[source_index], header[target_index]
+
+    for chunk in pd.read_csv(file_path, usecols=[source_col, target_col], dtype=str, chunksize=chunk_rows):
+        # The chunk index continues across chunks, so it is the 0-based data row
+        yield _clean_chunk(chunk[source_col], chunk[target_col], chunk.index + 1)
+
+def iter_excel_pairs(file_path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield cleaned pair chunks from every sheet that has recognisable pair columns."""
+    if openpyxl is None or not file_path.lower().endswith(('.xlsx', '.xlsm')):
+        # Legacy .xls: parse each sheet from one opened workbook
+        with pd.ExcelFile(file_path) as excel_file:
+            for sheet_name in excel_file.sheet_names:
+                df = excel_file.parse(sheet_name, dtype=str)
+                source_index, target_index = find_pair_columns(df.columns)
+                if source_index is not None and target_index is not None:
+                    yield _clean_chunk(df.iloc[:, source_index], df.iloc[:, target_index], df.index + 1, sheet_name)
+        return
+
+    # Stream rows instead of materialising whole sheets
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            source_index, target_index = find_pair_columns(header)
+            if source_index is None or target_index is None:
+                continue
+            width = max(source_index, target_index) + 1
+            sources: List[Any] = []
+            targets: List[Any] = []
+            numbers: List[int] = []
+            for row_number, row in enumerate(rows, start=1):
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                sources.append(row[source_index])
+                targets.append(row[target_index])
+                numbers.append(row_number)
+                if len(numbers) >= chunk_rows:
+                    yield _clean_chunk(pd.Series(sources, dtype=object), pd.Series(targets, dtype=object), numbers, sheet.title)
+                    sources, targets, numbers = [], [], []
+            if numbers:
+                yield _clean_chunk(pd.Series(sources, dtype=object), pd.Series(targets, dtype=object), numbers, sheet.title)
+    finally:
+        workbook.close()
+
+def iter_spreadsheet_pairs(file_path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    if file_path.lower().endswith('.csv'):
+        return iter_csv_pairs(file_path, chunk_rows)
+    return iter_excel_pairs(file_path, chunk_rows)
+
+def extract_translation_pairs(file_path: str, output_path: Optional[str] = None,
+                              chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Extract translation pairs from a CSV or Excel file.
+
+    Without output_path the pairs are returned column-wise
+    ({"source_text": [...], "target_text": [...], ...}). With output_path they
+    are written chunk by chunk to a .parquet (needs pyarrow) or .jsonl file,
+    so memory use does not grow with the number of rows.
+    """
+    try:
+        chunks = iter_spreadsheet_pairs(file_path, chunk_rows)
+        if output_path is None:
+            frames = [chunk for chunk in chunks if len(chunk)]
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+                columns=["source_text", "target_text", "row_number"])
+            logger.info(f"Extracted {len(df)} translation pairs from {file_path}")
+            return {"count": len(df), "columns": {column: df[column].tolist() for column in df.columns}}
+        count = _write_dataset(chunks, output_path)
+        logger.info(f"Wrote {count} translation pairs from {file_path} to {output_path}")
+        return {"count": count, "output_path": output_path}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing spreadsheet: {e}")
+        raise HTTPException(400, f"Could not process spreadsheet: {e}")
+
+def _write_dataset(chunks: Iterator[pd.DataFrame], output_path: str) -> int:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    if path.suffix == ".parquet":
+        if pa is None:
+            raise HTTPException(500, "pyarrow is required for Parquet output")
+        writer = None
+        try:
+            for chunk in chunks:
+                if not len(chunk):
+                    continue
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(str(path), table.schema, compression="zstd")
+                writer.write_table(table)
+                count += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return count
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            if len(chunk):
+                lines = chunk.to_json(orient="records", lines=True, force_ascii=False)
+                # Older pandas versions omit the final newline
+                f.write(lines if lines.endswith("\n") else lines + "\n")
+                count += len(chunk)
+    return count
@@ -0,0 +1,59 @@
+import re
+from typing import List, Optional
+
+# End of sentence: terminal punctuation, an optional closing quote or bracket, then whitespace
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\'”’)\]]))\s+')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+# Words ending in "." that do not end a sentence, per language (lowercase, without the final dot)
+_COMMON_ABBREVIATIONS = {"e.g", "i.e", "etc", "vs", "no", "st", "dr", "prof", "mr", "mrs", "ms", "hon", "gov", "sen"}
+_ABBREVIATIONS = {
+    "en": {"jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "approx", "dept", "jr", "sr"},
+    "ha": {"alh", "mal", "hajiya"},
+}
+
+def split_sentences(text: str, max_chars: int = 300, language: Optional[str] = None) -> List[str]:
+    """
+    Split text into sentences. Known abbreviations for the language and
+    initials do not end a sentence. Sentences longer than max_chars are
+    further split at commas/semicolons and, failing that, at word boundaries.
+    """
+    abbreviations = _COMMON_ABBREVIATIONS | _ABBREVIATIONS.get(language or "", set())
+    sentences = []
+    current = ""
+    for piece in _SENTENCE_END.split(text.strip()):
+        piece = piece.strip()
+        if not piece:
+            continue
+        current = f"{current} {piece}" if current else piece
+        if _ends_with_abbreviation(current, abbreviations):
+            continue
+        sentences.extend([current] if len(current) <= max_chars else _split_long(current, max_chars))
+        current = ""
+    if current:
+        sentences.extend([current] if len(current) <= max_chars else _split_long(current, max_chars))
+    return sentences
+
+def _ends_with_abbreviation(text: str, abbreviations) -> bool:
+    if not text.endswith("."):
+        return False
+    last_word = text.rsplit(None, 1)[-1][:-1].lower()
+    # Single-letter initials ("J. Smith") never end a sentence
+    return last_word in abbreviations or (len(last_word) == 1 and last_word.isalpha())
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    pieces = []
+    current = ""
+    for clause in _CLAUSE_END.split(sentence):
+        for word in clause.split() if len(clause) > max_chars else [clause]:
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current and len(current) >= max_chars // 2:
+            pieces.append(current)
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
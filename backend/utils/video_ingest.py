@@ -0,0 +1,95 @@
+import os
+import json
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from utils.audio_ingest import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 30
+
+def probe_media(path: str, timeout: float = PROBE_TIMEOUT) -> Dict[str, Any]:
+    """Return ffprobe's stream and format information for a media file."""
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_streams", "-show_format", path]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True, timeout=timeout).stdout
+    except subprocess.TimeoutExpired:
+        raise HTTPException(400, "Timed out reading the media file")
+    except subprocess.CalledProcessError as e:
+        raise HTTPException(400, f"Could not read media file: {e.stderr.decode(errors='ignore').strip()}")
+    return json.loads(out or b"{}")
+
+def select_audio_stream(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Pick the default audio stream, or the first one if none is marked default."""
+    audio_streams = [stream for stream in info.get("streams", []) if stream.get("codec_type") == "audio"]
+    for stream in audio_streams:
+        if stream.get("disposition", {}).get("default"):
+            return stream
+    return audio_streams[0] if audio_streams else None
+
+class VideoAudioExtractor:
+    """
+    Extracts the speech track of a video as 16 kHz mono 16-bit WAV. Only the
+    audio stream is demuxed and decoded (video frames are never decoded) and
+    it is resampled once, straight to the rate the STT model uses.
+
+    Extractions run as ffmpeg processes, at most max_workers at a time, each
+    killed after timeout seconds and capped at max_seconds of output.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 600, max_seconds: float = 4 * 3600):
+        self.timeout = timeout
+        self.max_seconds = max_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="video-ingest")
+
+    def submit(self, video_path: str, output_path: Optional[str] = None) -> Future:
+        """Queue an extraction; the future resolves to the result of extract()."""
+        return self._pool.submit(self._extract, video_path, output_path)
+
+    def extract(self, video_path: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """Extract audio and return {"path", "duration", "codec", "bytes"}."""
+        return self.submit(video_path, output_path).result()
+
+    def _extract(self, video_path: str, output_path: Optional[str]) -> Dict[str, Any]:
+        info = probe_media(video_path)
+        stream = select_audio_stream(info)
+        if stream is None:
+            raise HTTPException(400, "The video has no audio track")
+
+        duration = float(stream.get("duration") or info.get("format", {}).get("duration") or 0)
+        if self.max_seconds and duration > self.max_seconds:
+            raise HTTPException(413, f"Audio is longer than the {self.max_seconds:.0f} second limit")
+
+        if output_path is None:
+            tmp_fd, output_path = tempfile.mkstemp(suffix="_audio.wav")
+            os.close(tmp_fd)
+        cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", video_path,
+               "-map", f"0:{stream['index']}", "-vn", "-sn", "-dn",
+               "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le"]
+        if self.max_seconds:
+            # Belt and braces for containers that misreport their duration
+            max_bytes = int(self.max_seconds * SAMPLE_RATE * 2) + 44
+            cmd += ["-t", str(self.max_seconds), "-fs", str(max_bytes)]
+        cmd.append(output_path)
+
+        try:
+            subprocess.run(cmd, capture_output=True, check=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            os.remove(output_path)
+            raise HTTPException(400, f"Audio extraction took longer than {self.timeout:.0f} seconds")
+        except subprocess.CalledProcessError as e:
+            os.remove(output_path)
+            raise HTTPException(400, f"Could not extract audio from video: {e.stderr.decode(errors='ignore').strip()}")
+
+        size = os.path.getsize(output_path)
+        logger.info(f"Extracted {stream.get('codec_name')} audio ({duration:.0f}s) from {video_path} to {output_path}")
+        return {"path": output_path, "duration": round(duration, 2), "codec": stream.get("codec_name"), "bytes": size}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)